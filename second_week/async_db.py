@@ -0,0 +1,81 @@
+"""
+Асинхронный фасад над DatabaseManager для обработчиков Flet.
+
+Каждый метод DatabaseManager доступен как корутина: вызов уходит в
+отдельный пул потоков, а цикл событий Flet в это время продолжает
+обрабатывать ввод. Пул по размеру совпадает с пулом читателей БД, так что
+параллельные чтения действительно идут параллельно; записи по-прежнему
+сериализуются под _write_lock внутри DatabaseManager.
+
+    from async_db import async_db
+
+    async def on_click(e):
+        accounts = await async_db.get_accounts_by_user(user_id)
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from db import DEFAULT_READ_POOL_SIZE, DatabaseManager, db_manager
+
+
+class AsyncDatabase:
+    """Awaitable-обёртка: ``await async_db.<метод>(...)`` для любого метода db."""
+
+    def __init__(self, db: DatabaseManager, max_workers: int = DEFAULT_READ_POOL_SIZE):
+        self.db = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """Выполняет произвольную блокирующую функцию в пуле БД."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str):
+        method = getattr(self.db, name)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LatestTask:
+    """
+    Запускает корутину через page.run_task, отменяя предыдущую, если она ещё
+    не завершилась: отрисуется только результат последнего запроса (например,
+    при быстрых кликах по стрелкам дат). Сам запрос в пуле не прерывается —
+    отменённая корутина просто не получает и не показывает его результат.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._future: Future | None = None
+
+    def run(self, handler, *args) -> Future:
+        self.cancel()
+        self._future = self.page.run_task(handler, *args)
+        return self._future
+
+    def cancel(self):
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+        self._future = None
+
+    @property
+    def pending(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+
+async_db = AsyncDatabase(db_manager)
@@ -0,0 +1,88 @@
+"""
+Бюджеты: прогресс, который ведут триггеры (budget_progress, одно чтение в
+get_budget_status), против пересчёта трат по операциям текущего периода на
+каждый показ. Отдельно — цена триггеров на вставку операции. В конце
+прогресс сверяется с операциями (check_budgets).
+
+    python benchmarks/bench_budgets.py --rows 300000 --inserts 2000
+"""
+
+import argparse
+import datetime
+import sys
+import time
+
+from common import bench, make_manager, seed_transactions, seed_user_with_account
+
+RESUM_STATUS = """
+    SELECT b.budget_id, b.amount_limit, COALESCE(SUM(t.amount), 0) AS spent
+    FROM budgets b
+    LEFT JOIN transactions t
+      ON t.account_id = b.account_id AND t.category_id = b.category_id
+     AND t.type = 'expense' AND t.transaction_date >= ?
+    WHERE b.account_id = ? AND b.user_id = ?
+    GROUP BY b.budget_id;
+"""
+
+
+def insert_ms(db, account_id, category_id, count) -> float:
+    """Среднее время add_transaction (одна операция = одна транзакция БД), мс."""
+    now = datetime.datetime.now()
+    start = time.perf_counter()
+    for i in range(count):
+        db.add_transaction(account_id, category_id, 100 + i, now, "bench", "expense")
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--inserts", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    db = make_manager("bench_budgets.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+    categories = [
+        r[0]
+        for r in db.conn.execute(
+            "SELECT category_id FROM categories WHERE user_id IS NULL AND type = 'expense';"
+        )
+    ]
+
+    plain_insert = insert_ms(db, account_id, categories[0], args.inserts)
+    start = time.perf_counter()
+    for category_id in categories:
+        db.add_budget(user_id, account_id, category_id, 5_000_000, "month")
+        db.add_budget(user_id, account_id, category_id, 1_500_000, "week")
+    backfill_ms = (time.perf_counter() - start) * 1000
+    budget_insert = insert_ms(db, account_id, categories[0], args.inserts)
+
+    month_start = int(
+        datetime.datetime.combine(
+            datetime.date.today().replace(day=1), datetime.time()
+        ).timestamp()
+    )
+    stored_ms = bench(lambda: db.get_budget_status(user_id, account_id), args.repeat)
+    resum_ms = bench(
+        lambda: db.conn.execute(RESUM_STATUS, (month_start, account_id, user_id)).fetchall(),
+        args.repeat,
+    )
+
+    print(f"rows={args.rows} budgets={2 * len(categories)}")
+    print(f"backfill of all budgets        : {backfill_ms:8.1f} ms")
+    print(f"status, trigger-maintained     : {stored_ms:8.3f} ms")
+    print(f"status, re-sum current period  : {resum_ms:8.3f} ms")
+    print(f"insert without budgets         : {plain_insert:8.3f} ms")
+    print(f"insert with budgets            : {budget_insert:8.3f} ms")
+
+    mismatches = db.check_budgets()
+    print(f"check_budgets: {len(mismatches)} mismatches")
+    db.close()
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Разбивка по категориям за период: GROUP BY в SQL (get_category_totals)
+против выборки всех строк периода и суммирования в Python.
+
+    python benchmarks/bench_category_totals.py --rows 500000
+"""
+
+import argparse
+import collections
+import datetime
+
+from common import (
+    TransactionType,
+    bench,
+    make_manager,
+    seed_transactions,
+    seed_user_with_account,
+)
+
+import periods
+
+
+def python_totals(db, user_id, account_id, period):
+    rows, _ = db.get_transactions_summary(
+        user_id, account_id, TransactionType.expense, period.start, period.end
+    )
+    totals = collections.Counter()
+    for r in rows:
+        totals[r["category_id"]] += r["amount"]
+    return totals.most_common()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = make_manager("bench_categories.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+    today = datetime.date.today()
+
+    print(f"rows={args.rows}")
+    print(f"{'period':<10}{'rows in period':>16}{'SQL, ms':>10}{'Python, ms':>12}")
+    for kind in ("month", "quarter", "year"):
+        period = periods.period_for(kind, today)
+        categories, _ = db.get_category_totals(
+            user_id, account_id, TransactionType.expense, period.start, period.end
+        )
+        count = sum(c["count"] for c in categories)
+
+        def sql():
+            db.get_category_totals(
+                user_id, account_id, TransactionType.expense, period.start, period.end
+            )
+
+        def python():
+            db.query_cache.clear()
+            python_totals(db, user_id, account_id, period)
+
+        print(
+            f"{kind:<10}{count:>16}{bench(sql, args.repeat):>10.2f}"
+            f"{bench(python, args.repeat):>12.2f}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Сводный баланс по всем счетам: один SQL-запрос с пересчётом по валютам
+(get_consolidated_balance) против цикла по счетам в Python с курсом на
+каждый счёт.
+
+    python benchmarks/bench_consolidated_balance.py --accounts 200 --days 1000
+"""
+
+import argparse
+import datetime
+
+from common import bench, make_manager, seed_user_with_account
+
+
+def python_loop(db, user_id, day):
+    total = 0
+    for acc in db.get_accounts_by_user(user_id):
+        row = db.conn.execute(
+            """
+            SELECT rate FROM exchange_rates
+            WHERE from_currency = ? AND to_currency = 'RUB' AND day <= ?
+            ORDER BY day DESC LIMIT 1;
+            """,
+            (acc["currency_code"], day),
+        ).fetchone()
+        rate = 1.0 if acc["currency_code"] == "RUB" else row[0]
+        total += round(acc["balance"] * rate)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1000, help="дней истории курсов")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    db = make_manager("bench_consolidated.db")
+    user_id, _ = seed_user_with_account(db)
+    for i in range(args.accounts - 1):
+        db.add_account(user_id, f"Account {i}", 10_000 + i, 1 + i % 3, None, "Wallet")
+    today = datetime.date.today()
+    db.add_exchange_rates(
+        (
+            (today - datetime.timedelta(days=d)).isoformat(),
+            code,
+            "RUB",
+            base + d / 1000,
+        )
+        for d in range(args.days)
+        for code, base in (("USD", 90.0), ("EUR", 98.0))
+    )
+
+    day = today.isoformat()
+    sql_ms = bench(lambda: db.get_consolidated_balance(user_id), args.repeat)
+    loop_ms = bench(lambda: python_loop(db, user_id, day), args.repeat)
+    print(f"accounts={args.accounts} rate days={args.days}")
+    print(f"SQL, one pass     : {sql_ms:8.3f} ms")
+    print(f"per-account loop  : {loop_ms:8.3f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
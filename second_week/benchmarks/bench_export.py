@@ -0,0 +1,77 @@
+"""
+Потоковый экспорт (exporter.export_transactions: fetchmany-пакеты сразу в
+файл) — пропускная способность в МБ/с по форматам и пик памяти Python
+(tracemalloc) против выгрузки через список словарей (fetchall, как в
+get_*-методах). Пик потокового экспорта не зависит от --rows.
+
+    python benchmarks/bench_export.py --rows 500000
+"""
+
+import argparse
+import csv
+import os
+import time
+import tracemalloc
+
+from common import make_manager, seed_transactions, seed_user_with_account, temp_db_path
+
+import exporter
+import money
+from queries import STATEMENTS
+
+
+def materialized_csv(db, user_id, path):
+    """Все строки в памяти списком dict, затем запись — для сравнения."""
+    params = db._export_params(user_id, None, None, None, None)
+    rows = [dict(r) for r in db.conn.execute(STATEMENTS["transactions_export"], params).fetchall()]
+    fmt = money.formatter()
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(exporter.EXPORT_COLUMNS)
+        for r in rows:
+            writer.writerow(
+                (r["date"], fmt(r["amount"]), r["type"], r["category"],
+                 r["description"], r["account"], r["currency"])
+            )
+
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk", type=int, default=exporter.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = make_manager("bench_export.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows, descriptions=["Продукты", "Такси до аэропорта", "bench"])
+
+    print(f"rows={args.rows} chunk={args.chunk}")
+    print("format   seconds    MB/s   rows/s")
+    for fmt in exporter.EXPORT_FORMATS:
+        path = temp_db_path(f"export.{fmt}")
+        start = time.perf_counter()
+        result = exporter.export_transactions(db, user_id, path, chunk_size=args.chunk)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{fmt:6} {elapsed:9.2f} {result['bytes'] / 2**20 / elapsed:7.1f} "
+            f"{result['exported'] / elapsed:8.0f}"
+        )
+        os.remove(path)
+
+    path = temp_db_path("export_mem.csv")
+    stream = peak_mb(lambda: exporter.export_transactions(db, user_id, path, chunk_size=args.chunk))
+    listed = peak_mb(lambda: materialized_csv(db, user_id, path))
+    print(f"peak Python memory, CSV: streaming {stream:.1f} MB, list of dicts {listed:.1f} MB")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
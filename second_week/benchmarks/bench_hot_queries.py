@@ -0,0 +1,76 @@
+"""
+Вызовов в секунду для горячих методов DatabaseManager:
+get_accounts_by_user и get_user_by_session_token.
+
+Для сравнения те же запросы выполняются «по-старому», как до query layer:
+новый курсор и with conn: на каждый вызов.
+
+    python benchmarks/bench_hot_queries.py --seconds 2
+"""
+
+import argparse
+import time
+
+from common import make_manager, seed_user_with_account
+
+from queries import STATEMENTS
+
+
+def calls_per_second(fn, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return calls / seconds
+
+
+def legacy_exec(conn, sql, params):
+    with conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return cur
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    db = make_manager("bench_hot.db")
+    user_id, _ = seed_user_with_account(db)
+    for i in range(4):
+        db.add_account(user_id, f"Account {i}", 0, 1, None, "Wallet")
+    token = db.create_session(user_id)
+    legacy = db._connect(db.db_file)
+
+    cases = {
+        "get_accounts_by_user": (
+            lambda: db.get_accounts_by_user(user_id),
+            lambda: [
+                dict(r)
+                for r in legacy_exec(
+                    legacy, STATEMENTS["accounts_by_user"], (user_id,)
+                ).fetchall()
+            ],
+        ),
+        "get_user_by_session_token": (
+            lambda: db.get_user_by_session_token(token),
+            lambda: legacy_exec(
+                legacy,
+                STATEMENTS["session_user"],
+                (token, int(time.time())),
+            ).fetchone(),
+        ),
+    }
+
+    print(f"{'method':<28}{'legacy, calls/s':>18}{'query layer, calls/s':>24}")
+    for name, (current, old) in cases.items():
+        old_cps = calls_per_second(old, args.seconds)
+        new_cps = calls_per_second(current, args.seconds)
+        print(f"{name:<28}{old_cps:>18,.0f}{new_cps:>24,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Пропускная способность импорта выписок (importer.import_transactions).
+
+    python benchmarks/bench_import.py --rows 1000000
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import time
+
+from common import make_manager, seed_user_with_account, temp_db_path
+
+import importer
+
+CATEGORIES = ["Продукты", "Транспорт", "Кафе и рестораны", "Зарплата", "Неизвестная"]
+
+
+def write_csv(path: str, rows: int, seed: int = 42):
+    rnd = random.Random(seed)
+    start = datetime.datetime(2020, 1, 1)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Дата", "Сумма", "Категория", "Описание"])
+        for _ in range(rows):
+            dt = start + datetime.timedelta(seconds=rnd.randrange(5 * 365 * 86400))
+            amount = round(rnd.uniform(-5000, 2000), 2) or 1.0
+            w.writerow(
+                [dt.isoformat(sep=" "), amount, rnd.choice(CATEGORIES), "bench row"]
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=importer.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    csv_path = temp_db_path("statement.csv")
+    write_csv(csv_path, args.rows)
+    db = make_manager("bench_import.db")
+    user_id, account_id = seed_user_with_account(db)
+
+    started = time.perf_counter()
+    result = importer.import_transactions(
+        db, user_id, account_id, csv_path, chunk_size=args.chunk
+    )
+    elapsed = time.perf_counter() - started
+
+    size_mb = os.path.getsize(csv_path) / 2**20
+    print(
+        f"imported={result['imported']} skipped={result['skipped']} "
+        f"in {elapsed:.1f}s: {result['imported'] / elapsed:,.0f} rows/s, "
+        f"{size_mb / elapsed:.1f} MB/s"
+    )
+    mismatches = db.check_daily_totals()
+    print("daily_totals OK" if not mismatches else f"{len(mismatches)} mismatches")
+
+
+if __name__ == "__main__":
+    main()
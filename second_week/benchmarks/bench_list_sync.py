@@ -0,0 +1,136 @@
+"""
+Объём данных и время одного обновления списка операций, когда изменилась
+одна строка: controls.clear() + построение всех строк против KeyedList.
+
+Страница Flet подключена к соединению-заглушке, которое сериализует
+команды так же, как сервер, и считает байты.
+
+    python benchmarks/bench_list_sync.py --rows 50 --repeat 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import common  # noqa: F401  (путь к second_week)
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.page import Page
+from flet.core.protocol import CommandEncoder
+
+from list_sync import KeyedList
+
+
+class CountingConnection(LocalConnection):
+    """Выполняет команды как локальное соединение и считает отправленные байты."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_sent = 0
+
+    def send_commands(self, session_id, commands):
+        results, messages = [], []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+            if message:
+                messages.append(message)
+        self.bytes_sent += len(json.dumps(messages, cls=CommandEncoder, separators=(",", ":")))
+
+        class Response:
+            pass
+
+        response = Response()
+        response.results = results
+        return response
+
+
+def make_rows(n: int, changed: int = -1):
+    return [
+        {
+            "transaction_id": i,
+            "category_name": "Продукты",
+            "description": f"покупка {i}" + (" (изм.)" if i == changed else ""),
+            "amount": 10_000 + i,
+            "transaction_date": 1_700_000_000 - i * 3600,
+        }
+        for i in range(n)
+    ]
+
+
+def build_tile(t: dict) -> ft.ListTile:
+    return ft.ListTile(
+        leading=ft.Icon(ft.icons.CATEGORY),
+        title=ft.Text(),
+        subtitle=ft.Text(),
+        trailing=ft.Column(
+            [ft.Text(weight=ft.FontWeight.BOLD), ft.Text(size=10)], spacing=2
+        ),
+    )
+
+
+def fill_tile(tile: ft.ListTile, t: dict):
+    amount_text, date_text = tile.trailing.controls
+    tile.title.value = t["category_name"]
+    tile.subtitle.value = t["description"]
+    amount_text.value = f"{t['amount'] / 100:.2f} ₽"
+    date_text.value = str(t["transaction_date"])
+
+
+def new_page():
+    conn = CountingConnection()
+    page = Page(conn, "bench", asyncio.new_event_loop())
+    list_view = ft.ListView()
+    page.add(list_view)
+    return conn, page, list_view
+
+
+def measure(refresh, conn, repeat: int):
+    conn.bytes_sent = 0
+    start = time.perf_counter()
+    for i in range(repeat):
+        refresh(i)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return conn.bytes_sent / repeat, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    conn, page, list_view = new_page()
+
+    def rebuild(i):
+        list_view.controls.clear()
+        for t in make_rows(args.rows, changed=i % args.rows):
+            tile = build_tile(t)
+            fill_tile(tile, t)
+            list_view.controls.append(tile)
+        page.update()
+
+    rebuild_bytes, rebuild_ms = measure(rebuild, conn, args.repeat)
+
+    conn, page, list_view = new_page()
+    rows = KeyedList(list_view, key=lambda t: t["transaction_id"], create=build_tile, fill=fill_tile)
+    page.update(*rows.sync(make_rows(args.rows)))
+
+    def keyed(i):
+        changed = rows.sync(make_rows(args.rows, changed=i % args.rows))
+        if changed:
+            page.update(*changed)
+
+    keyed_bytes, keyed_ms = measure(keyed, conn, args.repeat)
+
+    print(f"rows={args.rows}, one row changed per refresh")
+    print(f"{'':<16}{'bytes/refresh':>14}{'ms/refresh':>12}")
+    print(f"{'clear+rebuild':<16}{rebuild_bytes:>14.0f}{rebuild_ms:>12.2f}")
+    print(f"{'KeyedList':<16}{keyed_bytes:>14.0f}{keyed_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+REAL против INTEGER (минорные единицы) для сумм: размер таблицы, время
+SUM() и форматирования строк для списка операций.
+
+    python benchmarks/bench_money_storage.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+
+from common import bench, temp_db_path
+
+import money
+
+
+def build(path: str, column_type: str, values) -> sqlite3.Connection:
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE t (id INTEGER PRIMARY KEY, amount {column_type} NOT NULL);")
+    with conn:
+        conn.executemany("INSERT INTO t (amount) VALUES (?);", ((v,) for v in values))
+    conn.execute("VACUUM;")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    minor = [rnd.randrange(1_000, 500_000) for _ in range(args.rows)]
+    major = [m / 100 for m in minor]
+
+    real = build(temp_db_path("money_real.db"), "REAL", major)
+    integer = build(temp_db_path("money_int.db"), "INTEGER", minor)
+
+    real_sum = real.execute("SELECT SUM(amount) FROM t;").fetchone()[0]
+    int_sum = integer.execute("SELECT SUM(amount) FROM t;").fetchone()[0]
+    print(f"rows={args.rows}")
+    print(f"SUM REAL    = {real_sum!r}")
+    print(f"SUM INTEGER = {money.to_plain(int_sum)} (exact)")
+
+    size = {
+        name: os.path.getsize(temp_db_path(f"money_{name}.db")) / 1e6
+        for name in ("real", "int")
+    }
+    sum_ms = {
+        "real": bench(lambda: real.execute("SELECT SUM(amount) FROM t;").fetchone(), args.repeat),
+        "int": bench(lambda: integer.execute("SELECT SUM(amount) FROM t;").fetchone(), args.repeat),
+    }
+    page = 50
+    fmt = money.formatter("₽")
+    format_us = {
+        "real": bench(lambda: [f"{v:.2f} ₽" for v in major[:page]], 200) * 1000,
+        "int": bench(lambda: [fmt(v) for v in minor[:page]], 200) * 1000,
+    }
+
+    print(f"{'':<10}{'file, MB':>10}{'SUM, ms':>10}{f'format {page}, us':>16}")
+    for name in ("real", "int"):
+        print(f"{name:<10}{size[name]:>10.1f}{sum_ms[name]:>10.1f}{format_us[name]:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
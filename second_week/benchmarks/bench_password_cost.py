@@ -0,0 +1,54 @@
+"""
+Входов в секунду (verify_user) для разных стоимостей bcrypt.
+
+Для каждой стоимости замеряются последовательные входы и параллельные
+через verify_user_async (пул passwords.HASH_POOL_SIZE потоков).
+
+    python benchmarks/bench_password_cost.py --rounds 10 11 12 --logins 16
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from common import make_manager
+
+import passwords
+
+
+async def concurrent_logins(db, n: int):
+    results = await asyncio.gather(
+        *(db.verify_user_async("bench", "secret") for _ in range(n))
+    )
+    assert all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--logins", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"hash pool: {passwords.HASH_POOL_SIZE} threads")
+    print(f"{'cost':>4}  {'sequential/s':>12}  {'concurrent/s':>12}")
+    for rounds in args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(rounds)
+        db = make_manager(f"bench_pw_{rounds}.db")
+        db.add_user("bench", "bench@example.com", "secret")
+
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            assert db.verify_user("bench", "secret")
+        sequential = args.logins / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(concurrent_logins(db, args.logins))
+        concurrent = args.logins / (time.perf_counter() - start)
+
+        print(f"{rounds:>4}  {sequential:>12.1f}  {concurrent:>12.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Задержка нажатия стрелки на домашнем экране с предзагрузкой соседних
+периодов и без неё, а также фоновая цена предзагрузки.
+
+Для каждого шага: «без» — запрос следующего периода по холодному кэшу;
+«с» — соседи (и другая вкладка) уже загружены так, как это делает
+Prefetcher после отрисовки, и замеряется только отрисовка.
+
+    python benchmarks/bench_prefetch.py --rows 500000 --kind month --steps 24
+"""
+
+import argparse
+import datetime
+import time
+
+from common import TransactionType, make_manager, seed_transactions, seed_user_with_account
+
+import periods
+
+PAGE_SIZE = 50
+
+
+def summary(db, user_id, account_id, period, t_type):
+    return db.get_transactions_summary(
+        user_id, account_id, t_type, period.start, period.end, limit=PAGE_SIZE
+    )
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--kind", default="month", choices=periods.PERIOD_TYPES[:-1])
+    parser.add_argument("--steps", type=int, default=24)
+    args = parser.parse_args()
+
+    db = make_manager("bench_prefetch.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+    expense, income = TransactionType.expense, TransactionType.income
+
+    nav = periods.PeriodNavigator(periods.period_for(args.kind, datetime.date.today()))
+    cold, warm, background = [], [], []
+    for _ in range(args.steps):
+        target = nav.at(-1)
+        db.query_cache.clear()
+        cold.append(timed(lambda: summary(db, user_id, account_id, target, expense)))
+
+        db.query_cache.clear()
+        background.append(
+            timed(lambda: [
+                summary(db, user_id, account_id, p, t)
+                for p, t in ((nav.at(1), expense), (target, expense), (nav.current, income))
+            ])
+        )
+        warm.append(timed(lambda: summary(db, user_id, account_id, target, expense)))
+        nav.move(-1)
+
+    def median(values):
+        return sorted(values)[len(values) // 2]
+
+    print(f"rows={args.rows} kind={args.kind} steps={args.steps}")
+    print(f"arrow, no prefetch : {median(cold):8.3f} ms")
+    print(f"arrow, prefetched  : {median(warm):8.3f} ms")
+    print(f"prefetch (3 jobs)  : {median(background):8.3f} ms in background")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
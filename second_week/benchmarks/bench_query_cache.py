@@ -0,0 +1,69 @@
+"""
+get_transactions_summary с кэшем и без: пользователь ходит по периодам
+День -> Неделя -> Месяц -> Год и переключает вкладки, изредка добавляя
+операцию (инвалидация).
+
+    python benchmarks/bench_query_cache.py --rows 300000 --clicks 400
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+from common import TransactionType, make_manager, seed_transactions, seed_user_with_account
+
+import periods
+
+
+def ranges_for(today: datetime.date):
+    return [
+        (p.start, p.end)
+        for p in (periods.period_for(kind, today) for kind in ("day", "week", "month", "year"))
+    ]
+
+
+def run(db, user_id, account_id, clicks: int, write_every: int, cached: bool) -> float:
+    rnd = random.Random(7)
+    ranges = ranges_for(datetime.date.today())
+    start = time.perf_counter()
+    for i in range(clicks):
+        if not cached:
+            db.query_cache.clear()
+        if write_every and i % write_every == write_every - 1:
+            db.add_transaction(
+                account_id, 1, 1_000, datetime.datetime.now(), "bench", "expense"
+            )
+        t_type = rnd.choice(list(TransactionType))
+        start_date, end_date = rnd.choice(ranges)
+        db.get_transactions_summary(
+            user_id, account_id, t_type, start_date, end_date, limit=50
+        )
+    return (time.perf_counter() - start) / clicks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--clicks", type=int, default=400)
+    parser.add_argument("--write-every", type=int, default=20)
+    args = parser.parse_args()
+
+    db = make_manager("bench_query_cache.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+
+    uncached = run(db, user_id, account_id, args.clicks, args.write_every, False)
+    db.query_cache = type(db.query_cache)()
+    cached = run(db, user_id, account_id, args.clicks, args.write_every, True)
+
+    print(f"rows={args.rows} clicks={args.clicks} write every {args.write_every}")
+    print(f"no cache : {uncached:8.3f} ms/click")
+    print(f"cache    : {cached:8.3f} ms/click")
+    for name, value in db.query_cache.stats().items():
+        print(f"  {name:<14}{value:.3f}" if isinstance(value, float) else f"  {name:<14}{value}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
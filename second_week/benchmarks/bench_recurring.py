@@ -0,0 +1,98 @@
+"""
+Повторяющиеся операции: создание просроченных повторений одним пакетом
+(materialize_recurring) против add_transaction на каждое повторение, цена
+проверки «ничего не пора создавать» при каждом показе периода и прогноз
+будущих повторений без записи в БД.
+
+    python benchmarks/bench_recurring.py --rules 500 --days 365
+"""
+
+import argparse
+import datetime
+import time
+
+from common import bench, make_manager, seed_user_with_account
+
+import datecodec
+import recurrence
+
+FREQS = ("daily", "weekly", "monthly", "monthly", "yearly")
+
+
+def add_rules(db, user_id, account_id, count, days):
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    for i in range(count):
+        db.conn.execute(
+            """
+            INSERT INTO recurring_rules
+            (user_id, account_id, category_id, amount, description, type,
+             freq, interval, start_date, next_index, next_date)
+            VALUES (?, ?, 1, ?, 'bench', 'expense', ?, 1, ?, 0, ?);
+            """,
+            (user_id, account_id, 100 + i, FREQS[i % len(FREQS)], start.isoformat(), start.isoformat()),
+        )
+    db.conn.commit()
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def loop_materialize(db, user_id, account_id):
+    """По одной операции через add_transaction, как при ручном вводе."""
+    today = datetime.date.today()
+    for rule in db.get_recurring_rules(user_id):
+        for _, day in recurrence.occurrences(rule, 0, today):
+            db.add_transaction(
+                account_id, rule["category_id"], rule["amount"],
+                datecodec.day_start(day), rule["description"], rule["type"],
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365, help="сколько дней правила просрочены")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = make_manager("bench_recurring.db")
+    user_id, account_id = seed_user_with_account(db)
+    add_rules(db, user_id, account_id, args.rules, args.days)
+    created = 0
+
+    def batch():
+        nonlocal created
+        created = db.materialize_recurring()
+
+    batch_ms = timed(batch)
+    loop_db = make_manager("bench_recurring_loop.db")
+    loop_user, loop_account = seed_user_with_account(loop_db)
+    add_rules(loop_db, loop_user, loop_account, args.rules, args.days)
+    loop_ms = timed(lambda: loop_materialize(loop_db, loop_user, loop_account))
+    loop_db.close()
+
+    today = datetime.date.today()
+    idle_us = bench(lambda: db.materialize_recurring(user_id=user_id), args.repeat) * 1000
+    forecast = db.get_upcoming_occurrences(user_id, today, today + datetime.timedelta(days=365))
+    forecast_ms = bench(
+        lambda: db.get_upcoming_occurrences(
+            user_id, today, today + datetime.timedelta(days=365)
+        ),
+        10,
+    )
+
+    print(f"rules={args.rules} overdue days={args.days} occurrences={created}")
+    print(f"materialize, one batch    : {batch_ms:10.1f} ms")
+    print(f"add_transaction per row   : {loop_ms:10.1f} ms")
+    print(f"nothing due (period view) : {idle_us:10.1f} us")
+    print(f"forecast, next 365 days   : {forecast_ms:10.1f} ms ({len(forecast)} virtual rows)")
+    balances = db.check_balances()
+    print("balances OK" if not balances else f"balance mismatches: {balances}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
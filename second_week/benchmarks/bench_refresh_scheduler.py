@@ -0,0 +1,108 @@
+"""
+Походы в БД и кадры (page.update) на одно взаимодействие с экраном
+операций: обновление на каждый клик против RefreshScheduler
+(debounce + склейка + пропуск по ключу).
+
+Клики воспроизводятся с реальными паузами, отрисовка делает тот же запрос,
+что и HomeView (get_transactions_summary на первую страницу).
+
+    python benchmarks/bench_refresh_scheduler.py --rows 100000
+"""
+
+import argparse
+import asyncio
+import datetime
+import threading
+import time
+
+from common import TransactionType, make_manager, seed_transactions, seed_user_with_account
+
+from refresh import DEFAULT_DEBOUNCE_SECONDS, RefreshScheduler
+
+# (название, шаги, пауза между кликами в секундах); шаг — сдвиг даты в днях
+# или "tab" для переключения вкладки
+SCENARIOS = [
+    ("hold arrow x20", [1] * 20, 0.04),
+    ("back and forth x6", [1, -1] * 6, 0.06),
+    ("tab flip x2", ["tab", "tab"], 0.08),
+    ("slow clicks x5", [1] * 5, 0.4),
+]
+
+
+class LoopPage:
+    """Минимальная замена ft.Page: run_task на фоновом цикле событий."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run_task(self, handler, *args):
+        return asyncio.run_coroutine_threadsafe(handler(*args), self.loop)
+
+    def update(self):
+        pass
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def run_scenario(db, user_id, account_id, steps, gap, delay):
+    state = {"day": datetime.date.today(), "tab": 0}
+    counters = {"db": 0, "frames": 0}
+    page = LoopPage()
+
+    def key():
+        return (account_id, state["tab"], state["day"])
+
+    async def render():
+        counters["db"] += 1
+        t_type = TransactionType.expense if state["tab"] == 0 else TransactionType.income
+        await asyncio.to_thread(
+            db.get_transactions_summary,
+            user_id, account_id, t_type, state["day"], state["day"], limit=50,
+        )
+        scheduler.update()
+
+    scheduler = RefreshScheduler(page, render=render, key=key, delay=delay)
+    # Экран уже показан: первая отрисовка не входит в замер
+    scheduler.request(delay=0)
+    time.sleep(0.3)
+    base_db, base_frames = counters["db"], scheduler.frames
+
+    for step in steps:
+        if step == "tab":
+            state["tab"] = 1 - state["tab"]
+        else:
+            state["day"] += datetime.timedelta(days=step)
+        if delay is None:
+            # Старое поведение: отрисовка на каждый клик
+            page.run_task(render)
+        else:
+            scheduler.request()
+        time.sleep(gap)
+    time.sleep((delay or 0) + 0.5)
+    page.close()
+    return counters["db"] - base_db, scheduler.frames - base_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--delay", type=float, default=DEFAULT_DEBOUNCE_SECONDS)
+    args = parser.parse_args()
+
+    db = make_manager("bench_refresh.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+
+    print(f"debounce: {args.delay * 1000:.0f} ms")
+    print(f"{'scenario':<20}{'clicks':>7}{'db every':>10}{'db sched':>10}{'frames every':>14}{'frames sched':>14}")
+    for name, steps, gap in SCENARIOS:
+        every = run_scenario(db, user_id, account_id, steps, gap, None)
+        sched = run_scenario(db, user_id, account_id, steps, gap, args.delay)
+        print(f"{name:<20}{len(steps):>7}{every[0]:>10}{sched[0]:>10}{every[1]:>14}{sched[1]:>14}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
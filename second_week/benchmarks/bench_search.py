@@ -0,0 +1,65 @@
+"""
+Поиск операций: FTS5 (search_transactions) против LIKE '%…%' по описанию.
+LIKE к тому же не находит «Такси» по «такси» — NOCASE в SQLite только для ASCII.
+
+    python benchmarks/bench_search.py --rows 1000000
+"""
+
+import argparse
+import datetime
+
+from common import bench, make_manager, seed_transactions, seed_user_with_account
+
+import periods
+
+# частые, средние и редкие описания (доля строк ~ вес / сумма весов)
+DESCRIPTIONS = (
+    ["Продукты в магазине"] * 40
+    + ["Кофе с собой", "Такси домой", "Обед в столовой", "Бензин"] * 5
+    + [f"Подписка сервис {i}" for i in range(20)]
+    + ["Такси до аэропорта Шереметьево"]
+)
+
+LIKE_SQL = """
+    SELECT t.* FROM transactions t
+    JOIN accounts a ON a.account_id = t.account_id AND a.user_id = ?
+    WHERE t.description LIKE ?
+    ORDER BY t.transaction_id DESC
+    LIMIT 50;
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = make_manager("bench_search.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows, descriptions=DESCRIPTIONS)
+    month = periods.period_for("month", datetime.date.today())
+    month_filter = {"start_date": month.start, "end_date": month.end}
+
+    print(f"rows={args.rows}")
+    print(f"{'query':<26}{'found':>8}{'FTS, ms':>10}{'LIKE, ms':>10}")
+    for query, like, filters in (
+        ("продукты", "%продукты%", None),
+        ("такси", "%такси%", None),
+        ("так", "%так%", None),
+        ("шереметьево", "%шереметьево%", None),
+        ("такси аэропорт", "%такси%аэропорт%", None),
+        ("шереметьево", "%шереметьево%", month_filter),
+    ):
+        found, _ = db.search_transactions(user_id, query, filters)
+        fts_ms = bench(lambda: db.search_transactions(user_id, query, filters), args.repeat)
+        like_ms = bench(
+            lambda: db.conn.execute(LIKE_SQL, (user_id, like)).fetchall(), args.repeat
+        )
+        label = query + (" (month)" if filters else "")
+        print(f"{label:<26}{len(found):>8}{fts_ms:>10.2f}{like_ms:>10.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
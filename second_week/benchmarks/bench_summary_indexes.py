@@ -0,0 +1,60 @@
+"""
+Латентность get_transactions_summary до и после миграции с индексами (v1).
+
+    python benchmarks/bench_summary_indexes.py --rows 300000
+"""
+
+import argparse
+import datetime
+
+from common import bench, make_manager, seed_transactions, seed_user_with_account
+
+from db import MIGRATIONS, TransactionType
+
+INDEXES = (
+    "ix_transactions_account_type_date",
+    "ix_transactions_account_date",
+    "ix_sessions_expires_at",
+    "ix_categories_user_type",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = make_manager("bench_indexes.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+
+    # Откатываем БД к состоянию «до миграции» v1 (остальные миграции не трогаем)
+    for name in INDEXES:
+        db.conn.execute(f"DROP INDEX IF EXISTS {name};")
+    db.conn.commit()
+
+    today = datetime.date.today()
+    periods = {
+        "day": (today, today),
+        "month": (today.replace(day=1), today),
+        "year": (today.replace(month=1, day=1), today),
+    }
+
+    def run(start, end):
+        return lambda: db.get_transactions_summary(
+            user_id, account_id, TransactionType.expense, start, end
+        )
+
+    before = {p: bench(run(*r), args.repeat) for p, r in periods.items()}
+    db.conn.executescript(dict(MIGRATIONS)[1])
+    after = {p: bench(run(*r), args.repeat) for p, r in periods.items()}
+
+    print(f"rows={args.rows}, median of {args.repeat} runs")
+    print(f"{'period':<8}{'before, ms':>12}{'after, ms':>12}{'speedup':>10}")
+    for p in periods:
+        print(f"{p:<8}{before[p]:>12.2f}{after[p]:>12.2f}{before[p] / after[p]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
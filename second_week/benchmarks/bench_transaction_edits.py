@@ -0,0 +1,89 @@
+"""
+Правка и удаление операций со сдвигом баланса на разницу
+(update_transaction / delete_transactions) против пересчёта баланса по всей
+истории счёта после каждого изменения. В конце сверяются инварианты:
+balance = opening_balance + сумма операций со знаком (check_balances)
+и daily_totals = агрегат по операциям (check_daily_totals).
+
+    python benchmarks/bench_transaction_edits.py --rows 300000 --batch 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from common import bench, make_manager, seed_transactions, seed_user_with_account
+
+RECOMPUTE_BALANCE = """
+    UPDATE accounts SET balance = opening_balance + COALESCE((
+        SELECT SUM(CASE type WHEN 'income' THEN amount ELSE -amount END)
+        FROM transactions WHERE transactions.account_id = accounts.account_id
+    ), 0)
+    WHERE account_id = ?;
+"""
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def recompute_delete(db, account_id, ids):
+    """Удаление по одной строке с пересчётом баланса из истории."""
+    with db.conn:
+        for i in ids:
+            db.conn.execute("DELETE FROM transactions WHERE transaction_id = ?;", (i,))
+            db.conn.execute(RECOMPUTE_BALANCE, (account_id,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    db = make_manager("bench_edits.db")
+    user_id, account_id = seed_user_with_account(db)
+    seed_transactions(db, account_id, args.rows)
+    with db.conn:  # seed_transactions пишет в обход баланса
+        db.conn.execute(RECOMPUTE_BALANCE, (account_id,))
+    db.take_balance_snapshots()
+
+    rnd = random.Random(7)
+    ids = rnd.sample(range(1, args.rows + 1), 2 * args.batch + args.repeat)
+    edit_ids = iter(ids[2 * args.batch:])
+
+    update_ms = bench(
+        lambda: db.update_transaction(
+            next(edit_ids), user_id, amount=rnd.randrange(1_000, 500_000)
+        ),
+        args.repeat,
+    )
+    recompute_ms = bench(
+        lambda: db.conn.execute(RECOMPUTE_BALANCE, (account_id,)), args.repeat
+    )
+    batch_ms = timed(lambda: db.delete_transactions(ids[: args.batch], user_id))
+    # пересчёт по истории — на десятой части пакета, иначе ждать слишком долго
+    slice_ = ids[args.batch: args.batch + max(1, args.batch // 10)]
+    loop_ms = timed(lambda: recompute_delete(db, account_id, slice_))
+    loop_ms *= args.batch / len(slice_)
+
+    print(f"rows={args.rows} batch={args.batch}")
+    print(f"update_transaction (delta)     : {update_ms:10.3f} ms")
+    print(f"balance recompute from history : {recompute_ms:10.3f} ms")
+    print(f"delete_transactions, batch     : {batch_ms:10.1f} ms")
+    print(f"delete + recompute per row     : {loop_ms:10.1f} ms (extrapolated)")
+
+    balances = db.check_balances()
+    totals = db.check_daily_totals()
+    print("balances OK" if not balances else f"balance mismatches: {balances}")
+    print("daily_totals OK" if not totals else f"daily_totals mismatches: {len(totals)}")
+    db.close()
+    return 1 if balances or totals else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Общие помощники для бенчмарков: временная БД и генерация тестовых данных.
+
+Скрипты запускаются из каталога second_week, например:
+    python benchmarks/bench_summary_indexes.py --rows 300000
+"""
+
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+SECOND_WEEK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SECOND_WEEK_DIR not in sys.path:
+    sys.path.insert(0, SECOND_WEEK_DIR)
+
+# db.py при импорте создаёт глобальный db_manager в текущем каталоге,
+# поэтому импортируем его из временной папки, чтобы не трогать рабочую БД.
+_TMP_DIR = tempfile.mkdtemp(prefix="fm_bench_")
+_cwd = os.getcwd()
+os.chdir(_TMP_DIR)
+try:
+    from db import DatabaseManager, TransactionType  # noqa: E402
+finally:
+    os.chdir(_cwd)
+
+
+def temp_db_path(name: str = "bench.db") -> str:
+    return os.path.join(_TMP_DIR, name)
+
+
+def make_manager(name: str = "bench.db") -> DatabaseManager:
+    path = temp_db_path(name)
+    if os.path.exists(path):
+        os.remove(path)
+    return DatabaseManager(path)
+
+
+def seed_user_with_account(db: DatabaseManager, username: str = "bench"):
+    """Создаёт пользователя и один рублёвый счёт, возвращает (user_id, account_id)."""
+    db.add_user(username, f"{username}@example.com", "bench-password")
+    user_id = db.conn.execute(
+        "SELECT user_id FROM users WHERE username = ?;", (username,)
+    ).fetchone()[0]
+    db.add_account(user_id, "Bench", 0, 1, None, "Wallet")
+    account_id = db.conn.execute(
+        "SELECT MAX(account_id) FROM accounts WHERE user_id = ?;", (user_id,)
+    ).fetchone()[0]
+    return user_id, account_id
+
+
+def seed_transactions(
+    db: DatabaseManager,
+    account_id: int,
+    rows: int,
+    days: int = 5 * 365,
+    seed: int = 42,
+    descriptions: list[str] | None = None,
+):
+    """
+    Заливает rows случайных транзакций за последние days дней одним executemany.
+    descriptions — из чего выбирать описание (по умолчанию везде "bench").
+    """
+    rnd = random.Random(seed)
+    categories = {
+        t.value: [
+            r[0]
+            for r in db.conn.execute(
+                "SELECT category_id FROM categories WHERE user_id IS NULL AND type = ?;",
+                (t.value,),
+            )
+        ]
+        for t in TransactionType
+    }
+    now = datetime.datetime.now().replace(microsecond=0)
+
+    def gen():
+        for _ in range(rows):
+            t_type = "expense" if rnd.random() < 0.8 else "income"
+            dt = now - datetime.timedelta(seconds=rnd.randrange(days * 86400))
+            yield (
+                account_id,
+                rnd.choice(categories[t_type]),
+                rnd.randrange(1_000, 500_000),  # минорные единицы
+                int(dt.timestamp()),  # секунды epoch, как в БД
+                rnd.choice(descriptions) if descriptions else "bench",
+                t_type,
+            )
+
+    with db.conn:
+        db.conn.executemany(
+            """
+            INSERT INTO transactions
+            (account_id, category_id, amount, transaction_date, description, type)
+            VALUES (?, ?, ?, ?, ?, ?);
+            """,
+            gen(),
+        )
+
+
+def bench(fn, repeat: int = 20):
+    """Возвращает медиану времени вызова fn() в миллисекундах."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
@@ -0,0 +1,75 @@
+"""
+Преобразование дат между приложением и БД.
+
+В БД моменты времени (transactions.transaction_date, sessions.expires_at)
+хранятся целыми секундами Unix epoch (UTC). Интерфейс и пользовательский
+ввод работают с «наивными» локальными datetime/date — всё преобразование
+сосредоточено здесь. Дни (daily_totals.day, balance_snapshots.day) —
+локальные даты в виде "YYYY-MM-DD".
+"""
+
+import datetime
+import time
+
+
+def now_epoch() -> int:
+    return int(time.time())
+
+
+def to_epoch(value: datetime.datetime | datetime.date | str | int) -> int:
+    """
+    Локальный datetime/date или ISO-строка -> секунды epoch (UTC).
+    Наивные значения считаются локальным временем. ValueError при ошибке.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.strip())
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    if isinstance(value, datetime.date):
+        return day_start(value)
+    raise ValueError(f"Неподдерживаемое значение даты: {value!r}")
+
+
+def from_epoch(ts: int) -> datetime.datetime:
+    """Секунды epoch -> наивный локальный datetime."""
+    return datetime.datetime.fromtimestamp(ts)
+
+
+def day_start(day: datetime.date) -> int:
+    """Начало локального дня в секундах epoch."""
+    return int(datetime.datetime.combine(day, datetime.time.min).timestamp())
+
+
+def day_range(start: datetime.date, end: datetime.date) -> tuple[int, int]:
+    """
+    Полуоткрытый интервал [start 00:00, end+1 00:00) в секундах epoch —
+    для условий ``ts >= ? AND ts < ?`` по индексу.
+    """
+    return day_start(start), day_start(end + datetime.timedelta(days=1))
+
+
+class DayLabels:
+    """
+    Подпись дня для отметки времени (например "15 Jul") без разбора каждой
+    строки: строки списка идут по дате, поэтому пока отметка попадает в уже
+    известный локальный день, возвращается готовая строка.
+    """
+
+    def __init__(self, fmt: str = "%d %b"):
+        self.fmt = fmt
+        self._start = 0
+        self._end = 0
+        self._label = ""
+        self._labels: dict[datetime.date, str] = {}
+
+    def __call__(self, ts: int) -> str:
+        if not (self._start <= ts < self._end):
+            day = datetime.datetime.fromtimestamp(ts).date()
+            self._start, self._end = day_range(day, day)
+            label = self._labels.get(day)
+            if label is None:
+                label = self._labels[day] = day.strftime(self.fmt)
+            self._label = label
+        return self._label
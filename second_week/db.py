@@ -1,10 +1,15 @@
 import os
 import datetime
+import json
+import pathlib
+import queue
+import re
 import secrets
 import sqlite3
-import bcrypt
+import threading
+from contextlib import contextmanager
 from enum import Enum
-from typing import Any, Iterable
+from typing import Any, Callable, Hashable, Iterable, Iterator
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, select, or_, func, update, delete, and_
 from sqlalchemy.sql import functions
@@ -17,10 +22,701 @@ from models.currency import Currency
 from models.account import Account
 from models.category import Category, TransactionType
 from models.transaction import Transaction
+import datecodec
+import passwords
+import recurrence
+from queries import STATEMENTS, STATEMENT_CACHE_SIZE
+from query_cache import QueryCache
+from rates import DEFAULT_BASE_CURRENCY, RateCache
+from session_cache import SessionCache
 
 load_dotenv()
 
 
+# --- Миграции схемы ----------------------------------------------------------
+
+# Базовая схема создаётся в _create_tables (версия 0), всё остальное — только
+# через миграции. Применённая версия хранится в PRAGMA user_version, поэтому
+# каждая миграция выполняется ровно один раз для каждого файла БД.
+
+MIGRATIONS: list[tuple[int, str]] = [
+    (
+        1,
+        """
+        -- Покрывающий индекс для сумм/списков за период: SUM(amount) считается
+        -- прямо по индексу, без обращения к строкам таблицы.
+        CREATE INDEX IF NOT EXISTS ix_transactions_account_type_date
+            ON transactions (account_id, type, transaction_date, amount);
+        -- Лента счёта без фильтра по типу (get_transactions_by_account).
+        CREATE INDEX IF NOT EXISTS ix_transactions_account_date
+            ON transactions (account_id, transaction_date);
+        CREATE INDEX IF NOT EXISTS ix_sessions_expires_at
+            ON sessions (expires_at);
+        CREATE INDEX IF NOT EXISTS ix_categories_user_type
+            ON categories (user_id, type);
+        """,
+    ),
+    (
+        2,
+        """
+        -- Дневные итоги по счёту и типу: сумма за год — не более ~365 строк.
+        -- Поддерживаются триггерами в той же транзакции, что и изменение
+        -- transactions, поэтому любые пути записи держат их актуальными.
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            account_id  INTEGER NOT NULL,
+            type        TEXT NOT NULL,
+            day         TEXT NOT NULL,                      -- YYYY-MM-DD
+            total       REAL NOT NULL DEFAULT 0,
+            count       INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (account_id, type, day),
+            FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type, substr(NEW.transaction_date, 1, 10),
+                    NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10);
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10) AND count <= 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10);
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10) AND count <= 0;
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type, substr(NEW.transaction_date, 1, 10),
+                    NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        INSERT INTO daily_totals (account_id, type, day, total, count)
+        SELECT account_id, type, substr(transaction_date, 1, 10), SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY account_id, type, substr(transaction_date, 1, 10);
+        """,
+    ),
+    (
+        3,
+        """
+        -- Баланс как журнал: opening_balance + сумма операций. accounts.balance
+        -- остаётся кэшем текущего значения и меняется только дельтами.
+        ALTER TABLE accounts ADD COLUMN opening_balance REAL NOT NULL DEFAULT 0;
+        UPDATE accounts SET opening_balance = balance - COALESCE((
+            SELECT SUM(CASE d.type WHEN 'income' THEN d.total ELSE -d.total END)
+            FROM daily_totals d WHERE d.account_id = accounts.account_id
+        ), 0);
+
+        -- Баланс счёта на конец дня day. Баланс на дату = последний снимок
+        -- не позже даты + daily_totals после снимка.
+        CREATE TABLE IF NOT EXISTS balance_snapshots (
+            account_id  INTEGER NOT NULL,
+            day         TEXT NOT NULL,                      -- YYYY-MM-DD
+            balance     REAL NOT NULL,
+            PRIMARY KEY (account_id, day),
+            FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        -- Операции задним числом сдвигают все снимки начиная с их дня.
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_snapshots_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= substr(NEW.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_snapshots_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= substr(OLD.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_snapshots_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= substr(OLD.transaction_date, 1, 10);
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= substr(NEW.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_opening_balance_au
+        AFTER UPDATE OF opening_balance ON accounts
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance + NEW.opening_balance - OLD.opening_balance
+            WHERE account_id = NEW.account_id;
+        END;
+        """,
+    ),
+    (
+        4,
+        """
+        -- Суммы в минорных единицах (INTEGER). Все существующие валюты имеют
+        -- 2 знака после запятой, поэтому множитель везде 100.
+        -- Колонку с другим типом можно получить только через
+        -- ADD -> UPDATE -> DROP -> RENAME; триггеры и индекс, ссылающиеся
+        -- на эти колонки, пересоздаются в конце.
+        DROP TRIGGER IF EXISTS trg_transactions_daily_ai;
+        DROP TRIGGER IF EXISTS trg_transactions_daily_ad;
+        DROP TRIGGER IF EXISTS trg_transactions_daily_au;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_ai;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_ad;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_au;
+        DROP TRIGGER IF EXISTS trg_accounts_opening_balance_au;
+        DROP INDEX IF EXISTS ix_transactions_account_type_date;
+
+        ALTER TABLE currencies ADD COLUMN minor_units INTEGER NOT NULL DEFAULT 2;
+
+        ALTER TABLE transactions ADD COLUMN amount_minor INTEGER NOT NULL DEFAULT 0;
+        UPDATE transactions SET amount_minor = CAST(ROUND(amount * 100) AS INTEGER);
+        ALTER TABLE transactions DROP COLUMN amount;
+        ALTER TABLE transactions RENAME COLUMN amount_minor TO amount;
+
+        ALTER TABLE accounts ADD COLUMN balance_minor INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE accounts ADD COLUMN opening_balance_minor INTEGER NOT NULL DEFAULT 0;
+        UPDATE accounts
+        SET balance_minor = CAST(ROUND(balance * 100) AS INTEGER),
+            opening_balance_minor = CAST(ROUND(opening_balance * 100) AS INTEGER);
+        ALTER TABLE accounts DROP COLUMN balance;
+        ALTER TABLE accounts DROP COLUMN opening_balance;
+        ALTER TABLE accounts RENAME COLUMN balance_minor TO balance;
+        ALTER TABLE accounts RENAME COLUMN opening_balance_minor TO opening_balance;
+
+        ALTER TABLE balance_snapshots ADD COLUMN balance_minor INTEGER NOT NULL DEFAULT 0;
+        UPDATE balance_snapshots SET balance_minor = CAST(ROUND(balance * 100) AS INTEGER);
+        ALTER TABLE balance_snapshots DROP COLUMN balance;
+        ALTER TABLE balance_snapshots RENAME COLUMN balance_minor TO balance;
+
+        -- daily_totals — производные данные: пересобираем из transactions
+        DROP TABLE daily_totals;
+        CREATE TABLE daily_totals (
+            account_id  INTEGER NOT NULL,
+            type        TEXT NOT NULL,
+            day         TEXT NOT NULL,                      -- YYYY-MM-DD
+            total       INTEGER NOT NULL DEFAULT 0,         -- минорные единицы
+            count       INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (account_id, type, day),
+            FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        INSERT INTO daily_totals (account_id, type, day, total, count)
+        SELECT account_id, type, substr(transaction_date, 1, 10), SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY account_id, type, substr(transaction_date, 1, 10);
+
+        CREATE INDEX ix_transactions_account_type_date
+            ON transactions (account_id, type, transaction_date, amount);
+
+        CREATE TRIGGER trg_transactions_daily_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type, substr(NEW.transaction_date, 1, 10),
+                    NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        CREATE TRIGGER trg_transactions_daily_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10);
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10) AND count <= 0;
+        END;
+
+        CREATE TRIGGER trg_transactions_daily_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10);
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = substr(OLD.transaction_date, 1, 10) AND count <= 0;
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type, substr(NEW.transaction_date, 1, 10),
+                    NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= substr(NEW.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= substr(OLD.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= substr(OLD.transaction_date, 1, 10);
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= substr(NEW.transaction_date, 1, 10);
+        END;
+
+        CREATE TRIGGER trg_accounts_opening_balance_au
+        AFTER UPDATE OF opening_balance ON accounts
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance + NEW.opening_balance - OLD.opening_balance
+            WHERE account_id = NEW.account_id;
+        END;
+        """,
+    ),
+    (
+        5,
+        """
+        -- Даты — целые секунды epoch (UTC): сравнения чисел вместо строк
+        -- разного формата ('T' / ' '), диапазоны [start, end) идут по индексу.
+        -- transaction_date хранился как локальное время -> модификатор 'utc';
+        -- expires_at уже был в UTC. День для rollup-ов — локальная дата.
+        DROP TRIGGER IF EXISTS trg_transactions_daily_ai;
+        DROP TRIGGER IF EXISTS trg_transactions_daily_ad;
+        DROP TRIGGER IF EXISTS trg_transactions_daily_au;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_ai;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_ad;
+        DROP TRIGGER IF EXISTS trg_transactions_snapshots_au;
+        DROP TRIGGER IF EXISTS trg_accounts_opening_balance_au;
+        DROP INDEX IF EXISTS ix_transactions_account_type_date;
+        DROP INDEX IF EXISTS ix_transactions_account_date;
+        DROP INDEX IF EXISTS ix_sessions_expires_at;
+
+        ALTER TABLE transactions ADD COLUMN transaction_ts INTEGER NOT NULL DEFAULT 0;
+        UPDATE transactions
+        SET transaction_ts = CAST(strftime('%s', transaction_date, 'utc') AS INTEGER);
+        ALTER TABLE transactions DROP COLUMN transaction_date;
+        ALTER TABLE transactions RENAME COLUMN transaction_ts TO transaction_date;
+
+        ALTER TABLE sessions ADD COLUMN expires_ts INTEGER NOT NULL DEFAULT 0;
+        UPDATE sessions SET expires_ts = CAST(strftime('%s', expires_at) AS INTEGER);
+        ALTER TABLE sessions DROP COLUMN expires_at;
+        ALTER TABLE sessions RENAME COLUMN expires_ts TO expires_at;
+
+        DELETE FROM daily_totals;
+        INSERT INTO daily_totals (account_id, type, day, total, count)
+        SELECT account_id, type, date(transaction_date, 'unixepoch', 'localtime'),
+               SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY account_id, type, date(transaction_date, 'unixepoch', 'localtime');
+
+        CREATE INDEX ix_transactions_account_type_date
+            ON transactions (account_id, type, transaction_date, amount);
+        CREATE INDEX ix_transactions_account_date
+            ON transactions (account_id, transaction_date);
+        CREATE INDEX ix_sessions_expires_at
+            ON sessions (expires_at);
+
+        CREATE TRIGGER trg_transactions_daily_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type,
+                    date(NEW.transaction_date, 'unixepoch', 'localtime'), NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        CREATE TRIGGER trg_transactions_daily_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = date(OLD.transaction_date, 'unixepoch', 'localtime');
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = date(OLD.transaction_date, 'unixepoch', 'localtime')
+              AND count <= 0;
+        END;
+
+        CREATE TRIGGER trg_transactions_daily_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE daily_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = date(OLD.transaction_date, 'unixepoch', 'localtime');
+            DELETE FROM daily_totals
+            WHERE account_id = OLD.account_id AND type = OLD.type
+              AND day = date(OLD.transaction_date, 'unixepoch', 'localtime')
+              AND count <= 0;
+            INSERT INTO daily_totals (account_id, type, day, total, count)
+            VALUES (NEW.account_id, NEW.type,
+                    date(NEW.transaction_date, 'unixepoch', 'localtime'), NEW.amount, 1)
+            ON CONFLICT (account_id, type, day) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= date(NEW.transaction_date, 'unixepoch', 'localtime');
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= date(OLD.transaction_date, 'unixepoch', 'localtime');
+        END;
+
+        CREATE TRIGGER trg_transactions_snapshots_au
+        AFTER UPDATE OF account_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance
+                - CASE OLD.type WHEN 'income' THEN OLD.amount ELSE -OLD.amount END
+            WHERE account_id = OLD.account_id
+              AND day >= date(OLD.transaction_date, 'unixepoch', 'localtime');
+            UPDATE balance_snapshots
+            SET balance = balance
+                + CASE NEW.type WHEN 'income' THEN NEW.amount ELSE -NEW.amount END
+            WHERE account_id = NEW.account_id
+              AND day >= date(NEW.transaction_date, 'unixepoch', 'localtime');
+        END;
+
+        CREATE TRIGGER trg_accounts_opening_balance_au
+        AFTER UPDATE OF opening_balance ON accounts
+        BEGIN
+            UPDATE balance_snapshots
+            SET balance = balance + NEW.opening_balance - OLD.opening_balance
+            WHERE account_id = NEW.account_id;
+        END;
+        """,
+    ),
+    (
+        6,
+        """
+        -- category_id в индексе периода: разбивка по категориям (GROUP BY)
+        -- считается только по индексу, без чтения строк transactions.
+        DROP INDEX IF EXISTS ix_transactions_account_type_date;
+        CREATE INDEX ix_transactions_account_type_date
+            ON transactions (account_id, type, transaction_date, category_id, amount);
+        """,
+    ),
+    (
+        7,
+        """
+        -- Курсы валют: 1 from_currency = rate to_currency начиная с day.
+        -- Ключ (from, to, day): курс на дату — один шаг по индексу назад.
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            from_currency  TEXT NOT NULL,
+            to_currency    TEXT NOT NULL,
+            day            TEXT NOT NULL,                   -- YYYY-MM-DD
+            rate           REAL NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (from_currency, to_currency, day)
+        ) WITHOUT ROWID;
+        """,
+    ),
+    (
+        8,
+        """
+        -- Полнотекстовый поиск по описанию и названию категории; rowid =
+        -- transaction_id. unicode61 приводит регистр любых букв (в т.ч.
+        -- кириллицы, чего не умеют LOWER()/LIKE), remove_diacritics 2 снимает
+        -- диакритику; ё -> е сводится заранее, т.к. для unicode61 это разные буквы.
+        -- prefix: индексы префиксов для поиска по мере ввода ("так*").
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            description,
+            category,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        );
+
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT t.transaction_id,
+               replace(replace(t.description, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(c.name, 'ё', 'е'), 'Ё', 'Е')
+        FROM transactions t
+        LEFT JOIN categories c ON c.category_id = t.category_id;
+
+        CREATE TRIGGER trg_transactions_fts_ai
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (rowid, description, category)
+            VALUES (
+                NEW.transaction_id,
+                replace(replace(NEW.description, 'ё', 'е'), 'Ё', 'Е'),
+                (SELECT replace(replace(name, 'ё', 'е'), 'Ё', 'Е')
+                 FROM categories WHERE category_id = NEW.category_id)
+            );
+        END;
+
+        CREATE TRIGGER trg_transactions_fts_ad
+        AFTER DELETE ON transactions
+        BEGIN
+            DELETE FROM transactions_fts WHERE rowid = OLD.transaction_id;
+        END;
+
+        CREATE TRIGGER trg_transactions_fts_au
+        AFTER UPDATE OF description, category_id ON transactions
+        BEGIN
+            UPDATE transactions_fts
+            SET description = replace(replace(NEW.description, 'ё', 'е'), 'Ё', 'Е'),
+                category = (SELECT replace(replace(name, 'ё', 'е'), 'Ё', 'Е')
+                            FROM categories WHERE category_id = NEW.category_id)
+            WHERE rowid = NEW.transaction_id;
+        END;
+
+        -- Переименование категории — редкая операция: переиндексируются её операции
+        CREATE TRIGGER trg_categories_fts_au
+        AFTER UPDATE OF name ON categories
+        BEGIN
+            UPDATE transactions_fts
+            SET category = replace(replace(NEW.name, 'ё', 'е'), 'Ё', 'Е')
+            WHERE rowid IN (
+                SELECT transaction_id FROM transactions WHERE category_id = NEW.category_id
+            );
+        END;
+        """,
+    ),
+    (
+        9,
+        """
+        -- Повторяющиеся операции: шаблон операции + расписание (см. recurrence).
+        -- next_index / next_date — первое ещё не созданное повторение;
+        -- next_date = NULL — правило исчерпано или остановлено.
+        CREATE TABLE recurring_rules (
+            rule_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id      INTEGER NOT NULL,
+            account_id   INTEGER NOT NULL,
+            category_id  INTEGER NOT NULL,
+            amount       INTEGER NOT NULL CHECK (amount > 0),  -- минорные единицы
+            description  TEXT,
+            type         TEXT NOT NULL,                     -- TransactionType
+            freq         TEXT NOT NULL
+                         CHECK (freq IN ('daily', 'weekly', 'monthly', 'yearly')),
+            interval     INTEGER NOT NULL DEFAULT 1 CHECK (interval > 0),
+            start_date   TEXT NOT NULL,                     -- YYYY-MM-DD
+            until_date   TEXT,                              -- UNTIL, включительно
+            max_count    INTEGER CHECK (max_count > 0),     -- COUNT
+            next_index   INTEGER NOT NULL DEFAULT 0,
+            next_date    TEXT,
+            FOREIGN KEY (user_id)     REFERENCES users(user_id)       ON DELETE CASCADE,
+            FOREIGN KEY (account_id)  REFERENCES accounts(account_id) ON DELETE CASCADE,
+            FOREIGN KEY (category_id) REFERENCES categories(category_id)
+        );
+        -- «Что пора создать»: только действующие правила, по дате следующего повторения
+        CREATE INDEX ix_recurring_rules_due
+            ON recurring_rules (next_date) WHERE next_date IS NOT NULL;
+        CREATE INDEX ix_recurring_rules_user ON recurring_rules (user_id);
+
+        -- Из какого правила создана операция (NULL — введена вручную)
+        ALTER TABLE transactions ADD COLUMN rule_id INTEGER
+            REFERENCES recurring_rules(rule_id) ON DELETE SET NULL;
+        """,
+    ),
+    (
+        10,
+        """
+        -- Бюджеты расходов по категории счёта на неделю или месяц.
+        CREATE TABLE budgets (
+            budget_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id        INTEGER NOT NULL,
+            account_id     INTEGER NOT NULL,
+            category_id    INTEGER NOT NULL,
+            period         TEXT NOT NULL CHECK (period IN ('week', 'month')),
+            amount_limit   INTEGER NOT NULL CHECK (amount_limit > 0),  -- минорные единицы
+            alert_percent  INTEGER NOT NULL DEFAULT 80
+                           CHECK (alert_percent BETWEEN 1 AND 100),
+            UNIQUE (account_id, category_id, period),
+            FOREIGN KEY (user_id)     REFERENCES users(user_id)       ON DELETE CASCADE,
+            FOREIGN KEY (account_id)  REFERENCES accounts(account_id) ON DELETE CASCADE,
+            FOREIGN KEY (category_id) REFERENCES categories(category_id)
+        );
+
+        -- Потрачено по бюджету за период (period_start — понедельник недели или
+        -- 1-е число месяца). Ведётся триггерами на transactions: на каждую
+        -- запись — поиск бюджетов категории по UNIQUE-индексу и один UPSERT,
+        -- без пересуммирования периода.
+        CREATE TABLE budget_progress (
+            budget_id     INTEGER NOT NULL,
+            period_start  TEXT NOT NULL,                    -- YYYY-MM-DD
+            spent         INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (budget_id, period_start),
+            FOREIGN KEY (budget_id) REFERENCES budgets(budget_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER trg_transactions_budget_ai
+        AFTER INSERT ON transactions
+        WHEN NEW.type = 'expense'
+        BEGIN
+            INSERT INTO budget_progress (budget_id, period_start, spent)
+            SELECT b.budget_id,
+                   CASE b.period
+                       WHEN 'month' THEN date(NEW.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                       ELSE date(NEW.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+                   END,
+                   NEW.amount
+            FROM budgets b
+            WHERE b.account_id = NEW.account_id AND b.category_id = NEW.category_id
+            ON CONFLICT (budget_id, period_start) DO UPDATE SET spent = spent + excluded.spent;
+        END;
+
+        CREATE TRIGGER trg_transactions_budget_ad
+        AFTER DELETE ON transactions
+        WHEN OLD.type = 'expense'
+        BEGIN
+            UPDATE budget_progress SET spent = spent - OLD.amount
+            WHERE (budget_id, period_start) IN (
+                SELECT b.budget_id,
+                       CASE b.period
+                           WHEN 'month' THEN date(OLD.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                           ELSE date(OLD.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+                       END
+                FROM budgets b
+                WHERE b.account_id = OLD.account_id AND b.category_id = OLD.category_id
+            );
+        END;
+
+        CREATE TRIGGER trg_transactions_budget_au
+        AFTER UPDATE OF account_id, category_id, type, transaction_date, amount ON transactions
+        BEGIN
+            UPDATE budget_progress SET spent = spent - OLD.amount
+            WHERE OLD.type = 'expense' AND (budget_id, period_start) IN (
+                SELECT b.budget_id,
+                       CASE b.period
+                           WHEN 'month' THEN date(OLD.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                           ELSE date(OLD.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+                       END
+                FROM budgets b
+                WHERE b.account_id = OLD.account_id AND b.category_id = OLD.category_id
+            );
+            INSERT INTO budget_progress (budget_id, period_start, spent)
+            SELECT b.budget_id,
+                   CASE b.period
+                       WHEN 'month' THEN date(NEW.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                       ELSE date(NEW.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+                   END,
+                   NEW.amount
+            FROM budgets b
+            WHERE NEW.type = 'expense'
+              AND b.account_id = NEW.account_id AND b.category_id = NEW.category_id
+            ON CONFLICT (budget_id, period_start) DO UPDATE SET spent = spent + excluded.spent;
+        END;
+
+        -- Оповещения: budget_alert() — Python-функция пишущего соединения
+        -- (DatabaseManager._on_budget_alert), вызывается только при пересечении
+        -- порога alert_percent или лимита. Опрашивать прогресс не нужно.
+        CREATE TRIGGER trg_budget_progress_alert_ai
+        AFTER INSERT ON budget_progress
+        BEGIN
+            SELECT budget_alert(b.budget_id, b.user_id, c.name, b.period,
+                                NEW.period_start, 0, NEW.spent,
+                                b.amount_limit, b.alert_percent)
+            FROM budgets b
+            LEFT JOIN categories c ON c.category_id = b.category_id
+            WHERE b.budget_id = NEW.budget_id
+              AND NEW.spent * 100 >= b.amount_limit * b.alert_percent;
+        END;
+
+        CREATE TRIGGER trg_budget_progress_alert_au
+        AFTER UPDATE OF spent ON budget_progress
+        WHEN NEW.spent > OLD.spent
+        BEGIN
+            SELECT budget_alert(b.budget_id, b.user_id, c.name, b.period,
+                                NEW.period_start, OLD.spent, NEW.spent,
+                                b.amount_limit, b.alert_percent)
+            FROM budgets b
+            LEFT JOIN categories c ON c.category_id = b.category_id
+            WHERE b.budget_id = NEW.budget_id
+              AND ((OLD.spent * 100 < b.amount_limit * b.alert_percent
+                    AND NEW.spent * 100 >= b.amount_limit * b.alert_percent)
+                   OR (OLD.spent < b.amount_limit AND NEW.spent >= b.amount_limit));
+        END;
+        """,
+    ),
+]
+
+
+# --- Настройки подключения ---------------------------------------------------
+
+# Применяются к каждому соединению. journal_mode=WAL хранится в самом файле БД,
+# остальное — настройки конкретного соединения.
+CONNECTION_PRAGMAS = {
+    "synchronous": "NORMAL",  # в WAL безопасно: теряется максимум последний коммит
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -32 * 1024,  # в KiB (отрицательное значение), т.е. 32 MiB
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+DEFAULT_READ_POOL_SIZE = 4
+# Строк на один fetchmany при потоковом чтении (экспорт)
+FETCH_CHUNK_SIZE = 5000
+# Период фоновой уборки (просроченные сессии, снимки балансов), секунды
+HOUSEKEEPING_INTERVAL_SECONDS = 3600
+# Снимок баланса делается, если последний старше стольких дней
+BALANCE_SNAPSHOT_INTERVAL_DAYS = 30
+
+
 # --- Enum’ы ------------------------------------------------------------------
 
 
@@ -34,6 +730,20 @@ class TransactionType(Enum):
     income = "income"
 
 
+def _fts_query(text: str) -> str | None:
+    """
+    Пользовательский ввод -> запрос FTS5: слова в кавычках (операторы и
+    спецсимволы FTS не срабатывают) как префиксы, ё сведена к е, как в индексе.
+    """
+    words = re.findall(r"\w+", text.replace("ё", "е").replace("Ё", "Е"))
+    return " ".join(f'"{w}"*' for w in words) or None
+
+
+def _signed(amount: int, transaction_type: str) -> int:
+    """Вклад операции в баланс счёта."""
+    return amount if transaction_type == TransactionType.income.value else -amount
+
+
 # --- Класс‑обёртка ------------------------------------------------------------
 
 
@@ -42,46 +752,143 @@ class DatabaseManager:
     Упрощённый аналог DatabaseManager, но на чистом sqlite3.
     """
 
-    def __init__(self, db_file: str = "finance_manager.db") -> None:
+    def __init__(
+        self,
+        db_file: str = "finance_manager.db",
+        read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+    ) -> None:
         self.db_file = db_file
-        # Важно включить поддержку foreign keys
-        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        # Единственное пишущее соединение; все записи идут под _write_lock,
+        # чтобы транзакции разных обработчиков Flet не перемешивались.
+        self.conn = self._connect(self.db_file)
         self.conn.execute("PRAGMA foreign_keys = ON;")
+        if self.db_file != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL;")
+        self._write_lock = threading.RLock()
+        self._write_cursor = self.conn.cursor()
+        self._has_readers = False  # до создания пула читаем через писателя
+        self.session_cache = SessionCache()
+        # Итоги и первые страницы периодов; сбрасываются при записи (см. QueryCache)
+        self.query_cache = QueryCache()
+        self.rate_cache = RateCache()
+        self._housekeeping_stop = threading.Event()
+        self._housekeeping_thread: threading.Thread | None = None
+        # Оповещения бюджетов: функция budget_alert() вызывается триггером
+        # budget_progress внутри записи, подписчики получают их после COMMIT
+        self._budget_alert_listeners: dict[Hashable, Callable[[dict], Any]] = {}
+        self._pending_budget_alerts: list[dict] = []
+        self._mute_budget_alerts = False
+        self.conn.create_function("budget_alert", 9, self._on_budget_alert)
 
         self._create_tables()
+        self._run_migrations()
         self._populate_default_currencies()
         self._populate_default_categories()
 
-    # ----------------------------- service -----------------------------------
+        # Пул читателей (по курсору на соединение): в WAL читатели не ждут
+        # писателя и друг друга. Для :memory: отдельные соединения увидели бы
+        # пустую БД, поэтому там читаем через пишущее соединение.
+        self._readers: queue.SimpleQueue[sqlite3.Cursor] = queue.SimpleQueue()
+        if self.db_file == ":memory:":
+            read_pool_size = 0
+        uri = pathlib.Path(self.db_file).resolve().as_uri() + "?mode=ro"
+        for _ in range(read_pool_size):
+            reader = self._connect(uri, uri=True)
+            reader.execute("PRAGMA query_only = ON;")
+            self._readers.put(reader.cursor())
+        self._has_readers = read_pool_size > 0
+
+    @staticmethod
+    def _connect(database: str, uri: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            database,
+            uri=uri,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+        return conn
+
+    def close(self):
+        """Закрывает пишущее соединение и пул читателей."""
+        self.stop_housekeeping()
+        while not self._readers.empty():
+            self._readers.get_nowait().connection.close()
+        self.conn.close()
+
+    # ----------------------------- query layer -------------------------------
+    # Запросы API берутся из queries.STATEMENTS по имени. Чтение идёт через
+    # курсоры пула читателей, запись — через один курсор пишущего соединения
+    # под _write_lock; коммит делает только _transaction (один на операцию).
+
+    @contextmanager
+    def _reader(self):
+        """Курсор читателя из пула на время блока with."""
+        if not self._has_readers:
+            with self._write_lock:
+                yield self._write_cursor
+            return
+        cur = self._readers.get()
+        try:
+            yield cur
+        finally:
+            self._readers.put(cur)
+
+    def _read(self, name: str, params=(), fetch: str = "all"):
+        """Именованный SELECT. fetch: "one" | "all"."""
+        if not self._has_readers:
+            with self._reader() as cur:
+                cur.execute(STATEMENTS[name], params)
+                return cur.fetchone() if fetch == "one" else cur.fetchall()
+        # горячий путь без contextmanager: взять курсор, выполнить, вернуть в пул
+        cur = self._readers.get()
+        try:
+            cur.execute(STATEMENTS[name], params)
+            return cur.fetchone() if fetch == "one" else cur.fetchall()
+        finally:
+            self._readers.put(cur)
+
+    def _iter_read(
+        self, name: str, params=(), chunk_size: int = FETCH_CHUNK_SIZE
+    ) -> Iterator[list[sqlite3.Row]]:
+        """
+        Именованный SELECT пакетами fetchmany: в памяти не больше chunk_size
+        строк, а весь обход — один снимок БД. Курсор читателя занят, пока
+        генератор не исчерпан или не закрыт (без пула — вместе с _write_lock,
+        поэтому писать в БД внутри обхода нельзя).
+        """
+        with self._reader() as cur:
+            cur.execute(STATEMENTS[name], params)
+            while rows := cur.fetchmany(chunk_size):
+                yield rows
 
-    def _exec(
-        self,
-        sql: str,
-        params=None,
-        many=False,
-        fetch: str | None = None,  # None | "one" | "all"
-    ):
-        with self.conn:  # автоматически коммитит/ролбэкит
-            cur = self.conn.cursor()
+    @contextmanager
+    def _transaction(self):
+        """
+        Несколько записей одной транзакцией: коммит при выходе из блока,
+        откат при исключении. Внутри — курсор пишущего соединения.
+        """
+        with self._write_lock:
+            try:
+                with self.conn:
+                    yield self._write_cursor
+            except BaseException:
+                self._pending_budget_alerts.clear()  # откат: порог не пересечён
+                raise
+            alerts, self._pending_budget_alerts = self._pending_budget_alerts, []
+        if alerts:
+            self._dispatch_budget_alerts(alerts)
+
+    def _write(self, name: str, params=(), many: bool = False) -> int:
+        """Одна именованная запись в своей транзакции. Возвращает rowcount."""
+        with self._transaction() as cur:
             if many:
-                cur.executemany(sql, params or [])
-            else:
-                cur.execute(sql, params or [])
-
-            if fetch == "one":
-                res = cur.fetchone()
-            elif fetch == "all":
-                res = cur.fetchall()
+                cur.executemany(STATEMENTS[name], params)
             else:
-                res = cur
-            return res
-
-            res = cur.rowcount  # для INSERT/UPDATE/DELETE
-
-            # Убираем закрытие курсора, чтобы избежать ошибки
-            # cur.close()
-            return res
+                cur.execute(STATEMENTS[name], params)
+            return cur.rowcount
 
     # --------------------------- schema & mock data --------------------------
 
@@ -149,9 +956,29 @@ class DatabaseManager:
         self.conn.executescript(schema)
         self.conn.commit()
 
+    def _schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version;").fetchone()[0]
+
+    def _run_migrations(self):
+        """Применяет все миграции из MIGRATIONS новее текущей user_version."""
+        version = self._schema_version()
+        for target, script in MIGRATIONS:
+            if target <= version:
+                continue
+            # executescript сам коммитит «висящую» транзакцию, поэтому BEGIN/COMMIT
+            # явно: миграция и смена user_version применяются атомарно.
+            try:
+                self.conn.executescript(
+                    f"BEGIN;\n{script}\nPRAGMA user_version = {target};\nCOMMIT;"
+                )
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            print(f"Schema migrated to version {target}")
+            version = target
+
     def _populate_default_currencies(self):
-        sql_count = "SELECT COUNT(*) FROM currencies;"
-        count = self._exec(sql_count, fetch="one")[0]
+        count = self._read("currencies_count", fetch="one")[0]
         if count:
             return
         data = [
@@ -159,16 +986,10 @@ class DatabaseManager:
             ("USD", "Доллар США", "$"),
             ("EUR", "Евро", "€"),
         ]
-        self._exec(
-            "INSERT INTO currencies (code, name, symbol) VALUES (?, ?, ?);",
-            data,
-            many=True,
-        )
-        self.conn.commit()
+        self._write("currency_insert", data, many=True)
 
     def _populate_default_categories(self):
-        sql_count = "SELECT COUNT(*) FROM categories WHERE user_id IS NULL;"
-        count = self._exec(sql_count, fetch="one")[0]
+        count = self._read("default_categories_count", fetch="one")[0]
         if count:
             return
         data = [
@@ -186,167 +1007,174 @@ class DatabaseManager:
             ("Инвестиции", "income", "trending_up"),
             ("Другое (Доходы)", "income", "category"),
         ]
-        self._exec(
-            "INSERT INTO categories (user_id, name, type, icon) VALUES (NULL, ?, ?, ?);",
-            data,
-            many=True,
-        )
-        self.conn.commit()
+        self._write("default_category_insert", data, many=True)
 
     # ----------------------------- USERS -------------------------------------
 
     def add_user(self, username: str, email: str, password: str):
         try:
-            # Хешируем пароль с помощью bcrypt
-            password_bytes = password.encode("utf-8")
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(password_bytes, salt)
-            # Сохраняем хеш как строку в БД (декодируем из байтов)
-            hpw = hashed_password.decode("utf-8")
-            self._exec(
-                "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?);",
-                (username, email, hpw),
-            )
-            self.conn.commit()
+            # Хеш bcrypt со стоимостью из BCRYPT_ROUNDS, хранится строкой
+            hpw = passwords.hash_password(password)
+            self._write("user_insert", (username, email, hpw))
             return True
         except sqlite3.IntegrityError as e:
             print("Integrity error:", e)
             return False
 
     def verify_user(self, identifier: str, password: str):
-        row = self._exec(
-            "SELECT * FROM users WHERE username = ? OR email = ?;",
-            (identifier, identifier),
-            fetch="one",
-        )
-        if row:
-            try:
-                stored_hash_bytes = row["password_hash"].encode("utf-8")
-                password_bytes = password.encode("utf-8")
-                # Проверяем пароль с помощью bcrypt
-                if bcrypt.checkpw(password_bytes, stored_hash_bytes):
-                    return {
-                        "user_id": row["user_id"],
-                        "username": row["username"],
-                        "email": row["email"],
-                        "role": row["role"],
-                    }
-            except ValueError:
-                # Если хеш невалидный (например, старый формат или поврежденные данные)
-                print(f"Invalid hash format for user: {identifier}")
-                return None
-        return None
+        row = self._read("user_by_login", (identifier, identifier), fetch="one")
+        if not row or not passwords.check_password(password, row["password_hash"]):
+            return None
+        # Стоимость хеша поменялась — пересчитываем, пока пароль известен
+        if passwords.needs_rehash(row["password_hash"]):
+            self._write(
+                "user_set_password_hash",
+                (passwords.hash_password(password), row["user_id"]),
+            )
+        return {
+            "user_id": row["user_id"],
+            "username": row["username"],
+            "email": row["email"],
+            "role": row["role"],
+        }
+
+    async def add_user_async(self, username: str, email: str, password: str):
+        """add_user в пуле хеширования: не блокирует UI на время bcrypt."""
+        return await passwords.run_in_pool(self.add_user, username, email, password)
+
+    async def verify_user_async(self, identifier: str, password: str):
+        """verify_user в пуле хеширования: не блокирует UI на время bcrypt."""
+        return await passwords.run_in_pool(self.verify_user, identifier, password)
 
     # ---------------------------- SESSIONS -----------------------------------
 
     def create_session(self, user_id: int, duration_days: int = 30):
         token = secrets.token_hex(32)
-        expires_at = (
-            datetime.datetime.utcnow() + datetime.timedelta(days=duration_days)
-        ).isoformat()
-        self._exec(
-            "INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, ?);",
-            (user_id, token, expires_at),
-        )
-        self.conn.commit()
+        expires_at = datecodec.now_epoch() + duration_days * 86400
+        self._write("session_insert", (user_id, token, expires_at))
         return token
 
     def get_user_by_session_token(self, token: str):
-        row = self._exec(
-            """
-            SELECT u.* FROM sessions s
-            JOIN users u ON u.user_id = s.user_id
-            WHERE s.token = ? AND s.expires_at > ?;
-            """,
-            (token, datetime.datetime.utcnow().isoformat()),
+        user = self.session_cache.get(token)
+        if user is not None:
+            return user
+        row = self._read(
+            "session_user",
+            (token, datecodec.now_epoch()),
             fetch="one",
         )
         if row:
-            return {
+            user = {
                 "user_id": row["user_id"],
                 "username": row["username"],
                 "email": row["email"],
                 "role": row["role"],
             }
+            self.session_cache.put(token, user, row["expires_at"])
+            return user
         return None
 
     def delete_session(self, token: str):
-        cur = self._exec("DELETE FROM sessions WHERE token = ?;", (token,))
-        self.conn.commit()
-        return cur.rowcount > 0
+        self.session_cache.invalidate(token)
+        return self._write("session_delete", (token,)) > 0
+
+    def purge_expired_sessions(self) -> int:
+        """Удаляет просроченные сессии из БД и кэша. Возвращает число строк."""
+        self.session_cache.purge_expired()
+        return self._write("sessions_delete_expired", (datecodec.now_epoch(),))
+
+    # -------------------------- HOUSEKEEPING ---------------------------------
+
+    def run_housekeeping(self):
+        """Одна итерация фоновой уборки."""
+        purged = self.purge_expired_sessions()
+        if purged:
+            print(f"Housekeeping: removed {purged} expired sessions")
+        snapshots = self.take_balance_snapshots()
+        if snapshots:
+            print(f"Housekeeping: took {snapshots} balance snapshots")
+        # при запуске и после смены дня: просроченные повторения всех пользователей
+        occurrences = self.materialize_recurring()
+        if occurrences:
+            print(f"Housekeeping: created {occurrences} recurring transactions")
+
+    def start_housekeeping(self, interval_seconds: int = HOUSEKEEPING_INTERVAL_SECONDS):
+        """Запускает фоновый поток, вызывающий run_housekeeping раз в interval."""
+        if self._housekeeping_thread and self._housekeeping_thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.run_housekeeping()
+                except sqlite3.Error as e:
+                    print(f"Housekeeping failed: {e}")
+                if self._housekeeping_stop.wait(interval_seconds):
+                    return
+
+        self._housekeeping_stop.clear()
+        self._housekeeping_thread = threading.Thread(
+            target=loop, name="db-housekeeping", daemon=True
+        )
+        self._housekeeping_thread.start()
+
+    def stop_housekeeping(self):
+        self._housekeeping_stop.set()
+        if self._housekeeping_thread:
+            self._housekeeping_thread.join(timeout=5)
+            self._housekeeping_thread = None
 
     # --------------------------- CURRENCIES ----------------------------------
 
     def get_currencies(self):
-        cur = self._exec("SELECT * FROM currencies ORDER BY code;")
-        return [dict(row) for row in cur.fetchall()]
+        return [dict(row) for row in self._read("currencies_all")]
 
     # ---------------------------- ACCOUNTS -----------------------------------
 
     def get_accounts_by_user(self, user_id: int):
-        sql = """
-        SELECT a.*, c.code AS currency_code, c.symbol AS currency_symbol
-        FROM accounts a
-        JOIN currencies c ON c.currency_id = a.currency_id
-        WHERE a.user_id = ?
-        ORDER BY a.name;
-        """
-        return [dict(r) for r in self._exec(sql, (user_id,)).fetchall()]
+        return [dict(r) for r in self._read("accounts_by_user", (user_id,))]
 
     def get_account_by_id(self, account_id: int, user_id: int):
-        sql = """
-        SELECT a.*, c.code AS currency_code, c.symbol AS currency_symbol
-        FROM accounts a
-        JOIN currencies c ON c.currency_id = a.currency_id
-        WHERE a.account_id = ? AND a.user_id = ?;
-        """
-        row = self._exec(sql, (account_id, user_id), fetch="one")
+        row = self._read("account_by_id", (account_id, user_id), fetch="one")
         return dict(row) if row else None
 
     def add_account(self, user_id, name, balance, currency_id, description, icon):
         try:
-            self._exec(
-                """
-                INSERT INTO accounts
-                (user_id, name, balance, currency_id, description, icon)
-                VALUES (?, ?, ?, ?, ?, ?);
-                """,
-                (user_id, name, balance, currency_id, description, icon),
+            self._write(
+                "account_insert",
+                (user_id, name, balance, balance, currency_id, description, icon),
             )
-            self.conn.commit()
             return True, "Account added"
         except Exception as e:
-            self.conn.rollback()
             return False, str(e)
 
     def update_account(
         self, account_id, user_id, name, balance, currency_id, description, icon
     ):
-        cur = self._exec(
-            "UPDATE accounts SET name=?, balance=?, currency_id=?, description=?, icon=? "
-            "WHERE account_id=? AND user_id=?;",
-            (name, balance, currency_id, description, icon, account_id, user_id),
+        # Ручная правка баланса — это поправка к opening_balance (см. запрос)
+        updated = self._write(
+            "account_update",
+            (name, balance, balance, currency_id, description, icon, account_id, user_id),
         )
-        self.conn.commit()
-        if cur.rowcount:
+        if updated:
+            self.query_cache.invalidate(account_id)
             return True, "Updated"
         return False, "Account not found or access denied"
 
     def delete_account(self, account_id: int, user_id: int):
         try:
-            # удаляем транзакции
-            self._exec("DELETE FROM transactions WHERE account_id = ?;", (account_id,))
-            # удаляем счёт
-            cur = self._exec(
-                "DELETE FROM accounts WHERE account_id = ? AND user_id = ?;",
-                (account_id, user_id),
-            )
-            self.conn.commit()
-            if cur.rowcount:
+            with self._transaction() as cur:
+                cur.execute(
+                    STATEMENTS["account_delete_transactions"], (account_id, user_id)
+                )
+                cur.execute(STATEMENTS["account_delete_rules"], (account_id, user_id))
+                cur.execute(STATEMENTS["account_delete"], (account_id, user_id))
+                deleted = cur.rowcount
+            if deleted:
+                self.query_cache.invalidate(account_id)
                 return True, "Deleted"
             return False, "Account not found or access denied"
         except Exception as e:
-            self.conn.rollback()
             return False, f"DB error: {e}"
 
     # --------------------------- CATEGORIES ----------------------------------
@@ -356,13 +1184,8 @@ class DatabaseManager:
     ):
         if not isinstance(category_type, TransactionType):
             category_type = TransactionType(category_type)
-        sql = """
-        SELECT * FROM categories
-        WHERE (user_id = ? OR user_id IS NULL) AND type = ?
-        ORDER BY CASE WHEN user_id IS NULL THEN 1 ELSE 0 END DESC, name;
-        """
-        cur = self._exec(sql, (user_id, category_type.value))
-        return [dict(r) for r in cur.fetchall()]
+        rows = self._read("categories_by_user_type", (user_id, category_type.value))
+        return [dict(r) for r in rows]
 
     def add_category(
         self,
@@ -374,12 +1197,12 @@ class DatabaseManager:
         if not isinstance(type_, TransactionType):
             type_ = TransactionType(type_)
         try:
-            self._exec(
-                "INSERT INTO categories (user_id, name, type, icon) VALUES (?, ?, ?, ?);",
-                (user_id, name.strip(), type_.value, icon),
-            )
-            self.conn.commit()
-            cat_id = self._exec("SELECT last_insert_rowid();", fetch="one")[0]
+            with self._transaction() as cur:
+                cur.execute(
+                    STATEMENTS["category_insert"],
+                    (user_id, name.strip(), type_.value, icon),
+                )
+                cat_id = cur.lastrowid
             return {
                 "category_id": cat_id,
                 "user_id": user_id,
@@ -390,7 +1213,6 @@ class DatabaseManager:
         except sqlite3.IntegrityError:
             return None, f"Категория '{name}' уже существует."
         except Exception as e:
-            self.conn.rollback()
             return None, str(e)
 
     # -------------------------- TRANSACTIONS ---------------------------------
@@ -399,100 +1221,236 @@ class DatabaseManager:
         self,
         account_id: int,
         category_id: int,
-        amount: float,
+        amount: int,
         transaction_date,
         description: str,
         transaction_type: TransactionType,
     ):
         if not isinstance(transaction_type, TransactionType):
             transaction_type = TransactionType(transaction_type)
+        # суммы — целые минорные единицы (см. money.parse)
+        if not isinstance(amount, int):
+            return False, "Amount must be an integer number of minor units"
         if amount <= 0:
             return False, "Amount must be positive"
-        # date -> iso
-        if isinstance(transaction_date, datetime.datetime):
-            dt_iso = transaction_date.isoformat()
-        elif isinstance(transaction_date, str):
-            dt_iso = transaction_date
-        else:
+        # локальный datetime / ISO-строка -> секунды epoch
+        try:
+            ts = datecodec.to_epoch(transaction_date)
+        except (TypeError, ValueError):
             return False, "Invalid date"
         try:
-            # проверяем счёт и категорию
-            acc = self._exec(
-                "SELECT balance FROM accounts WHERE account_id = ?;", (account_id,)
-            ).fetchone()
-            cat = self._exec(
-                "SELECT 1 FROM categories WHERE category_id = ?;", (category_id,)
-            ).fetchone()
-            if not acc:
-                return False, "Account not found"
-            if not cat:
-                return False, "Category not found"
-
-            new_balance = (
-                acc["balance"] + amount
-                if transaction_type == TransactionType.income
-                else acc["balance"] - amount
-            )
-
-            # всё в транзакции
-            cur = self.conn.cursor()
-            try:
+            # проверки, вставка и сдвиг баланса — одна транзакция под _write_lock
+            with self._transaction() as cur:
+                acc = cur.execute(STATEMENTS["account_balance"], (account_id,)).fetchone()
+                if not acc:
+                    return False, "Account not found"
+                cat = cur.execute(STATEMENTS["category_exists"], (category_id,)).fetchone()
+                if not cat:
+                    return False, "Category not found"
+
+                delta = amount if transaction_type == TransactionType.income else -amount
                 cur.execute(
-                    """
-                    INSERT INTO transactions
-                    (account_id, category_id, amount, transaction_date, description, type)
-                    VALUES (?, ?, ?, ?, ?, ?);
-                    """,
+                    STATEMENTS["transaction_insert"],
                     (
                         account_id,
                         category_id,
                         amount,
-                        dt_iso,
+                        ts,
                         description,
                         transaction_type.value,
                     ),
                 )
-                cur.execute(
-                    "UPDATE accounts SET balance = ? WHERE account_id = ?;",
-                    (new_balance, account_id),
-                )
-                self.conn.commit()
-            finally:
-                cur.close()
-
+                cur.execute(STATEMENTS["account_add_balance"], (delta, account_id))
+            # после COMMIT: иначе параллельное чтение успело бы закэшировать старое
+            self.query_cache.invalidate(account_id, ts)
             return True, "OK"
         except Exception as e:
-            self.conn.rollback()
             return False, str(e)
 
+    def add_transactions_bulk(self, account_id: int, rows: Iterable[tuple]):
+        """
+        Пакетная вставка операций одного счёта (импорт).
+
+        rows — кортежи (category_id, amount, transaction_date, description, type)
+        с уже проверенными данными: amount — в минорных единицах,
+        transaction_date — секунды epoch (см. datecodec). Всё выполняется одной транзакцией: один
+        executemany и одно обновление баланса на весь пакет.
+        Возвращает количество вставленных строк.
+        """
+        # Сортировка по (type, date) даёт локальные вставки в индекс
+        # ix_transactions_account_type_date и в daily_totals.
+        rows = sorted(rows, key=lambda r: (r[4], r[2]))
+        if not rows:
+            return 0
+        delta = sum(
+            r[1] if r[4] == TransactionType.income.value else -r[1] for r in rows
+        )
+        with self._transaction() as cur:
+            cur.executemany(
+                STATEMENTS["transaction_insert"], ((account_id, *r) for r in rows)
+            )
+            cur.execute(STATEMENTS["account_add_balance"], (delta, account_id))
+        dates = [r[2] for r in rows]
+        self.query_cache.invalidate(account_id, min(dates), max(dates))
+        return len(rows)
+
     def get_transactions_by_account(
         self, account_id: int, user_id: int, limit: int = 50, offset: int = 0
     ):
-        # Проверка принадлежности счёта
-        row = self._exec(
-            "SELECT 1 FROM accounts WHERE account_id=? AND user_id=?;",
-            (account_id, user_id),
-        ).fetchone()
-        if not row:
-            return []
-        sql = """
-        SELECT t.*, c.name AS category_name, c.icon AS category_icon
-        FROM transactions t
-        LEFT JOIN categories c ON c.category_id = t.category_id
-        WHERE t.account_id = ?
-        ORDER BY t.transaction_date DESC, t.transaction_id DESC
-        LIMIT ? OFFSET ?;
-        """
-        cur = self._exec(sql, (account_id, limit, offset))
-        return [dict(r) for r in cur.fetchall()]
+        rows = self._read(
+            "transactions_by_account", (user_id, account_id, limit, offset)
+        )
+        return [dict(r) for r in rows]
+
+    # Поля, которые можно менять у операции (имена — как у add_transaction)
+    TRANSACTION_FIELDS = (
+        "account_id",
+        "category_id",
+        "amount",
+        "transaction_date",
+        "description",
+        "transaction_type",
+    )
 
     def update_transaction(self, transaction_id, user_id, **kwargs):
-        print("update_transaction: not implemented for sqlite yet")
-        return False, "Not implemented"
+        """
+        Правка операции: kwargs — любые из TRANSACTION_FIELDS.
+
+        Баланс сдвигается на разницу старого и нового вклада операции (при
+        переносе на другой счёт — по одному UPDATE на каждый счёт), daily_totals
+        и снимки — триггерами; история счёта не пересчитывается.
+        """
+        unknown = set(kwargs) - set(self.TRANSACTION_FIELDS)
+        if unknown:
+            return False, f"Unknown fields: {', '.join(sorted(unknown))}"
+        if "transaction_type" in kwargs:
+            try:
+                kwargs["transaction_type"] = TransactionType(kwargs["transaction_type"]).value
+            except ValueError:
+                return False, "Invalid transaction type"
+        if "amount" in kwargs:
+            if not isinstance(kwargs["amount"], int):
+                return False, "Amount must be an integer number of minor units"
+            if kwargs["amount"] <= 0:
+                return False, "Amount must be positive"
+        if "transaction_date" in kwargs:
+            try:
+                kwargs["transaction_date"] = datecodec.to_epoch(kwargs["transaction_date"])
+            except (TypeError, ValueError):
+                return False, "Invalid date"
+        try:
+            with self._transaction() as cur:
+                old = cur.execute(
+                    STATEMENTS["transaction_owned"], (transaction_id, user_id)
+                ).fetchone()
+                if not old:
+                    return False, "Transaction not found or access denied"
+                new = {
+                    "account_id": old["account_id"],
+                    "category_id": old["category_id"],
+                    "amount": old["amount"],
+                    "transaction_date": old["transaction_date"],
+                    "description": old["description"],
+                    "transaction_type": old["type"],
+                    **kwargs,
+                }
+                if new["account_id"] != old["account_id"]:
+                    acc = cur.execute(
+                        STATEMENTS["account_balance_owned"], (new["account_id"], user_id)
+                    ).fetchone()
+                    if not acc:
+                        return False, "Account not found"
+                if new["category_id"] != old["category_id"]:
+                    cat = cur.execute(
+                        STATEMENTS["category_exists"], (new["category_id"],)
+                    ).fetchone()
+                    if not cat:
+                        return False, "Category not found"
+
+                ledger_changed = any(
+                    new[f] != old[c]
+                    for f, c in (
+                        ("account_id", "account_id"),
+                        ("amount", "amount"),
+                        ("transaction_date", "transaction_date"),
+                        ("transaction_type", "type"),
+                    )
+                )
+                # описание и категория не влияют на баланс, но попадают в
+                # закэшированные страницы и итоги по категориям — кэш чистится ниже
+                if not ledger_changed:
+                    cur.execute(
+                        STATEMENTS["transaction_update_details"],
+                        (new["category_id"], new["description"], transaction_id),
+                    )
+                else:
+                    cur.execute(
+                        STATEMENTS["transaction_update"],
+                        (
+                            new["account_id"],
+                            new["category_id"],
+                            new["amount"],
+                            new["transaction_date"],
+                            new["description"],
+                            new["transaction_type"],
+                            transaction_id,
+                        ),
+                    )
+                    old_delta = _signed(old["amount"], old["type"])
+                    new_delta = _signed(new["amount"], new["transaction_type"])
+                    if new["account_id"] == old["account_id"]:
+                        if new_delta != old_delta:
+                            cur.execute(
+                                STATEMENTS["account_add_balance"],
+                                (new_delta - old_delta, old["account_id"]),
+                            )
+                    else:
+                        cur.execute(
+                            STATEMENTS["account_add_balance"], (-old_delta, old["account_id"])
+                        )
+                        cur.execute(
+                            STATEMENTS["account_add_balance"], (new_delta, new["account_id"])
+                        )
+            self.query_cache.invalidate(old["account_id"], old["transaction_date"])
+            self.query_cache.invalidate(new["account_id"], new["transaction_date"])
+            return True, "Updated"
+        except Exception as e:
+            return False, str(e)
 
     def delete_transaction(self, transaction_id, user_id):
-        print("delete_transaction: not implemented for sqlite yet")
-        return False, "Not implemented"
+        try:
+            if self.delete_transactions([transaction_id], user_id):
+                return True, "Deleted"
+            return False, "Transaction not found or access denied"
+        except Exception as e:
+            return False, f"DB error: {e}"
+
+    def delete_transactions(self, transaction_ids: Iterable[int], user_id: int) -> int:
+        """
+        Пакетное удаление операций пользователя (чужие id пропускаются).
+
+        Одна транзакция: сдвиги балансов считаются GROUP BY по счетам, и каждый
+        затронутый счёт обновляется один раз, затем один DELETE на весь пакет.
+        Возвращает количество удалённых строк.
+        """
+        ids = json.dumps([int(i) for i in transaction_ids])
+        if ids == "[]":
+            return 0
+        with self._transaction() as cur:
+            affected = cur.execute(
+                STATEMENTS["transactions_delete_deltas"], (ids, user_id)
+            ).fetchall()
+            if not affected:
+                return 0
+            cur.executemany(
+                STATEMENTS["account_add_balance"],
+                ((r["delta"], r["account_id"]) for r in affected),
+            )
+            cur.execute(STATEMENTS["transactions_delete_owned"], (ids, user_id))
+            deleted = cur.rowcount
+        for r in affected:
+            self.query_cache.invalidate(r["account_id"], r["first_ts"], r["last_ts"])
+        return deleted
 
     def get_transactions_summary(
         self,
@@ -501,45 +1459,744 @@ class DatabaseManager:
         transaction_type: TransactionType,
         start_date: datetime.date,
         end_date: datetime.date,
+        limit: int | None = None,
+        with_rows: bool = True,
     ):
+        """
+        Список операций за период и их сумма одним запросом.
+
+        Проверка владельца счёта, страница строк и итог считаются в одном
+        операторе (см. queries "transactions_summary"). ``with_rows=False`` —
+        только итог (LIMIT 0). Итог берётся из daily_totals — не больше одной
+        строки на день периода. Результат кэшируется в query_cache.
+        """
         if not isinstance(transaction_type, TransactionType):
             transaction_type = TransactionType(transaction_type)
-        # проверка счёта
-        acc = self._exec(
-            "SELECT 1 FROM accounts WHERE account_id=? AND user_id=?;",
-            (account_id, user_id),
-        ).fetchone()
-        if not acc:
-            return [], 0.0
-
-        start_dt = datetime.datetime.combine(start_date, datetime.time.min).isoformat()
-        end_dt = datetime.datetime.combine(end_date, datetime.time.max).isoformat()
-
-        sql_tx = """
-        SELECT t.*, c.name AS category_name, c.icon AS category_icon
-        FROM transactions t
-        LEFT JOIN categories c ON c.category_id = t.category_id
-        WHERE t.account_id = ?
-          AND t.type = ?
-          AND t.transaction_date BETWEEN ? AND ?
-        ORDER BY t.transaction_date DESC, t.transaction_id DESC;
+
+        start_ts, end_ts = datecodec.day_range(start_date, end_date)
+        if not with_rows:
+            limit = 0
+        elif limit is None:
+            limit = -1  # в SQLite отрицательный LIMIT — «без ограничения»
+
+        key = QueryCache.key(
+            user_id, account_id, transaction_type.value, start_ts, end_ts, limit
+        )
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.query_cache.version()
+
+        days = (transaction_type.value, start_date.isoformat(), end_date.isoformat())
+        period = (transaction_type.value, start_ts, end_ts)
+        rows = self._read(
+            "transactions_summary", (account_id, user_id, *days, *period, limit)
+        )
+
+        total = rows[0]["period_total"] if rows else 0
+        tx = []
+        for r in rows:
+            if r["transaction_id"] is None:  # пустая страница: только строка итога
+                continue
+            d = dict(r)
+            del d["period_total"]
+            tx.append(d)
+        self.query_cache.put(key, tx, total, version)
+        return tx, total
+
+    def get_transactions_page(
+        self,
+        user_id: int,
+        account_id: int,
+        transaction_type: TransactionType,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        cursor: tuple | None = None,
+        limit: int = 50,
+    ):
+        """
+        Следующая страница операций за период (keyset-пагинация).
+
+        cursor — пара (transaction_date, transaction_id) последней уже
+        показанной строки; None — первая страница. Возвращает (rows, next_cursor),
+        next_cursor = None, если строк больше нет.
         """
-        tx = [
+        if not isinstance(transaction_type, TransactionType):
+            transaction_type = TransactionType(transaction_type)
+
+        start_ts, end_ts = datecodec.day_range(start_date, end_date)
+        # (end, max) пропускает все строки периода — первая страница тем же запросом
+        after_date, after_id = cursor if cursor else (end_ts, 2**63 - 1)
+
+        rows = [
             dict(r)
-            for r in self._exec(
-                sql_tx, (account_id, transaction_type.value, start_dt, end_dt)
+            for r in self._read(
+                "transactions_page",
+                (
+                    user_id,
+                    account_id,
+                    transaction_type.value,
+                    start_ts,
+                    end_ts,
+                    after_date,
+                    after_id,
+                    limit,
+                ),
+            )
+        ]
+        return rows, self.page_cursor(rows, limit)
+
+    @staticmethod
+    def page_cursor(rows: list, limit: int | None):
+        """Курсор для продолжения после rows или None, если страница неполная."""
+        if not rows or limit is None or len(rows) < limit:
+            return None
+        last = rows[-1]
+        return last["transaction_date"], last["transaction_id"]
+
+    # ---------------------------- RECURRING ----------------------------------
+
+    def add_recurring_rule(
+        self,
+        user_id: int,
+        account_id: int,
+        category_id: int,
+        amount: int,
+        description: str,
+        transaction_type: TransactionType,
+        freq: str,
+        start_date: datetime.date,
+        interval: int = 1,
+        until_date: datetime.date | None = None,
+        max_count: int | None = None,
+    ):
+        """
+        Создаёт правило повторения (шаблон операции + расписание, см. recurrence)
+        и сразу создаёт уже наступившие повторения. Возвращает (rule_id, None)
+        или (None, текст ошибки).
+        """
+        if not isinstance(transaction_type, TransactionType):
+            transaction_type = TransactionType(transaction_type)
+        if freq not in recurrence.FREQUENCIES:
+            return None, f"Unknown frequency: {freq}"
+        if not isinstance(amount, int) or amount <= 0:
+            return None, "Amount must be a positive integer number of minor units"
+        if isinstance(start_date, datetime.datetime):
+            start_date = start_date.date()
+        rule = {
+            "start_date": start_date,
+            "freq": freq,
+            "interval": interval,
+            "until_date": until_date,
+            "max_count": max_count,
+        }
+        first = recurrence.next_occurrence(rule, 0)
+        if first is None:
+            return None, "The schedule has no occurrences"
+        try:
+            with self._transaction() as cur:
+                if not cur.execute(
+                    STATEMENTS["account_balance_owned"], (account_id, user_id)
+                ).fetchone():
+                    return None, "Account not found"
+                if not cur.execute(
+                    STATEMENTS["category_exists"], (category_id,)
+                ).fetchone():
+                    return None, "Category not found"
+                cur.execute(
+                    STATEMENTS["recurring_rule_insert"],
+                    (
+                        user_id,
+                        account_id,
+                        category_id,
+                        amount,
+                        description,
+                        transaction_type.value,
+                        freq,
+                        interval,
+                        start_date.isoformat(),
+                        until_date.isoformat() if until_date else None,
+                        max_count,
+                        first.isoformat(),
+                    ),
+                )
+                rule_id = cur.lastrowid
+        except Exception as e:
+            return None, str(e)
+        self.materialize_recurring(user_id=user_id)
+        return rule_id, None
+
+    def get_recurring_rules(self, user_id: int):
+        return [dict(r) for r in self._read("recurring_rules_by_user", (user_id,))]
+
+    def stop_recurring_rule(self, rule_id: int, user_id: int) -> bool:
+        """Больше не создавать повторений; уже созданные операции остаются."""
+        return self._write("recurring_stop", (rule_id, user_id)) > 0
+
+    def materialize_recurring(
+        self, through: datetime.date | None = None, user_id: int | None = None
+    ) -> int:
+        """
+        Создаёт наступившие повторения правил по through включительно (не позже
+        сегодняшнего дня: будущие — только в прогнозе, см. get_upcoming_occurrences).
+        user_id = None — для всех пользователей.
+
+        Все повторения пишутся одним executemany, баланс каждого счёта
+        сдвигается один раз, правила продвигаются к следующему повторению —
+        в одной транзакции. Возвращает количество созданных операций.
+        """
+        today = datetime.date.today()
+        through = min(through or today, today).isoformat()
+        # быстрая проверка по частичному индексу без блокировки записи
+        if not self._read("recurring_due", (through, user_id, user_id), fetch="one"):
+            return 0
+        rows, advances = [], []
+        deltas: dict[int, int] = {}
+        spans: dict[int, tuple[int, int]] = {}  # счёт -> (первая, последняя дата)
+        with self._transaction() as cur:
+            # перечитываем под _write_lock: параллельный вызов мог успеть раньше
+            rules = cur.execute(
+                STATEMENTS["recurring_due"], (through, user_id, user_id)
             ).fetchall()
+            for rule in rules:
+                next_index = rule["next_index"]
+                account_id = rule["account_id"]
+                for index, day in recurrence.occurrences(
+                    rule, next_index, datetime.date.fromisoformat(through)
+                ):
+                    ts = datecodec.day_start(day)
+                    rows.append(
+                        (
+                            account_id,
+                            rule["category_id"],
+                            rule["amount"],
+                            ts,
+                            rule["description"],
+                            rule["type"],
+                            rule["rule_id"],
+                        )
+                    )
+                    deltas[account_id] = deltas.get(account_id, 0) + _signed(
+                        rule["amount"], rule["type"]
+                    )
+                    first, last = spans.get(account_id, (ts, ts))
+                    spans[account_id] = (min(first, ts), max(last, ts))
+                    next_index = index + 1
+                next_day = recurrence.next_occurrence(rule, next_index)
+                advances.append(
+                    (next_index, next_day.isoformat() if next_day else None, rule["rule_id"])
+                )
+            # по (type, date) — локальные вставки в индекс, как в add_transactions_bulk
+            rows.sort(key=lambda r: (r[5], r[3]))
+            cur.executemany(STATEMENTS["recurring_occurrence_insert"], rows)
+            cur.executemany(
+                STATEMENTS["account_add_balance"],
+                ((delta, account_id) for account_id, delta in deltas.items()),
+            )
+            cur.executemany(STATEMENTS["recurring_advance"], advances)
+        for account_id, (first, last) in spans.items():
+            self.query_cache.invalidate(account_id, first, last)
+        return len(rows)
+
+    def get_upcoming_occurrences(
+        self,
+        user_id: int,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        account_id: int | None = None,
+        transaction_type: TransactionType | None = None,
+    ):
+        """
+        Будущие (после сегодняшнего дня) повторения за период — виртуальные
+        строки в формате операций для прогноза, в БД не пишутся.
+        transaction_id = None, ключ строки — occurrence = (rule_id, номер).
+        Отсортированы как список операций: от поздних к ранним.
+        """
+        since = max(start_date, datetime.date.today() + datetime.timedelta(days=1))
+        if since > end_date:
+            return []
+        t_type = (
+            TransactionType(transaction_type).value if transaction_type is not None else None
+        )
+        rules = self._read(
+            "recurring_active",
+            (user_id, end_date.isoformat(), account_id, account_id, t_type, t_type),
+        )
+        upcoming = []
+        for rule in rules:
+            for index, day in recurrence.occurrences(
+                rule, rule["next_index"], end_date, since=since
+            ):
+                upcoming.append(
+                    {
+                        "transaction_id": None,
+                        "occurrence": (rule["rule_id"], index),
+                        "rule_id": rule["rule_id"],
+                        "account_id": rule["account_id"],
+                        "category_id": rule["category_id"],
+                        "amount": rule["amount"],
+                        "transaction_date": datecodec.day_start(day),
+                        "description": rule["description"],
+                        "type": rule["type"],
+                        "category_name": rule["category_name"],
+                        "category_icon": rule["category_icon"],
+                    }
+                )
+        upcoming.sort(key=lambda r: r["transaction_date"], reverse=True)
+        return upcoming
+
+    # ----------------------------- BUDGETS -----------------------------------
+
+    BUDGET_PERIODS = ("week", "month")
+
+    def add_budget(
+        self,
+        user_id: int,
+        account_id: int,
+        category_id: int,
+        amount_limit: int,
+        period: str = "month",
+        alert_percent: int = 80,
+    ):
+        """
+        Бюджет расходов категории счёта на неделю или месяц. Прогресс
+        заполняется по истории один раз, дальше его ведут триггеры.
+        Возвращает (budget_id, None) или (None, текст ошибки).
+        """
+        if period not in self.BUDGET_PERIODS:
+            return None, f"Unknown budget period: {period}"
+        if not isinstance(amount_limit, int) or amount_limit <= 0:
+            return None, "Limit must be a positive integer number of minor units"
+        try:
+            with self._transaction() as cur:
+                if not cur.execute(
+                    STATEMENTS["account_balance_owned"], (account_id, user_id)
+                ).fetchone():
+                    return None, "Account not found"
+                cur.execute(
+                    STATEMENTS["budget_insert"],
+                    (user_id, account_id, category_id, period, amount_limit, alert_percent),
+                )
+                budget_id = cur.lastrowid
+                # прошлые периоды — не повод для оповещений
+                self._mute_budget_alerts = True
+                try:
+                    cur.execute(STATEMENTS["budget_progress_backfill"], (budget_id,))
+                finally:
+                    self._mute_budget_alerts = False
+            return budget_id, None
+        except sqlite3.IntegrityError:
+            return None, "Бюджет для этой категории и периода уже есть."
+        except Exception as e:
+            return None, str(e)
+
+    def update_budget(
+        self, budget_id: int, user_id: int, amount_limit: int, alert_percent: int = 80
+    ) -> bool:
+        return self._write(
+            "budget_update", (amount_limit, alert_percent, budget_id, user_id)
+        ) > 0
+
+    def delete_budget(self, budget_id: int, user_id: int) -> bool:
+        return self._write("budget_delete", (budget_id, user_id)) > 0
+
+    def get_budget_status(
+        self, user_id: int, account_id: int, day: datetime.date | None = None
+    ):
+        """
+        Бюджеты счёта с тратами текущего (на day) периода — одним чтением.
+        Сначала самые израсходованные.
+        """
+        day = day or datetime.date.today()
+        month_start = day.replace(day=1).isoformat()
+        week_start = (day - datetime.timedelta(days=day.weekday())).isoformat()
+        rows = self._read("budget_status", (month_start, week_start, account_id, user_id))
+        return [dict(r) for r in rows]
+
+    def check_budgets(self):
+        """Сверяет budget_progress с операциями. Возвращает список расхождений."""
+        return [dict(r) for r in self._read("budget_progress_check")]
+
+    def subscribe_budget_alerts(self, key: Hashable, callback: Callable[[dict], Any]):
+        """
+        callback(alert) после COMMIT записи, пересёкшей порог бюджета. Повторная
+        подписка с тем же key заменяет прежнюю (например, пересозданный экран).
+        """
+        self._budget_alert_listeners[key] = callback
+
+    def unsubscribe_budget_alerts(self, key: Hashable):
+        self._budget_alert_listeners.pop(key, None)
+
+    def _on_budget_alert(
+        self, budget_id, user_id, category_name, period, period_start, old_spent,
+        new_spent, amount_limit, alert_percent,
+    ):
+        """SQL-функция budget_alert(): вызывается триггером внутри транзакции."""
+        if self._mute_budget_alerts:
+            return None
+        self._pending_budget_alerts.append(
+            {
+                "budget_id": budget_id,
+                "user_id": user_id,
+                "category_name": category_name,
+                "period": period,
+                "period_start": period_start,
+                "spent": new_spent,
+                "amount_limit": amount_limit,
+                "alert_percent": alert_percent,
+                # "exceeded" — лимит, "threshold" — порог alert_percent
+                "level": "exceeded" if new_spent >= amount_limit else "threshold",
+            }
+        )
+        return None
+
+    def _dispatch_budget_alerts(self, alerts: list[dict]):
+        for callback in list(self._budget_alert_listeners.values()):
+            for alert in alerts:
+                try:
+                    callback(alert)
+                except Exception as e:  # подписчик не должен ломать запись
+                    print(f"Budget alert listener failed: {e}")
+
+    # ----------------------------- SEARCH ------------------------------------
+
+    # Ключи filters у search_transactions
+    SEARCH_FILTERS = (
+        "account_id",
+        "transaction_type",
+        "category_id",
+        "start_date",
+        "end_date",
+    )
+
+    def search_transactions(
+        self,
+        user_id: int,
+        query: str,
+        filters: dict | None = None,
+        cursor: int | None = None,
+        limit: int = 50,
+    ):
+        """
+        Полнотекстовый поиск по описанию и категории среди операций пользователя.
+
+        Каждое слово запроса ищется как префикс («так» находит «такси»), слова
+        объединяются по И. filters — необязательные ключи из SEARCH_FILTERS.
+        Результаты — от последних внесённых; cursor — transaction_id последней
+        показанной строки. Возвращает (rows, next_cursor).
+        """
+        match = _fts_query(query)
+        if not match:
+            return [], None
+        filters = filters or {}
+        unknown = set(filters) - set(self.SEARCH_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown search filters: {', '.join(sorted(unknown))}")
+        t_type = filters.get("transaction_type")
+        if t_type is not None:
+            t_type = TransactionType(t_type).value
+        start_date, end_date = filters.get("start_date"), filters.get("end_date")
+        start_ts = datecodec.day_range(start_date, start_date)[0] if start_date else -(2**63)
+        end_ts = datecodec.day_range(end_date, end_date)[1] if end_date else 2**63 - 1
+        account_id = filters.get("account_id")
+        category_id = filters.get("category_id")
+
+        rows = [
+            dict(r)
+            for r in self._read(
+                "transactions_search",
+                (
+                    user_id,
+                    match,
+                    cursor if cursor is not None else 2**63 - 1,
+                    account_id,
+                    account_id,
+                    t_type,
+                    t_type,
+                    category_id,
+                    category_id,
+                    start_ts,
+                    end_ts,
+                    limit,
+                ),
+            )
         ]
+        next_cursor = rows[-1]["transaction_id"] if len(rows) == limit else None
+        return rows, next_cursor
 
-        total = self._exec(
-            """
-            SELECT COALESCE(SUM(amount), 0) FROM transactions
-            WHERE account_id = ? AND type = ? AND transaction_date BETWEEN ? AND ?;
-            """,
-            (account_id, transaction_type.value, start_dt, end_dt),
-        ).fetchone()[0]
+    def rebuild_search_index(self):
+        """Заполняет transactions_fts заново (после правок в обход триггеров)."""
+        with self._transaction() as cur:
+            cur.execute(STATEMENTS["search_index_clear"])
+            cur.execute(STATEMENTS["search_index_backfill"])
+        return self._read("search_index_count", fetch="one")[0]
 
-        return tx, total
+    # ----------------------------- EXPORT ------------------------------------
+
+    @staticmethod
+    def _export_params(user_id, start_date, end_date, account_id, category_id):
+        start_ts = datecodec.day_start(start_date) if start_date else -(2**63)
+        end_ts = datecodec.day_range(end_date, end_date)[1] if end_date else 2**63 - 1
+        return user_id, account_id, category_id, start_ts, end_ts
+
+    def count_transactions_for_export(
+        self,
+        user_id: int,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+        account_id: int | None = None,
+        category_id: int | None = None,
+    ) -> int:
+        """Сколько строк отдаст iter_transactions_for_export (для прогресса)."""
+        params = self._export_params(user_id, start_date, end_date, account_id, category_id)
+        return self._read("transactions_export_count", params, fetch="one")[0]
+
+    def iter_transactions_for_export(
+        self,
+        user_id: int,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+        account_id: int | None = None,
+        category_id: int | None = None,
+        chunk_size: int = FETCH_CHUNK_SIZE,
+    ) -> Iterator[list[sqlite3.Row]]:
+        """
+        Операции пользователя пакетами по chunk_size строк (sqlite3.Row без
+        копирования в dict): date (локальное "YYYY-MM-DD HH:MM:SS"), amount
+        (минорные единицы), type, category, description, account, currency,
+        minor_units. Порядок — по счёту, затем по дате. Фильтры None
+        не ограничивают; даты включительно.
+
+        Генератор нужно дочитать или закрыть (contextlib.closing), иначе
+        курсор читателя не вернётся в пул.
+        """
+        params = self._export_params(user_id, start_date, end_date, account_id, category_id)
+        return self._iter_read("transactions_export", params, chunk_size)
+
+    # ---------------------------- ROLLUPS ------------------------------------
+
+    def rebuild_daily_totals(self):
+        """Пересчитывает daily_totals с нуля (для старых/повреждённых БД)."""
+        with self._transaction() as cur:
+            cur.execute(STATEMENTS["daily_totals_clear"])
+            cur.execute(STATEMENTS["daily_totals_backfill"])
+        self.query_cache.clear()
+        return self._read("daily_totals_count", fetch="one")[0]
+
+    def check_daily_totals(self):
+        """
+        Сверяет daily_totals с транзакциями. Возвращает список расхождений
+        (пустой, если всё сходится); raw_* = None — лишняя строка в rollup.
+        """
+        return [dict(r) for r in self._read("daily_totals_check")]
+
+    # ---------------------------- BALANCES -----------------------------------
+
+    def get_balance_as_of(
+        self, account_id: int, user_id: int, day: datetime.date | None = None
+    ):
+        """
+        Баланс счёта на конец дня day (None — текущий, включая будущие даты).
+
+        Считается от последнего снимка не позже day плюс daily_totals после
+        него, т.е. за O(дней с последнего снимка). None — счёт не найден.
+        """
+        if day is None:
+            row = self._read("account_balance_owned", (account_id, user_id), fetch="one")
+            return row["balance"] if row else None
+        day = day.isoformat()
+        row = self._read("balance_as_of", (account_id, user_id, day, day), fetch="one")
+        return row["balance"] if row else None
+
+    def take_balance_snapshots(
+        self,
+        day: datetime.date | None = None,
+        interval_days: int = BALANCE_SNAPSHOT_INTERVAL_DAYS,
+    ) -> int:
+        """
+        Снимки балансов на конец day (по умолчанию вчера) для счетов, у которых
+        последний снимок старше interval_days. Возвращает число снимков.
+        """
+        day = (day or datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+        return self._write("balance_snapshots_take", (day, day, day, interval_days))
+
+    # ---------------------------- АНАЛИТИКА ----------------------------------
+
+    def get_category_totals(
+        self,
+        user_id: int,
+        account_id: int,
+        transaction_type: TransactionType,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        limit: int | None = None,
+    ):
+        """
+        Суммы по категориям за период, по убыванию суммы (первые limit).
+        Возвращает (категории, итог периода по всем категориям); каждая
+        категория — dict с category_id, category_name, category_icon, total, count.
+        """
+        if not isinstance(transaction_type, TransactionType):
+            transaction_type = TransactionType(transaction_type)
+        start_ts, end_ts = datecodec.day_range(start_date, end_date)
+        rows = self._read(
+            "category_totals",
+            (
+                user_id,
+                account_id,
+                transaction_type.value,
+                start_ts,
+                end_ts,
+                -1 if limit is None else limit,
+            ),
+        )
+        period_total = rows[0]["period_total"] if rows else 0
+        categories = []
+        for r in rows:
+            d = dict(r)
+            del d["period_total"]
+            categories.append(d)
+        return categories, period_total
+
+    def get_top_categories(
+        self,
+        user_id: int,
+        account_id: int,
+        transaction_type: TransactionType,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        n: int = 5,
+    ):
+        """
+        Первые n категорий периода и сумма остальных («Другое») —
+        готовые данные для круговой диаграммы: (top, other_total).
+        """
+        top, period_total = self.get_category_totals(
+            user_id, account_id, transaction_type, start_date, end_date, limit=n
+        )
+        return top, period_total - sum(c["total"] for c in top)
+
+    def get_time_series(
+        self,
+        user_id: int,
+        account_id: int,
+        transaction_type: TransactionType,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        granularity: str = "day",
+    ):
+        """
+        Суммы по дням ("day") или месяцам ("month") из daily_totals:
+        [{"bucket": "YYYY-MM-DD" | "YYYY-MM", "total", "count"}, ...] по
+        возрастанию. Дни/месяцы без операций в результат не попадают.
+        """
+        if granularity not in ("day", "month"):
+            raise ValueError(f"Неизвестная гранулярность: {granularity!r}")
+        if not isinstance(transaction_type, TransactionType):
+            transaction_type = TransactionType(transaction_type)
+        rows = self._read(
+            f"{granularity}_series",
+            (
+                user_id,
+                account_id,
+                transaction_type.value,
+                start_date.isoformat(),
+                end_date.isoformat(),
+            ),
+        )
+        return [dict(r) for r in rows]
+
+    # ------------------------------- ВАЛЮТЫ ----------------------------------
+
+    def add_exchange_rates(self, rows: Iterable[tuple]) -> int:
+        """
+        Записывает курсы (day, from_code, to_code, rate) одной транзакцией;
+        курс на уже известную дату перезаписывается. Возвращает число строк.
+        """
+        rows = list(rows)
+        if rows:
+            self._write("exchange_rate_upsert", rows, many=True)
+            self.rate_cache.clear()
+        return len(rows)
+
+    def _rates(self) -> RateCache:
+        if not self.rate_cache.loaded:
+            minor_units = {r["code"]: r["minor_units"] for r in self._read("currencies_all")}
+            self.rate_cache.load(self._read("exchange_rates_all"), minor_units)
+        return self.rate_cache
+
+    def get_exchange_rate(self, from_code: str, to_code: str, day: datetime.date | None = None):
+        """Курс from -> to на day (по умолчанию сегодня) из кэша или None."""
+        return self._rates().rate(from_code, to_code, day)
+
+    def convert_amount(
+        self, minor: int, from_code: str, to_code: str, day: datetime.date | None = None
+    ):
+        """Пересчёт суммы в минорных единицах по курсу на day; None — курса нет."""
+        return self._rates().convert(minor, from_code, to_code, day)
+
+    @staticmethod
+    def _consolidated(rows, currency: str):
+        """Сводный итог из строк по валютам: валюты без курса — в missing."""
+        by_currency = [dict(r) for r in rows]
+        symbol, minor_units = currency, 2
+        for r in by_currency:
+            symbol, minor_units = r.pop("target_symbol"), r.pop("target_minor_units")
+        return {
+            "currency": currency,
+            "symbol": symbol,
+            "minor_units": minor_units,
+            "total": sum(r["converted"] for r in by_currency if r["converted"] is not None),
+            "by_currency": by_currency,
+            "missing": [r["code"] for r in by_currency if r["converted"] is None],
+        }
+
+    def get_consolidated_balance(
+        self, user_id: int, currency: str = DEFAULT_BASE_CURRENCY, day: datetime.date | None = None
+    ):
+        """
+        Баланс всех счетов пользователя в currency по курсам на day.
+        Один проход по accounts: суммы по валютам, затем пересчёт в SQL.
+        by_account — {account_id: баланс в currency или None без курса}.
+        """
+        day = (day or datetime.date.today()).isoformat()
+        rows = self._read("consolidated_balance", (user_id, currency, day, day))
+        by_account, by_currency = {}, {}
+        for r in rows:
+            r = dict(r)
+            by_account[r.pop("account_id")] = r.pop("account_converted")
+            by_currency.setdefault(r["code"], r)
+        result = self._consolidated(by_currency.values(), currency)
+        result["by_account"] = by_account
+        return result
+
+    def get_consolidated_period_totals(
+        self,
+        user_id: int,
+        transaction_type: TransactionType,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        currency: str = DEFAULT_BASE_CURRENCY,
+    ):
+        """
+        Итог периода по всем счетам пользователя в currency (курс на конец
+        периода); суммы по валютам берутся из daily_totals.
+        """
+        if not isinstance(transaction_type, TransactionType):
+            transaction_type = TransactionType(transaction_type)
+        start, end = start_date.isoformat(), end_date.isoformat()
+        rows = self._read(
+            "consolidated_period_totals",
+            (user_id, transaction_type.value, start, end, currency, end, end),
+        )
+        return self._consolidated(rows, currency)
+
+    def check_balances(self):
+        """
+        Сверяет accounts.balance и снимки с журналом (opening_balance + операции).
+        Возвращает список расхождений; day = None — текущий баланс счёта.
+        """
+        return [dict(r) for r in self._read("balances_check")]
 
 
 # class DatabaseManager:
@@ -0,0 +1,234 @@
+"""
+Потоковый экспорт операций пользователя в CSV, JSON Lines и XLSX.
+
+Операции читаются из БД пакетами (DatabaseManager.iter_transactions_for_export,
+fetchmany) и сразу дописываются в файл, поэтому память не растёт с числом
+строк: одновременно в ней один пакет. Файл пишется рядом во временный
+(*.part) и переименовывается в конце — при ошибке старый файл не портится.
+
+Колонки CSV совпадают с теми, что понимает importer (date, amount, type,
+category, description), так что экспорт можно загрузить обратно.
+"""
+
+import csv
+import datetime
+import json
+import os
+import re
+import zipfile
+from contextlib import closing
+from typing import Callable, Iterator
+from xml.sax.saxutils import escape
+
+import money
+from db import DatabaseManager
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx")
+EXPORT_COLUMNS = ("date", "amount", "type", "category", "description", "account", "currency")
+DEFAULT_CHUNK_SIZE = 5_000
+# Буфер файла: пакет строк уходит на диск крупными блоками
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class ExportError(ValueError):
+    """Экспорт невозможен (формат, фильтры)."""
+
+
+def iter_export_rows(
+    db: DatabaseManager,
+    user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **filters,
+) -> Iterator[list[tuple]]:
+    """
+    Пакеты строк-кортежей в порядке EXPORT_COLUMNS; сумма — текст в валюте
+    счёта ("123.45"), без потери точности.
+    """
+    formatters = {}
+    with closing(db.iter_transactions_for_export(user_id, chunk_size=chunk_size, **filters)) as chunks:
+        for chunk in chunks:
+            out = []
+            for r in chunk:
+                fmt = formatters.get(r[7])
+                if fmt is None:
+                    fmt = formatters[r[7]] = money.formatter("", r[7])
+                out.append((r[0], fmt(r[1]), r[2], r[3], r[4], r[5], r[6]))
+            yield out
+
+
+# ------------------------------- writers -------------------------------------
+
+
+def _write_csv(path: str, chunks: Iterator[list[tuple]]) -> Iterator[int]:
+    # utf-8-sig: Excel открывает кириллицу без вопросов, importer читает так же
+    with open(path, "w", encoding="utf-8-sig", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            yield len(chunk)
+
+
+def _write_jsonl(path: str, chunks: Iterator[list[tuple]]) -> Iterator[int]:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        for chunk in chunks:
+            f.write("".join(encode(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in chunk))
+            yield len(chunk)
+
+
+# XLSX — zip из нескольких XML. Неизменные части заданы текстом, лист пишется
+# потоком прямо в zip-запись; строки — inline (без таблицы общих строк,
+# которую пришлось бы держать в памяти до конца).
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Операции" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    # стиль 1 — дата и время (встроенный формат 22)
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        "</styleSheet>"
+    ),
+}
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_XLSX_SHEET_TAIL = "</sheetData></worksheet>"
+# символы, недопустимые в XML 1.0 (управляющие, кроме \t \n \r)
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_EXCEL_EPOCH = datetime.date(1899, 12, 30).toordinal()
+
+
+def _xlsx_text(value) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_XML_INVALID.sub("", str(value)))}</t></is></c>'
+
+
+def _write_xlsx(path: str, chunks: Iterator[list[tuple]]) -> Iterator[int]:
+    day_serials: dict[str, int] = {}  # "YYYY-MM-DD" -> номер дня Excel
+
+    def serial(text: str) -> float:
+        day = day_serials.get(text[:10])
+        if day is None:
+            day = day_serials[text[:10]] = (
+                datetime.date.fromisoformat(text[:10]).toordinal() - _EXCEL_EPOCH
+            )
+        seconds = int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+        return day + seconds / 86400
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            header = "".join(_xlsx_text(c) for c in EXPORT_COLUMNS)
+            sheet.write(f"{_XLSX_SHEET_HEAD}<row>{header}</row>".encode())
+            for chunk in chunks:
+                # дата и сумма — числа (дата со стилем даты), остальное — текст
+                sheet.write(
+                    "".join(
+                        f'<row><c s="1"><v>{serial(row[0])!r}</v></c><c><v>{row[1]}</v></c>'
+                        f"{''.join(_xlsx_text(v) for v in row[2:])}</row>"
+                        for row in chunk
+                    ).encode()
+                )
+                yield len(chunk)
+            sheet.write(_XLSX_SHEET_TAIL.encode())
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "xlsx": _write_xlsx}
+
+
+# -------------------------------- export -------------------------------------
+
+
+def export_transactions(
+    db: DatabaseManager,
+    user_id: int,
+    path: str,
+    fmt: str | None = None,
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None,
+    account_id: int | None = None,
+    category_id: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Callable[[int, float], None] | None = None,
+):
+    """
+    Экспортирует операции пользователя в файл path.
+
+    fmt — "csv" | "jsonl" | "xlsx" (по умолчанию по расширению файла).
+    on_progress(exported, fraction) вызывается после каждого пакета.
+    Возвращает {"exported": int, "bytes": int}.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise ExportError(f"Неподдерживаемый формат экспорта: {fmt}")
+    if start_date and end_date and start_date > end_date:
+        raise ExportError("Дата начала позже даты окончания")
+
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "account_id": account_id,
+        "category_id": category_id,
+    }
+    total = db.count_transactions_for_export(user_id, **filters) or 1
+    exported = 0
+    tmp_path = path + ".part"
+    try:
+        # closing: при ошибке (или отмене из on_progress) файл и курсор
+        # читателя освобождаются сразу, до удаления *.part
+        with closing(iter_export_rows(db, user_id, chunk_size, **filters)) as chunks, \
+                closing(writer(tmp_path, chunks)) as written_chunks:
+            for written in written_chunks:
+                exported += written
+                if on_progress:
+                    on_progress(exported, min(exported / total, 1.0))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if on_progress:
+        on_progress(exported, 1.0)
+    return {"exported": exported, "bytes": os.path.getsize(path)}
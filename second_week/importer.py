@@ -0,0 +1,328 @@
+"""
+Потоковый импорт банковских выписок (CSV / OFX) в счёт пользователя.
+
+Файл читается генераторами построчно, строки проверяются и сопоставляются
+с категориями, а в БД уходят пакетами через DatabaseManager.add_transactions_bulk
+(одна транзакция и одно обновление баланса на пакет).
+
+Кодировка определяется по началу файла: UTF-8 (с BOM или без), иначе
+Windows-1251 — в ней выгружают выписки многие российские банки.
+"""
+
+import codecs
+import csv
+import datetime
+import io
+import os
+import re
+import sqlite3
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+import datecodec
+import money
+from db import DatabaseManager, TransactionType
+
+DEFAULT_CHUNK_SIZE = 100_000
+MAX_REPORTED_ERRORS = 100
+FALLBACK_ENCODING = "cp1251"
+# Сколько байт начала файла проверяется на корректный UTF-8
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Названия колонок CSV -> внутренние ключи (без учёта регистра)
+CSV_COLUMNS = {
+    "date": "date",
+    "дата": "date",
+    "amount": "amount",
+    "сумма": "amount",
+    "description": "description",
+    "описание": "description",
+    "комментарий": "description",
+    "category": "category",
+    "категория": "category",
+    "type": "type",
+    "тип": "type",
+}
+
+TYPE_ALIASES = {
+    "expense": TransactionType.expense,
+    "расход": TransactionType.expense,
+    "debit": TransactionType.expense,
+    "income": TransactionType.income,
+    "доход": TransactionType.income,
+    "credit": TransactionType.income,
+}
+
+FALLBACK_CATEGORIES = {
+    TransactionType.expense: "Другое (Расходы)",
+    TransactionType.income: "Другое (Доходы)",
+}
+
+
+class ImportRowError(ValueError):
+    """Строка выписки не прошла проверку."""
+
+
+# ------------------------------- readers -------------------------------------
+
+
+class _ByteCounter(io.RawIOBase):
+    """Обёртка над бинарным файлом, считающая прочитанные байты (для прогресса)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        self.bytes_read += n or 0
+        return n
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def detect_encoding(path: str) -> str:
+    """utf-8-sig, если начало файла — корректный UTF-8, иначе FALLBACK_ENCODING."""
+    with open(path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    try:
+        # final=False: многобайтный символ может быть обрезан концом выборки
+        codecs.getincrementaldecoder("utf-8-sig")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8-sig"
+
+
+def _open_text(path: str, counter_holder: list):
+    encoding = detect_encoding(path)
+    raw = open(path, "rb")
+    counter = _ByteCounter(raw)
+    counter_holder.append(counter)
+    return io.TextIOWrapper(
+        io.BufferedReader(counter), encoding=encoding, newline=""
+    )
+
+
+def iter_csv_rows(path: str, counters: list | None = None) -> Iterator[dict]:
+    """Строки CSV как словари с ключами date/amount/description/category/type."""
+    with _open_text(path, counters if counters is not None else []) as f:
+        sample = f.readline()
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            raise ImportRowError(
+                "Не удалось определить разделитель CSV (нужны колонки даты и суммы "
+                "через запятую, точку с запятой или табуляцию)"
+            ) from None
+        # по одному заголовку Sniffer не видит кавычек; "" внутри поля — стандарт CSV
+        dialect.doublequote = True
+        header = next(csv.reader([sample], dialect))
+        keys = [CSV_COLUMNS.get(h.strip().lower()) for h in header]
+        if "date" not in keys or "amount" not in keys:
+            raise ImportRowError("В CSV нет колонок даты и суммы")
+        for values in csv.reader(f, dialect):
+            yield {k: v for k, v in zip(keys, values) if k}
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def iter_ofx_rows(path: str, counters: list | None = None) -> Iterator[dict]:
+    """Операции <STMTTRN> из OFX (SGML и XML варианты), по одной за раз."""
+    current = None
+    with _open_text(path, counters if counters is not None else []) as f:
+        for line in f:
+            for closing, tag, value in _OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if closing:
+                        if current is not None:
+                            yield _ofx_to_row(current)
+                        current = None
+                    else:
+                        current = {}
+                elif current is not None and not closing:
+                    current[tag] = value.strip()
+
+
+def _ofx_to_row(trn: dict) -> dict:
+    posted = trn.get("DTPOSTED", "")
+    # 20240131120000[+3:MSK] -> 2024-01-31 12:00:00
+    digits = posted[:14].ljust(14, "0")
+    date = (
+        f"{digits[0:4]}-{digits[4:6]}-{digits[6:8]} "
+        f"{digits[8:10]}:{digits[10:12]}:{digits[12:14]}"
+    )
+    description = trn.get("NAME") or ""
+    if trn.get("MEMO"):
+        description = f"{description} {trn['MEMO']}".strip()
+    return {
+        "date": date,
+        "amount": trn.get("TRNAMT", ""),
+        "description": description,
+    }
+
+
+def iter_rows(path: str, fmt: str | None = None, counters: list | None = None):
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt == "csv":
+        return iter_csv_rows(path, counters)
+    if fmt in ("ofx", "qfx"):
+        return iter_ofx_rows(path, counters)
+    raise ImportRowError(f"Неподдерживаемый формат файла: {fmt}")
+
+
+# ------------------------------ validation -----------------------------------
+
+
+def parse_date(value: str) -> int:
+    """Дата строки (локальное время) в секундах epoch, как в БД."""
+    value = value.strip()
+    try:
+        dt = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        # 31.01.2024 или 31.01.2024 12:00
+        try:
+            day_part, _, time_part = value.partition(" ")
+            d, m, y = day_part.split(".")
+            dt = datetime.datetime.fromisoformat(
+                f"{y}-{m.zfill(2)}-{d.zfill(2)} {time_part or '00:00:00'}"
+            )
+        except ValueError:
+            raise ImportRowError(f"Неверная дата: {value!r}") from None
+    return datecodec.to_epoch(dt)
+
+
+def parse_amount(value: str, minor_units: int = money.DEFAULT_MINOR_UNITS) -> int:
+    """Сумма строки в минорных единицах валюты счёта."""
+    try:
+        return money.parse(value, minor_units)
+    except ValueError:
+        raise ImportRowError(f"Неверная сумма: {value!r}") from None
+
+
+class CategoryMapper:
+    """Имя категории из выписки -> category_id пользователя (с запасной «Другое»)."""
+
+    def __init__(self, db: DatabaseManager, user_id: int):
+        self.by_name = {}
+        self.fallback = {}
+        for t_type in TransactionType:
+            for cat in db.get_categories_by_user_and_type(user_id, t_type):
+                # при совпадении имени пользовательская категория важнее дефолтной
+                key = (cat["name"].lower(), t_type)
+                if cat["user_id"] is not None or key not in self.by_name:
+                    self.by_name[key] = cat["category_id"]
+                if cat["name"] == FALLBACK_CATEGORIES[t_type]:
+                    self.fallback[t_type] = cat["category_id"]
+
+    def __call__(self, name: str | None, t_type: TransactionType) -> int:
+        if name:
+            cat_id = self.by_name.get((name.strip().lower(), t_type))
+            if cat_id is not None:
+                return cat_id
+        try:
+            return self.fallback[t_type]
+        except KeyError:
+            raise ImportRowError(f"Нет категории для «{name}»") from None
+
+
+def to_transaction_row(
+    row: dict, categories: CategoryMapper, minor_units: int = money.DEFAULT_MINOR_UNITS
+) -> tuple:
+    """Словарь из выписки -> кортеж для add_transactions_bulk."""
+    amount = parse_amount(row.get("amount", ""), minor_units)
+    type_name = (row.get("type") or "").strip().lower()
+    if type_name:
+        t_type = TYPE_ALIASES.get(type_name)
+        if t_type is None:
+            raise ImportRowError(f"Неизвестный тип операции: {type_name!r}")
+    else:
+        # без явного типа знак суммы определяет расход/доход
+        t_type = TransactionType.expense if amount < 0 else TransactionType.income
+    amount = abs(amount)
+    if amount == 0:
+        raise ImportRowError("Нулевая сумма")
+    return (
+        categories(row.get("category"), t_type),
+        amount,
+        parse_date(row.get("date", "")),
+        (row.get("description") or "").strip() or None,
+        t_type.value,
+    )
+
+
+# -------------------------------- import -------------------------------------
+
+
+def _chunks(iterable: Iterable, size: int):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def import_transactions(
+    db: DatabaseManager,
+    user_id: int,
+    account_id: int,
+    path: str,
+    fmt: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Callable[[int, float], None] | None = None,
+):
+    """
+    Импортирует выписку в счёт пользователя.
+
+    on_progress(imported, fraction) вызывается после каждого пакета;
+    fraction — доля прочитанного файла (0..1).
+    Возвращает {"imported": int, "skipped": int, "errors": [str, ...]}.
+    Ошибки формата, кодировки и БД — ImportRowError с понятным сообщением.
+    """
+    account = db.get_account_by_id(account_id, user_id)
+    if not account:
+        raise ImportRowError("Счёт не найден или не принадлежит пользователю")
+    minor_units = account["currency_minor_units"]
+
+    categories = CategoryMapper(db, user_id)
+    counters = []
+    rows = iter_rows(path, fmt, counters)
+    file_size = os.path.getsize(path) or 1
+    result = {"imported": 0, "skipped": 0, "errors": []}
+
+    def valid_rows():
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                yield to_transaction_row(row, categories, minor_units)
+            except ImportRowError as e:
+                result["skipped"] += 1
+                if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                    result["errors"].append(f"Запись {line_no}: {e}")
+
+    # Уже записанные пакеты остаются в БД, поэтому сбой посреди файла
+    # сообщается вместе с числом импортированных операций.
+    try:
+        for chunk in _chunks(valid_rows(), chunk_size):
+            result["imported"] += db.add_transactions_bulk(account_id, chunk)
+            if on_progress:
+                read = counters[0].bytes_read if counters else 0
+                on_progress(result["imported"], min(read / file_size, 1.0))
+    except UnicodeDecodeError:
+        reason = "файл не в кодировке UTF-8 или Windows-1251"
+    except csv.Error as e:
+        reason = f"ошибка разбора CSV: {e}"
+    except sqlite3.Error as e:
+        reason = f"ошибка базы данных: {e}"
+    else:
+        reason = None
+    if reason:
+        raise ImportRowError(
+            f"импорт прерван ({reason}); импортировано операций: {result['imported']}"
+        )
+    if on_progress:
+        on_progress(result["imported"], 1.0)
+    return result
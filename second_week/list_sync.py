@@ -0,0 +1,101 @@
+"""
+Синхронизация ft.ListView со списком записей по ключу.
+
+Вместо controls.clear() и построения всех строк заново строки переиспользуются
+по ключу (transaction_id, account_id): новая запись получает новый контрол,
+изменившаяся — правку полей в уже существующем, неизменная не трогается.
+Flet сравнивает дерево с отправленным ранее, поэтому клиенту уходят только
+новые строки и изменённые свойства, а не всё поддерево списка.
+
+    rows = KeyedList(list_view, key=lambda t: t["id"], create=build_tile, fill=fill_tile)
+    dirty = rows.sync(items)     # контролы, которые нужно отправить
+    page.update(*dirty)
+"""
+
+from typing import Any, Callable, Hashable, Iterable
+
+import flet as ft
+
+
+class KeyedList:
+    """
+    Хранит ключ -> (контрол, отпечаток записи). ``create(item)`` строит пустую
+    строку (обработчики, привязанные к ключу, — здесь), ``fill(control, item)``
+    записывает в неё значения полей; вызывается и для новых строк.
+    """
+
+    def __init__(
+        self,
+        list_view: ft.ListView,
+        key: Callable[[dict], Hashable],
+        create: Callable[[dict], ft.Control],
+        fill: Callable[[ft.Control, dict], Any],
+    ):
+        self.list_view = list_view
+        self._key = key
+        self._create = create
+        self._fill = fill
+        self._rows: dict[Hashable, tuple[ft.Control, tuple]] = {}
+
+    @staticmethod
+    def _fingerprint(item: dict) -> tuple:
+        return tuple(item.values())
+
+    def _row(self, item: dict) -> ft.Control:
+        control = self._create(item)
+        self._fill(control, item)
+        return control
+
+    def sync(self, items: Iterable[dict], placeholder: ft.Control | None = None) -> list[ft.Control]:
+        """
+        Приводит список к items (в их порядке). Возвращает контролы для
+        page.update(): сам список, если менялся состав или порядок строк,
+        иначе только строки с изменёнными полями (пусто — отправлять нечего).
+        placeholder показывается вместо пустого списка.
+        """
+        rows: dict[Hashable, tuple[ft.Control, tuple]] = {}
+        controls: list[ft.Control] = []
+        patched: list[ft.Control] = []
+        for item in items:
+            key = self._key(item)
+            fingerprint = self._fingerprint(item)
+            entry = self._rows.get(key)
+            if entry is None:
+                control = self._row(item)
+            else:
+                control = entry[0]
+                if entry[1] != fingerprint:
+                    self._fill(control, item)
+                    patched.append(control)
+            rows[key] = (control, fingerprint)
+            controls.append(control)
+        self._rows = rows
+        if not controls and placeholder is not None:
+            controls.append(placeholder)
+
+        current = self.list_view.controls
+        if len(current) != len(controls) or any(a is not b for a, b in zip(current, controls)):
+            self.list_view.controls = controls
+            return [self.list_view]
+        return patched
+
+    def append(self, items: Iterable[dict]) -> list[ft.Control]:
+        """Дописывает строки в конец (следующая страница)."""
+        added = []
+        for item in items:
+            control = self._row(item)
+            self._rows[self._key(item)] = (control, self._fingerprint(item))
+            added.append(control)
+        if not added:
+            return []
+        self.list_view.controls.extend(added)
+        return [self.list_view]
+
+    def get(self, key: Hashable) -> ft.Control | None:
+        """Показанная строка по ключу (или None)."""
+        entry = self._rows.get(key)
+        return entry[0] if entry else None
+
+    def clear(self):
+        """Забывает строки: следующий sync() построит их заново."""
+        self._rows.clear()
@@ -7,7 +7,6 @@ from pages.add_account_page import AddAccountView
 from pages.edit_account_page import EditAccountView
 from pages.add_transaction_page import AddTransactionView
 from db import db_manager
-import time
 import re
 
 
@@ -19,8 +18,8 @@ def main(page: ft.Page):
     def try_auto_login():
         """
         Проверяет наличие токена в локальном хранилище и пытается выполнить автоматический вход.
+        Повторные проверки токена обслуживаются из db_manager.session_cache.
         """
-        time.sleep(0.1)
         stored_token = page.client_storage.get("session_token")
         if stored_token:
             print(f"Found stored token: {stored_token[:8]}...")
@@ -116,6 +115,8 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    # Фоновая уборка БД: просроченные сессии и т.п.
+    db_manager.start_housekeeping()
     ft.app(
         target=main,
     )
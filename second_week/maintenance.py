@@ -0,0 +1,112 @@
+"""
+Служебные команды для файла БД.
+
+    python maintenance.py rebuild-daily-totals
+    python maintenance.py check-daily-totals --db other.db
+    python maintenance.py check-balances
+    python maintenance.py load-rates rates.csv
+    python maintenance.py rebuild-search-index
+    python maintenance.py check-budgets
+"""
+
+import argparse
+import sys
+
+from db import DatabaseManager, db_manager
+import rates
+
+
+def rebuild_daily_totals(db: DatabaseManager, args) -> int:
+    rows = db.rebuild_daily_totals()
+    print(f"daily_totals rebuilt: {rows} rows")
+    return 0
+
+
+def check_daily_totals(db: DatabaseManager, args) -> int:
+    mismatches = db.check_daily_totals()
+    for m in mismatches:
+        print(
+            f"account={m['account_id']} type={m['type']} day={m['day']}: "
+            f"raw={m['raw_total']} ({m['raw_count']}) "
+            f"rollup={m['rollup_total']} ({m['rollup_count']})"
+        )
+    print("daily_totals OK" if not mismatches else f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+def purge_sessions(db: DatabaseManager, args) -> int:
+    print(f"expired sessions removed: {db.purge_expired_sessions()}")
+    return 0
+
+
+def snapshot_balances(db: DatabaseManager, args) -> int:
+    print(f"balance snapshots taken: {db.take_balance_snapshots()}")
+    return 0
+
+
+def check_balances(db: DatabaseManager, args) -> int:
+    mismatches = db.check_balances()
+    for m in mismatches:
+        where = f"snapshot {m['day']}" if m["day"] else "current balance"
+        print(
+            f"account={m['account_id']} {where}: "
+            f"stored={m['stored']} ledger={m['ledger']}"
+        )
+    print("balances OK" if not mismatches else f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+def rebuild_search_index(db: DatabaseManager, args) -> int:
+    rows = db.rebuild_search_index()
+    print(f"search index rebuilt: {rows} rows")
+    return 0
+
+
+def check_budgets(db: DatabaseManager, args) -> int:
+    mismatches = db.check_budgets()
+    for m in mismatches:
+        print(
+            f"budget={m['budget_id']} period={m['period_start']}: "
+            f"raw={m['raw_spent']} stored={m['stored_spent']}"
+        )
+    print("budgets OK" if not mismatches else f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+def load_rates(db: DatabaseManager, args) -> int:
+    if not args.path:
+        print("load-rates: укажите CSV-файл с курсами (date,from,to,rate)")
+        return 2
+    try:
+        loaded = rates.load_rates_file(db, args.path)
+    except (rates.RateFileError, OSError) as e:
+        print(f"load-rates: {e}")
+        return 1
+    print(f"exchange rates loaded: {loaded}")
+    return 0
+
+
+COMMANDS = {
+    "rebuild-daily-totals": rebuild_daily_totals,
+    "check-daily-totals": check_daily_totals,
+    "purge-sessions": purge_sessions,
+    "snapshot-balances": snapshot_balances,
+    "check-balances": check_balances,
+    "load-rates": load_rates,
+    "rebuild-search-index": rebuild_search_index,
+    "check-budgets": check_budgets,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Служебные команды finance_manager")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("path", nargs="?", help="входной файл (для load-rates)")
+    parser.add_argument("--db", help="путь к файлу БД (по умолчанию finance_manager.db)")
+    args = parser.parse_args(argv)
+    db = DatabaseManager(args.db) if args.db else db_manager
+    return COMMANDS[args.command](db, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,8 @@ class Account(Base):
     account_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
-    balance = Column(Float, nullable=False, default=0.0, server_default='0.0')
+    balance = Column(Integer, nullable=False, default=0, server_default='0') # Minor units
+    opening_balance = Column(Integer, nullable=False, default=0, server_default='0') # Minor units
     currency_id = Column(Integer, ForeignKey("currencies.currency_id", ondelete="NO ACTION"), nullable=False) # Protect currency deletion
     description = Column(Text, nullable=True)
     icon = Column(String, nullable=True) # Store icon name
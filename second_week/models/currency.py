@@ -10,6 +10,7 @@ class Currency(Base):
     code = Column(String(3), nullable=False, unique=True) # e.g., USD, EUR
     name = Column(String, nullable=False) # e.g., US Dollar
     symbol = Column(String(5), nullable=False) # e.g., $
+    minor_units = Column(Integer, nullable=False, default=2, server_default='2') # Digits after the decimal point
 
     # Relationship (if accounts reference currency)
     accounts = relationship("Account", back_populates="currency")
@@ -1,13 +1,13 @@
 from sqlalchemy import Integer, String, Column, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from .base import Base
-import datetime
+import time
 
 class Session(Base):
     session_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     token = Column(String, nullable=False, unique=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(Integer, nullable=False) # Epoch seconds (UTC)
 
     # Relationship
     user = relationship("User", back_populates="sessions")
@@ -17,4 +17,4 @@ class Session(Base):
 
     @property
     def is_expired(self):
-        return datetime.datetime.utcnow() > self.expires_at
\ No newline at end of file
+        return time.time() > self.expires_at
\ No newline at end of file
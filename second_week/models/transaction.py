@@ -7,8 +7,8 @@ class Transaction(Base):
     transaction_id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey("accounts.account_id", ondelete="CASCADE"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="RESTRICT"), nullable=False) # Prevent category deletion if used
-    amount = Column(Float, nullable=False)
-    transaction_date = Column(DateTime, nullable=False)
+    amount = Column(Integer, nullable=False) # Minor units (kopecks/cents)
+    transaction_date = Column(Integer, nullable=False) # Epoch seconds (UTC), see datecodec
     description = Column(Text, nullable=True)
     type = Column(Enum(TransactionType), nullable=False) # Matches category type
 
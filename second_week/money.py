@@ -0,0 +1,73 @@
+"""
+Денежные суммы в минорных единицах (копейки, центы).
+
+В БД суммы и балансы хранятся целыми числами, поэтому SUM() в SQL точный,
+а в Python нет float-дрейфа. Этот модуль переводит ввод пользователя и
+выписок в минорные единицы и обратно в текст для отображения.
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Callable
+
+DEFAULT_MINOR_UNITS = 2
+
+# "-123.45" — частый случай (выписки, поля ввода) разбирается без Decimal
+_SIMPLE_NUMBER = re.compile(r"(-?)(\d+)(?:\.(\d*))?")
+
+
+def parse(value: str | float, minor_units: int = DEFAULT_MINOR_UNITS) -> int:
+    """
+    "1 234,56" / "12.5" / 12.5 -> минорные единицы (округление half-up).
+    Бросает ValueError, если строка не является числом.
+    """
+    text = str(value).replace("\xa0", "").replace(" ", "").replace(",", ".")
+    match = _SIMPLE_NUMBER.fullmatch(text)
+    if match and len(match.group(3) or "") <= minor_units:
+        sign, whole, frac = match.groups()
+        minor = int(whole) * 10**minor_units + int((frac or "").ljust(minor_units, "0") or 0)
+        return -minor if sign else minor
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Неверная сумма: {value!r}") from None
+    if not number.is_finite():
+        raise ValueError(f"Неверная сумма: {value!r}")
+    return int(number.scaleb(minor_units).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# До 10**15 минорных единиц деление на 10**n и округление float до n знаков
+# дают ровно те же цифры, что и целочисленный divmod, но заметно быстрее.
+_FLOAT_EXACT_LIMIT = 10**15
+
+
+@lru_cache(maxsize=None)
+def formatter(symbol: str = "", minor_units: int = DEFAULT_MINOR_UNITS) -> Callable[[int], str]:
+    """
+    Форматтер для валюты: formatter("₽")(12345) -> "123.45 ₽".
+    Кэшируется на пару (symbol, minor_units), вызывается на каждую строку списка.
+    """
+    suffix = f" {symbol}" if symbol else ""
+    if minor_units == 0:
+        return lambda minor: f"{minor}{suffix}"
+    scale = 10**minor_units
+    spec = f".{minor_units}f"
+
+    def fmt(minor: int) -> str:
+        if -_FLOAT_EXACT_LIMIT < minor < _FLOAT_EXACT_LIMIT:
+            return format(minor / scale, spec) + suffix
+        whole, frac = divmod(abs(minor), scale)
+        sign = "-" if minor < 0 else ""
+        return f"{sign}{whole}.{frac:0{minor_units}d}{suffix}"
+
+    return fmt
+
+
+def to_plain(minor: int, minor_units: int = DEFAULT_MINOR_UNITS) -> str:
+    """12345 -> "123.45" — для полей ввода и экспорта."""
+    return formatter("", minor_units)(minor)
+
+
+def format_amount(minor: int, symbol: str, minor_units: int = DEFAULT_MINOR_UNITS) -> str:
+    return formatter(symbol, minor_units)(minor)
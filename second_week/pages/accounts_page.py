@@ -1,7 +1,14 @@
 import flet as ft
-from db import db_manager
+from db import db_manager, TransactionType
+from async_db import async_db, LatestTask
 from icons import get_icon_by_name
+import exporter
+import importer
+from list_sync import KeyedList
+import money
+import datetime
 import functools
+import sqlite3
 
 
 def AccountsView(page: ft.Page):
@@ -14,6 +21,13 @@ def AccountsView(page: ft.Page):
         return ft.View("/accounts", [ft.Text("Ошибка: Пользователь не авторизован.")])
 
     accounts_list_view = ft.ListView(spacing=10, auto_scroll=True)
+    import_progress = ft.ProgressBar(width=250, value=0, visible=False)
+    import_status_text = ft.Text("", size=12)
+    import_state = {"account_id": None, "imported": 0}
+    export_progress = ft.ProgressBar(width=250, value=0, visible=False)
+    export_status_text = ft.Text("", size=12)
+    export_state = {"filters": None, "fmt": None}
+    load_task = LatestTask(page)  # only the latest account list renders
 
     # --- Functions ---
     def go_to_edit_account(account_id: int, e: ft.ControlEvent):
@@ -21,57 +35,261 @@ def AccountsView(page: ft.Page):
         print(f"Navigating to edit account ID: {account_id}")
         page.go(f"/accounts/edit/{account_id}")  # Use f-string for dynamic route
 
-    def load_accounts():
-        """Fetches accounts from DB and updates the ListView."""
-        print("Loading accounts for /accounts view...")
-        accounts_list_view.controls.clear()
-        user_accounts = db_manager.get_accounts_by_user(user_id)
-        if not user_accounts:
-            accounts_list_view.controls.append(
-                ft.Container(
-                    ft.Text("У вас пока нет счетов."),
-                    alignment=ft.alignment.center,
-                    padding=20,
-                )
+    # --- Statement import ---
+    def start_import(account_id: int, e: ft.ControlEvent):
+        """Asks for a statement file to import into the account."""
+        import_state["account_id"] = account_id
+        file_picker.pick_files(
+            dialog_title="Выберите выписку (CSV или OFX)",
+            allowed_extensions=["csv", "ofx", "qfx"],
+        )
+
+    def on_import_progress(imported: int, fraction: float):
+        import_state["imported"] = imported  # reported if the import fails later
+        import_progress.value = fraction
+        import_status_text.value = f"Импортировано операций: {imported}"
+        page.update()
+
+    def run_import(path: str, account_id: int):
+        """Runs in a background thread so the UI stays responsive."""
+        import_state["imported"] = 0
+        try:
+            result = importer.import_transactions(
+                db_manager, user_id, account_id, path, on_progress=on_import_progress
             )
-        else:
-            for acc in user_accounts:
-                edit_handler = functools.partial(go_to_edit_account, acc["account_id"])
-                accounts_list_view.controls.append(
-                    ft.ListTile(
-                        leading=ft.Icon(get_icon_by_name(acc["icon"])),
-                        # Wrap the title Text in a Container with expand=True
-                        title=ft.Container(
-                            content=ft.Text(acc["name"]),
-                            expand=True,  # Allow the title to use available horizontal space
-                        ),
-                        subtitle=ft.Text(
-                            f"{acc['description'] if acc['description'] else ''}"
-                        ),
-                        trailing=ft.Row(
-                            [
-                                ft.Text(
-                                    f"{acc['balance']:.2f} {acc['currency_symbol']}"
-                                ),
-                                ft.IconButton(
-                                    icon=ft.icons.EDIT_OUTLINED,
-                                    tooltip="Редактировать",
-                                    on_click=edit_handler,
-                                ),
-                            ],
-                            spacing=10,
-                            alignment=ft.MainAxisAlignment.END,
-                        ),
-                    )
+            import_status_text.value = (
+                f"Импорт завершён: {result['imported']} операций, "
+                f"пропущено {result['skipped']}"
+            )
+            for err in result["errors"][:5]:
+                print(f"Import: {err}")
+        except (importer.ImportRowError, OSError) as ex:
+            import_status_text.value = f"Ошибка импорта: {ex}"
+        except Exception as ex:
+            # committed chunks stay in the DB: say how far the import got
+            print(f"Import failed: {ex!r}")
+            import_status_text.value = (
+                f"Ошибка импорта: {ex}; импортировано операций: {import_state['imported']}"
+            )
+        finally:
+            # the balance changed even if the import stopped halfway
+            import_progress.visible = False
+            load_task.run(load_accounts)
+            page.update()
+
+    def on_file_picked(e: ft.FilePickerResultEvent):
+        if not e.files or import_state["account_id"] is None:
+            return
+        import_progress.value = 0
+        import_progress.visible = True
+        import_status_text.value = "Импорт..."
+        page.update()
+        page.run_thread(run_import, e.files[0].path, import_state["account_id"])
+
+    file_picker = ft.FilePicker(on_result=on_file_picked)
+    page.overlay.append(file_picker)
+
+    # --- Export ---
+    async def open_export_dialog(account_id: int | None, e: ft.ControlEvent):
+        """Format and filters; the file is written after a path is chosen."""
+        accounts = await async_db.get_accounts_by_user(user_id)
+        categories = [
+            c
+            for t_type in TransactionType
+            for c in await async_db.get_categories_by_user_and_type(user_id, t_type)
+        ]
+        format_field = ft.Dropdown(
+            label="Формат",
+            value="csv",
+            options=[ft.dropdown.Option(key=f, text=f.upper()) for f in exporter.EXPORT_FORMATS],
+        )
+        account_field = ft.Dropdown(
+            label="Счёт",
+            value=str(account_id) if account_id else "all",
+            options=[ft.dropdown.Option(key="all", text="Все счета")]
+            + [ft.dropdown.Option(key=str(a["account_id"]), text=a["name"]) for a in accounts],
+        )
+        category_field = ft.Dropdown(
+            label="Категория",
+            value="all",
+            options=[ft.dropdown.Option(key="all", text="Все категории")]
+            + [ft.dropdown.Option(key=str(c["category_id"]), text=c["name"]) for c in categories],
+        )
+        start_field = ft.TextField(label="С (ГГГГ-ММ-ДД)", hint_text="с начала")
+        end_field = ft.TextField(label="По (ГГГГ-ММ-ДД)", hint_text="до конца")
+        error_text = ft.Text(color=ft.colors.RED_ACCENT_700)
+
+        def choose_file(e):
+            try:
+                start_date, end_date = (
+                    datetime.date.fromisoformat(f.value.strip()) if f.value and f.value.strip() else None
+                    for f in (start_field, end_field)
                 )
-        if page.controls:
+            except ValueError:
+                error_text.value = "Дата в формате ГГГГ-ММ-ДД."
+                error_text.update()
+                return
+            export_state["fmt"] = format_field.value
+            export_state["filters"] = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "account_id": None if account_field.value == "all" else int(account_field.value),
+                "category_id": None if category_field.value == "all" else int(category_field.value),
+            }
+            page.close(dialog)
+            export_picker.save_file(
+                dialog_title="Сохранить экспорт",
+                file_name=f"transactions.{format_field.value}",
+                allowed_extensions=[format_field.value],
+            )
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Экспорт операций"),
+            content=ft.Column(
+                [format_field, account_field, category_field, start_field, end_field, error_text],
+                tight=True,
+                spacing=10,
+            ),
+            actions=[
+                ft.TextButton("Отмена", on_click=lambda e: page.close(dialog)),
+                ft.TextButton("Сохранить как…", on_click=choose_file),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        page.open(dialog)
+
+    def on_export_progress(exported: int, fraction: float):
+        export_progress.value = fraction
+        export_status_text.value = f"Выгружено операций: {exported}"
+        page.update()
+
+    def run_export(path: str):
+        """Runs in a background thread; rows are streamed, not collected."""
+        fmt = export_state["fmt"]
+        if not path.lower().endswith(f".{fmt}"):
+            path = f"{path}.{fmt}"
+        try:
+            result = exporter.export_transactions(
+                db_manager,
+                user_id,
+                path,
+                fmt,
+                on_progress=on_export_progress,
+                **export_state["filters"],
+            )
+            export_status_text.value = f"Экспорт завершён: {result['exported']} операций"
+        except (exporter.ExportError, OSError) as ex:
+            export_status_text.value = f"Ошибка экспорта: {ex}"
+        except sqlite3.Error as ex:
+            export_status_text.value = f"Ошибка базы данных при экспорте: {ex}"
+        except Exception as ex:
+            print(f"Export failed: {ex!r}")
+            export_status_text.value = f"Ошибка экспорта: {ex}"
+        finally:
+            # the exporter has already removed the .part file
+            export_progress.visible = False
             page.update()
 
+    def on_export_path(e: ft.FilePickerResultEvent):
+        if not e.path or export_state["filters"] is None:
+            return
+        export_progress.value = 0
+        export_progress.visible = True
+        export_status_text.value = "Экспорт..."
+        page.update()
+        page.run_thread(run_export, e.path)
+
+    export_picker = ft.FilePicker(on_result=on_export_path)
+    page.overlay.append(export_picker)
+
+    def build_account_tile(acc: dict) -> ft.ListTile:
+        """Builds a row for an account; handlers are bound to its id once."""
+        edit_handler = functools.partial(go_to_edit_account, acc["account_id"])
+        import_handler = functools.partial(start_import, acc["account_id"])
+        export_handler = functools.partial(open_export_dialog, acc["account_id"])
+        return ft.ListTile(
+            leading=ft.Icon(),
+            # Wrap the title Text in a Container with expand=True
+            title=ft.Container(
+                content=ft.Text(),
+                expand=True,  # Allow the title to use available horizontal space
+            ),
+            subtitle=ft.Text(),
+            trailing=ft.Row(
+                [
+                    ft.Text(),
+                    ft.IconButton(
+                        icon=ft.icons.UPLOAD_FILE_OUTLINED,
+                        tooltip="Импорт выписки",
+                        on_click=import_handler,
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.DOWNLOAD_OUTLINED,
+                        tooltip="Экспорт операций",
+                        on_click=export_handler,
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.EDIT_OUTLINED,
+                        tooltip="Редактировать",
+                        on_click=edit_handler,
+                    ),
+                ],
+                spacing=10,
+                alignment=ft.MainAxisAlignment.END,
+            ),
+        )
+
+    def fill_account_tile(tile: ft.ListTile, acc: dict):
+        """Writes the account's fields into its row (only changed props are sent)."""
+        tile.leading.name = get_icon_by_name(acc["icon"])
+        tile.title.content.value = acc["name"]
+        tile.subtitle.value = f"{acc['description'] if acc['description'] else ''}"
+        tile.trailing.controls[0].value = money.format_amount(
+            acc["balance"], acc["currency_symbol"], acc["currency_minor_units"]
+        )
+        if acc.get("converted") is not None:
+            tile.trailing.controls[0].value += f"\n≈ {base_format(acc['converted'])}"
+
+    account_rows = KeyedList(
+        accounts_list_view,
+        key=lambda acc: acc["account_id"],
+        create=build_account_tile,
+        fill=fill_account_tile,
+    )
+    no_accounts_placeholder = ft.Container(
+        ft.Text("У вас пока нет счетов."),
+        alignment=ft.alignment.center,
+        padding=20,
+    )
+
+    net_worth_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD, visible=False)
+    base_format = money.formatter()
+
+    async def load_accounts():
+        """Fetches accounts from DB and patches the ListView rows by account_id."""
+        nonlocal base_format
+        print("Loading accounts for /accounts view...")
+        user_accounts = await async_db.get_accounts_by_user(user_id)
+        # Net worth and per-account converted balances come from one SQL pass
+        consolidated = await async_db.get_consolidated_balance(user_id)
+        base_format = money.formatter(consolidated["symbol"], consolidated["minor_units"])
+        for acc in user_accounts:
+            if acc["currency_code"] != consolidated["currency"]:
+                acc["converted"] = consolidated["by_account"].get(acc["account_id"])
+        net_worth_text.visible = len(consolidated["by_currency"]) > 1
+        net_worth_text.value = f"Итого: {base_format(consolidated['total'])}"
+        changed = account_rows.sync(user_accounts, placeholder=no_accounts_placeholder)
+        changed.append(net_worth_text)
+        # Before the view is mounted the rows go out with it; afterwards only the diff
+        if accounts_list_view.page:
+            page.update(*changed)
+
     def go_to_add_account(e):
         page.go("/accounts/add")
 
     # --- Initial Load ---
-    load_accounts()
+    load_task.run(load_accounts)
 
     # --- View Layout ---
     return ft.View(
@@ -81,6 +299,11 @@ def AccountsView(page: ft.Page):
                 title=ft.Text("Мои счета"),
                 bgcolor=ft.colors.with_opacity(0.9, ft.colors.BLACK),
                 actions=[
+                    ft.IconButton(
+                        ft.icons.DOWNLOAD_OUTLINED,
+                        tooltip="Экспорт всех операций",
+                        on_click=functools.partial(open_export_dialog, None),
+                    ),
                     ft.IconButton(
                         ft.icons.ARROW_BACK,
                         tooltip="Назад",
@@ -90,11 +313,16 @@ def AccountsView(page: ft.Page):
             ),
             ft.Column(
                 [
+                    net_worth_text,
                     ft.Container(
                         content=accounts_list_view,
                         expand=True,
                         alignment=ft.alignment.center,
                     ),
+                    ft.Column(
+                        [import_progress, import_status_text, export_progress, export_status_text],
+                        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                    ),
                     ft.Container(
                         content=ft.ElevatedButton(
                             "Добавить счет",
@@ -1,5 +1,6 @@
 import flet as ft
-from db import db_manager
+from async_db import async_db
+import money
 from icons import get_icon_names
 
 def AddAccountView(page: ft.Page):
@@ -11,7 +12,7 @@ def AddAccountView(page: ft.Page):
         page.go("/login")
         return ft.View("/accounts/add", [ft.Text("Не авторизован")])
 
-    currencies = db_manager.get_currencies()
+    currencies = []  # filled by load_currencies
     icon_names = get_icon_names()
 
     account_name_field = ft.TextField(label="Название счета", autofocus=True, width=350)
@@ -20,17 +21,7 @@ def AddAccountView(page: ft.Page):
     )
     account_currency_dropdown = ft.Dropdown(
         label="Валюта",
-        options=(
-            [
-                ft.dropdown.Option(
-                    key=str(c["currency_id"]), text=f"{c['code']} ({c['symbol']})"
-                )
-                for c in currencies
-            ]
-            if currencies
-            else []
-        ),
-        value=str(currencies[0]["currency_id"]) if currencies else None,
+        options=[],
         width=350
     )
     account_description_field = ft.TextField(label="Описание (необязательно)", width=350)
@@ -42,7 +33,7 @@ def AddAccountView(page: ft.Page):
     )
     add_account_error_text = ft.Text(value="", color=ft.colors.RED, width=350)
 
-    def save_new_account_and_go_back(e):
+    async def save_new_account_and_go_back(e):
         """
         Проверяет ввод, сохраняет новый счет и возвращает на предыдущую страницу.
         """
@@ -57,22 +48,23 @@ def AddAccountView(page: ft.Page):
             add_account_error_text.value = "Название счета не может быть пустым."
             page.update()
             return
+        if not currency_id:
+            add_account_error_text.value = "Выберите валюту."
+            page.update()
+            return
+        currency = next(c for c in currencies if str(c["currency_id"]) == currency_id)
         try:
-            balance = float(balance_str) if balance_str else 0.0
+            balance = money.parse(balance_str, currency["minor_units"]) if balance_str else 0
         except ValueError:
             add_account_error_text.value = "Неверный формат баланса."
             page.update()
             return
-        if not currency_id:
-            add_account_error_text.value = "Выберите валюту."
-            page.update()
-            return
         if not icon:
             add_account_error_text.value = "Выберите иконку."
             page.update()
             return
 
-        success = db_manager.add_account(
+        success = await async_db.add_account(
             user_id=user_id,
             name=name,
             balance=balance,
@@ -88,12 +80,29 @@ def AddAccountView(page: ft.Page):
             add_account_error_text.value = "Ошибка при сохранении счета в базе данных."
             page.update()
 
+    async def load_currencies():
+        """Fills the currency dropdown once the list arrives from the DB pool."""
+        currencies[:] = await async_db.get_currencies()
+        account_currency_dropdown.options = [
+            ft.dropdown.Option(
+                key=str(c["currency_id"]), text=f"{c['code']} ({c['symbol']})"
+            )
+            for c in currencies
+        ]
+        if currencies and account_currency_dropdown.value is None:
+            account_currency_dropdown.value = str(currencies[0]["currency_id"])
+        # Before the view is mounted the options go out with it
+        if account_currency_dropdown.page:
+            account_currency_dropdown.update()
+
     def cancel_and_go_back(e):
         """
         Возвращает на предыдущую страницу без сохранения.
         """
         page.go("/accounts")
 
+    page.run_task(load_currencies)
+
     return ft.View(
         "/accounts/add",
         [
@@ -1,6 +1,8 @@
 import flet as ft
-from db import db_manager
+from async_db import async_db, LatestTask
 import datetime
+import money
+import recurrence
 from icons import get_icon_by_name  # Assuming you have this from accounts page
 
 
@@ -28,20 +30,8 @@ def AddTransactionView(page: ft.Page):
         return ft.View("/add_transaction", [ft.Text("Ошибка: Счет не выбран.")])
 
     # --- Data Fetching ---
-    user_accounts = db_manager.get_accounts_by_user(user_id)
-    if not user_accounts:
-        page.go("/accounts")  # Redirect if no accounts exist
-        page.show_snack_bar(ft.SnackBar(ft.Text("Сначала добавьте счет!"), open=True))
-        return ft.View("/add_transaction", [ft.Text("Нет доступных счетов.")])
-
-    # Find the initial account details to get currency symbol
-    initial_account = next(
-        (acc for acc in user_accounts if acc["account_id"] == initial_account_id),
-        user_accounts[0],
-    )
-    initial_currency_symbol = (
-        initial_account["currency_symbol"] if initial_account else "???"
-    )
+    # Filled in place by load_accounts (off the Flet thread)
+    user_accounts: list[dict] = []
 
     # --- State Management ---
     selected_type = ft.Ref[str]()
@@ -65,19 +55,13 @@ def AddTransactionView(page: ft.Page):
         # on_change=validate_input # Add validation later
     )
     currency_text = ft.Text(
-        initial_currency_symbol, size=16, weight=ft.FontWeight.BOLD
-    )  # Separate text for currency
+        "", size=16, weight=ft.FontWeight.BOLD
+    )  # Separate text for currency, set by load_accounts
 
     account_dropdown = ft.Dropdown(
         label="Счет",
         value=str(initial_account_id),  # Dropdown value must be string
-        options=[
-            ft.dropdown.Option(
-                key=str(acc["account_id"]),
-                text=f"{acc['name']} ({acc['balance']:.2f} {acc['currency_symbol']})",
-            )
-            for acc in user_accounts
-        ],
+        options=[],  # filled by load_accounts
         # on_change=handle_account_change # Add handler later
     )
     
@@ -129,16 +113,51 @@ def AddTransactionView(page: ft.Page):
     page.overlay.append(date_picker)  # Add date picker to page overlay
 
     description_field = ft.TextField(label="Комментарий (необязательно)", max_lines=3)
+    # Salary, rent, subscriptions: saved as a rule, occurrences are created as they come due
+    repeat_dropdown = ft.Dropdown(
+        label="Повторять",
+        value="none",
+        options=[ft.dropdown.Option(key="none", text="Не повторять")]
+        + [
+            ft.dropdown.Option(key=freq, text=label)
+            for freq, label in recurrence.FREQUENCY_LABELS.items()
+        ],
+    )
     add_button = ft.ElevatedButton(text="Добавить", disabled=True)  # Initially disabled
     error_text = ft.Text("", color=ft.colors.RED)
 
     # --- Event Handlers & Logic ---
+    categories_task = LatestTask(page)  # tab switches supersede pending loads
+
+    async def load_accounts():
+        """Fills the account dropdown; the initial account defaults to the first one."""
+        user_accounts[:] = await async_db.get_accounts_by_user(user_id)
+        if not user_accounts:
+            page.go("/accounts")  # Redirect if no accounts exist
+            page.show_snack_bar(ft.SnackBar(ft.Text("Сначала добавьте счет!"), open=True))
+            return
+        account_dropdown.options = [
+            ft.dropdown.Option(
+                key=str(acc["account_id"]),
+                text=f"{acc['name']} ({money.format_amount(acc['balance'], acc['currency_symbol'], acc['currency_minor_units'])})",
+            )
+            for acc in user_accounts
+        ]
+        # Find the initial account details to get currency symbol
+        initial_account = next(
+            (acc for acc in user_accounts if acc["account_id"] == initial_account_id),
+            user_accounts[0],
+        )
+        selected_account_id.current = initial_account["account_id"]
+        account_dropdown.value = str(initial_account["account_id"])
+        currency_text.value = initial_account["currency_symbol"]
+        validate_input()  # Re-validate with the account's minor units; updates the page
 
-    def update_categories(transaction_type: str):
+    async def update_categories(transaction_type: str):
         """Fetches and updates categories based on type."""
         print(f"--- Updating categories ---") # Add print
         print(f"User ID: {user_id}, Transaction Type: {transaction_type}") # Add print
-        categories = db_manager.get_categories_by_user_and_type(
+        categories = await async_db.get_categories_by_user_and_type(
             user_id, transaction_type
         )
         print(f"Categories fetched from DB: {categories}") # Add print: See what the DB returned
@@ -163,7 +182,7 @@ def AddTransactionView(page: ft.Page):
         """Update selected type and categories when tab changes."""
         new_index = e.control.selected_index
         selected_type.current = "expense" if new_index == 0 else "income"
-        update_categories(selected_type.current)
+        categories_task.run(update_categories, selected_type.current)
 
     def handle_account_change(e):
         """Update selected account ID and currency symbol."""
@@ -178,12 +197,24 @@ def AddTransactionView(page: ft.Page):
         validate_input()  # Re-validate
         page.update()
 
+    def selected_minor_units() -> int:
+        """Minor units of the selected account's currency (amounts are stored as ints)."""
+        account = next(
+            (acc for acc in user_accounts if acc["account_id"] == selected_account_id.current),
+            None,
+        )
+        return account["currency_minor_units"] if account else money.DEFAULT_MINOR_UNITS
+
     def validate_input(*args):
         """Enable/disable add button based on required fields."""
         try:
-            amount_val = float(amount_field.value) if amount_field.value else 0.0
+            amount_val = (
+                money.parse(amount_field.value, selected_minor_units())
+                if amount_field.value
+                else 0
+            )
         except ValueError:
-            amount_val = 0.0  # Treat invalid input as 0 for validation
+            amount_val = 0  # Treat invalid input as 0 for validation
 
         is_valid = (
             amount_val > 0
@@ -198,12 +229,12 @@ def AddTransactionView(page: ft.Page):
 
         page.update()
 
-    def save_transaction(e):
+    async def save_transaction(e):
         """Gathers data, calls DB function, and navigates back."""
         error_text.value = ""  # Clear previous errors
         # --- Validation (double check before saving) ---
         try:
-            amount = float(amount_field.value)
+            amount = money.parse(amount_field.value, selected_minor_units())
             if amount <= 0:
                 raise ValueError("Сумма должна быть больше нуля.")
         except ValueError as ve:
@@ -231,28 +262,41 @@ def AddTransactionView(page: ft.Page):
             return
         # --- End Validation ---
 
-        # Format date for DB (ISO 8601 recommended for SQLite TEXT)
-        date_str = trans_date.strftime("%Y-%m-%d %H:%M:%S")
-
         # Call DB function
-        success, message = db_manager.add_transaction(
-            account_id=int(account_id_str),
-            category_id=int(category_id_str),
-            amount=amount,
-            transaction_date=date_str,
-            description=description,
-            transaction_type=trans_type,
-        )
+        add_button.disabled = True  # no double submits while saving
+        page.update()
+        if repeat_dropdown.value and repeat_dropdown.value != "none":
+            # the picked date is the first occurrence; past ones are created right away
+            rule_id, message = await async_db.add_recurring_rule(
+                user_id=user_id,
+                account_id=int(account_id_str),
+                category_id=int(category_id_str),
+                amount=amount,
+                description=description,
+                transaction_type=trans_type,
+                freq=repeat_dropdown.value,
+                start_date=trans_date.date(),
+            )
+            success = rule_id is not None
+            done_message = "Повторяющаяся операция добавлена!"
+        else:
+            success, message = await async_db.add_transaction(
+                account_id=int(account_id_str),
+                category_id=int(category_id_str),
+                amount=amount,
+                transaction_date=trans_date,  # local datetime, converted by datecodec
+                description=description,
+                transaction_type=trans_type,
+            )
+            done_message = "Транзакция добавлена!"
 
         if success:
             page.go("/home")  # Go back to home page on success
             # Correct the method name here
-            page.show_snack_bar(
-                ft.SnackBar(ft.Text("Транзакция добавлена!"), open=True)
-            )
+            page.show_snack_bar(ft.SnackBar(ft.Text(done_message), open=True))
         else:
             error_text.value = f"Ошибка сохранения: {message}"
-            page.update()
+            validate_input()  # re-enables the button and updates the page
 
     # --- Assign handlers ---
     amount_field.on_change = validate_input
@@ -262,7 +306,8 @@ def AddTransactionView(page: ft.Page):
     add_button.on_click = save_transaction
 
     # --- Initial Setup ---
-    update_categories(selected_type.current)  # Load initial categories
+    page.run_task(load_accounts)
+    categories_task.run(update_categories, selected_type.current)  # Load initial categories
 
     # --- Page Layout ---
     return ft.View(
@@ -300,6 +345,7 @@ def AddTransactionView(page: ft.Page):
                         category_dropdown,
                         date_button,
                         description_field,
+                        repeat_dropdown,
                         # Add Tags, Photo later if needed
                         ft.Divider(height=10, color=ft.colors.with_opacity(0.5, ft.colors.WHITE)),
                         error_text,
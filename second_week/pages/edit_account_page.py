@@ -1,5 +1,6 @@
 import flet as ft
-from db import db_manager
+from async_db import async_db
+import money
 from icons import get_icon_names
 
 # Note: This view now needs the account_id passed to it.
@@ -13,68 +14,40 @@ def EditAccountView(page: ft.Page, account_id: int):
         page.go("/login")
         return ft.View(f"/accounts/edit/{account_id}", [ft.Text("Не авторизован")])
 
-    # --- Fetch existing account data ---
-    account_data = db_manager.get_account_by_id(account_id, user_id)
-    if not account_data:
-        # Handle case where account doesn't exist or doesn't belong to user
-        return ft.View(
-            f"/accounts/edit/{account_id}",
-            [
-                ft.AppBar(title=ft.Text("Ошибка")),
-                ft.Text(f"Счет с ID {account_id} не найден или не принадлежит вам."),
-                ft.ElevatedButton("Назад к счетам", on_click=lambda _: page.go("/accounts"))
-            ],
-             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-             vertical_alignment=ft.MainAxisAlignment.CENTER
-        )
-
-    # --- Fetch necessary data for dropdowns ---
-    currencies = db_manager.get_currencies()
+    # --- Account and currencies arrive from the DB pool (see load_account) ---
+    account_data = {}
+    currencies = []
     icon_names = get_icon_names()
 
-    # --- Controls for Edit Account Form (pre-filled) ---
+    # --- Controls for Edit Account Form (pre-filled by load_account) ---
     account_name_field = ft.TextField(
         label="Название счета",
-        value=account_data['name'], # Pre-fill
         autofocus=True,
         width=350
     )
     account_balance_field = ft.TextField(
         label="Баланс",
-        value=str(account_data['balance']), # Pre-fill (convert to string)
         keyboard_type=ft.KeyboardType.NUMBER,
         width=350
     )
     account_currency_dropdown = ft.Dropdown(
         label="Валюта",
-        options=(
-            [
-                ft.dropdown.Option(
-                    key=str(c["currency_id"]), text=f"{c['code']} ({c['symbol']})"
-                )
-                for c in currencies
-            ]
-            if currencies
-            else []
-        ),
-        value=str(account_data['currency_id']), # Pre-fill (convert to string)
+        options=[],
         width=350
     )
     account_description_field = ft.TextField(
         label="Описание (необязательно)",
-        value=account_data['description'] or "", # Pre-fill (handle None)
         width=350
     )
     account_icon_dropdown = ft.Dropdown(
         label="Иконка",
         options=[ft.dropdown.Option(key=name, text=name) for name in icon_names],
-        value=account_data['icon'], # Pre-fill
         width=350
     )
     edit_account_error_text = ft.Text(value="", color=ft.colors.RED, width=350)
 
     # --- Functions ---
-    def save_updated_account(e):
+    async def save_updated_account(e):
         """Validates input, saves the updated account, and navigates back."""
         name = account_name_field.value
         balance_str = account_balance_field.value
@@ -88,16 +61,17 @@ def EditAccountView(page: ft.Page, account_id: int):
             edit_account_error_text.value = "Название счета не может быть пустым."
             page.update()
             return
+        if not currency_id:
+            edit_account_error_text.value = "Выберите валюту."
+            page.update()
+            return
+        currency = next(c for c in currencies if str(c["currency_id"]) == currency_id)
         try:
-            balance = float(balance_str) if balance_str else 0.0
+            balance = money.parse(balance_str, currency["minor_units"]) if balance_str else 0
         except ValueError:
             edit_account_error_text.value = "Неверный формат баланса."
             page.update()
             return
-        if not currency_id:
-            edit_account_error_text.value = "Выберите валюту."
-            page.update()
-            return
         if not icon:
             edit_account_error_text.value = "Выберите иконку."
             page.update()
@@ -105,7 +79,7 @@ def EditAccountView(page: ft.Page, account_id: int):
         # --- End Validation ---
 
         # Call DB update function
-        success = db_manager.update_account(
+        success = await async_db.update_account(
             account_id=account_id, # Use the account_id passed to the view
             user_id=user_id,
             name=name,
@@ -130,11 +104,11 @@ def EditAccountView(page: ft.Page, account_id: int):
         """Closes the currently open dialog."""
         page.go("/accounts")
 
-    def execute_delete_account(e):
+    async def execute_delete_account(e):
         """Performs the actual deletion after confirmation."""
         close_dialog(e) # Close the confirmation dialog
         print(f"Attempting to delete account ID: {account_id}")
-        success, message = db_manager.delete_account(account_id, user_id)
+        success, message = await async_db.delete_account(account_id, user_id)
         if success:
             print(f"Account {account_id} deleted successfully.")
             page.go("/accounts") # Navigate back after successful deletion
@@ -159,49 +133,89 @@ def EditAccountView(page: ft.Page, account_id: int):
         page.update()
 
 
+    async def load_account():
+        """Pre-fills the form, or shows the not-found message in place of it."""
+        account = await async_db.get_account_by_id(account_id, user_id)
+        if not account:
+            # Handle case where account doesn't exist or doesn't belong to user
+            app_bar.title.value = "Ошибка"
+            view.controls = [
+                app_bar,
+                ft.Text(f"Счет с ID {account_id} не найден или не принадлежит вам."),
+                ft.ElevatedButton("Назад к счетам", on_click=lambda _: page.go("/accounts"))
+            ]
+            view.vertical_alignment = ft.MainAxisAlignment.CENTER
+            if view.page:
+                view.update()
+            return
+        account_data.update(account)
+        currencies[:] = await async_db.get_currencies()
+
+        app_bar.title.value = f"Редактировать: {account_data['name']}"
+        account_name_field.value = account_data['name']
+        account_balance_field.value = money.to_plain(
+            account_data['balance'], account_data['currency_minor_units']
+        )
+        account_currency_dropdown.options = [
+            ft.dropdown.Option(
+                key=str(c["currency_id"]), text=f"{c['code']} ({c['symbol']})"
+            )
+            for c in currencies
+        ]
+        account_currency_dropdown.value = str(account_data['currency_id']) # Dropdown value must be string
+        account_description_field.value = account_data['description'] or "" # handle None
+        account_icon_dropdown.value = account_data['icon']
+        form.disabled = False
+        # Before the view is mounted the values go out with it
+        if view.page:
+            view.update()
+
     # --- View Layout ---
-    return ft.View(
-        # Route includes the specific account ID
-        f"/accounts/edit/{account_id}",
+    app_bar = ft.AppBar(
+        title=ft.Text("Редактировать счет"),
+        bgcolor=ft.colors.with_opacity(0.9, ft.colors.BLACK),
+    )
+    form = ft.Column(
         [
-            ft.AppBar(
-                title=ft.Text(f"Редактировать: {account_data['name']}"),
-                bgcolor=ft.colors.with_opacity(0.9, ft.colors.BLACK),
-                ),
-            ft.Column(
+            account_name_field,
+            account_balance_field,
+            account_currency_dropdown,
+            account_icon_dropdown,
+            account_description_field,
+            edit_account_error_text,
+            ft.Row(
                 [
-                    account_name_field,
-                    account_balance_field,
-                    account_currency_dropdown,
-                    account_icon_dropdown,
-                    account_description_field,
-                    edit_account_error_text,
-                    ft.Row(
-                        [
-                            # Add Delete Button
-                            ft.ElevatedButton(
-                                "Удалить",
-                                on_click=confirm_delete_account,
-                                color=ft.colors.WHITE,
-                                bgcolor=ft.colors.RED_700, # Make delete button stand out
-                            ),
-                            # Existing Buttons
-                            ft.ElevatedButton("Отмена", on_click=cancel_and_go_back),
-                            ft.ElevatedButton("Сохранить", on_click=save_updated_account),
-                        ],
-                        alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-                        # Adjust spacing or width if needed
-                        width=350 # Match width of fields for alignment
-                    )
+                    # Add Delete Button
+                    ft.ElevatedButton(
+                        "Удалить",
+                        on_click=confirm_delete_account,
+                        color=ft.colors.WHITE,
+                        bgcolor=ft.colors.RED_700, # Make delete button stand out
+                    ),
+                    # Existing Buttons
+                    ft.ElevatedButton("Отмена", on_click=cancel_and_go_back),
+                    ft.ElevatedButton("Сохранить", on_click=save_updated_account),
                 ],
-                alignment=ft.MainAxisAlignment.START,
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                spacing=15,
-                scroll=ft.ScrollMode.ADAPTIVE
+                alignment=ft.MainAxisAlignment.SPACE_EVENLY,
+                # Adjust spacing or width if needed
+                width=350 # Match width of fields for alignment
             )
         ],
+        alignment=ft.MainAxisAlignment.START,
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        spacing=15,
+        scroll=ft.ScrollMode.ADAPTIVE,
+        disabled=True,  # until load_account fills it
+    )
+    view = ft.View(
+        # Route includes the specific account ID
+        f"/accounts/edit/{account_id}",
+        [app_bar, form],
         vertical_alignment=ft.MainAxisAlignment.START,
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         padding=10,
         bgcolor=ft.colors.with_opacity(0.8, ft.colors.BLACK),
-    )
\ No newline at end of file
+    )
+
+    page.run_task(load_account)
+    return view
@@ -1,7 +1,33 @@
 import flet as ft
 from db import db_manager, TransactionType  # Import TransactionType
+from async_db import async_db, LatestTask
+from refresh import RefreshScheduler
+from list_sync import KeyedList
+from prefetch import Prefetcher
 import datetime
-from dateutil.relativedelta import relativedelta  # For easy date manipulation
+import functools
+import datecodec
+import money
+import periods
+
+# Transactions are loaded page by page as the list is scrolled
+TRANSACTIONS_PAGE_SIZE = 50
+LOAD_MORE_THRESHOLD_PX = 300  # start loading when this close to the bottom
+# Category chart: top N categories, the rest is summed into "Другое"
+CHART_TOP_CATEGORIES = 5
+CHART_COLORS = [
+    ft.colors.BLUE_400,
+    ft.colors.ORANGE_400,
+    ft.colors.GREEN_400,
+    ft.colors.PURPLE_300,
+    ft.colors.RED_300,
+]
+CHART_OTHER_COLOR = ft.colors.GREY_600
+
+
+def account_formatter(acc: dict):
+    """Cached money formatter for the account's currency (amounts are minor units)."""
+    return money.formatter(acc["currency_symbol"], acc["currency_minor_units"])
 
 
 def HomeView(page: ft.Page):
@@ -13,9 +39,13 @@ def HomeView(page: ft.Page):
 
     # --- Refs for UI elements that need updating ---
     header_balance_text = ft.Ref[ft.Text]()
+    net_worth_text = ft.Ref[ft.Text]()  # all accounts, in the base currency
     transactions_list_view = ft.Ref[ft.ListView]()
     summary_text = ft.Ref[ft.Text]()
-    # progress_bar = ft.Ref[ft.ProgressBar]() # Add if you implement progress logic
+    budgets_column = ft.Ref[ft.Column]()  # one progress bar per budget of the account
+    category_chart = ft.Ref[ft.PieChart]()
+    category_legend = ft.Ref[ft.Column]()
+    chart_row = ft.Ref[ft.Row]()
     date_navigator_text = ft.Ref[ft.Text]()
     tabs_control = ft.Ref[ft.Tabs]()
     # Add refs for period buttons if you want to visually indicate selection
@@ -23,7 +53,10 @@ def HomeView(page: ft.Page):
     week_button = ft.Ref[ft.TextButton]()
     month_button = ft.Ref[ft.TextButton]()
     year_button = ft.Ref[ft.TextButton]()
-    period_button = ft.Ref[ft.TextButton]()  # For custom period later
+    quarter_button = ft.Ref[ft.TextButton]()
+    period_button = ft.Ref[ft.TextButton]()  # custom range
+    selection_bar = ft.Ref[ft.Row]()  # shown while transactions are multi-selected
+    selection_count_text = ft.Ref[ft.Text]()
 
     # --- State Variables ---
     # Use page.session or page.client_storage if state needs to persist across views/reloads
@@ -31,120 +64,57 @@ def HomeView(page: ft.Page):
     # Let's store them locally for now.
     current_state = {
         "selected_account_id": None,
-        "selected_account_currency": "₽",
+        "money_format": money.formatter("₽"),  # formatter of the selected account's currency
         "current_tab_index": 0,  # 0: Expenses, 1: Income
-        "current_period_type": "day",  # 'day', 'week', 'month', 'year'
-        "current_date": datetime.date.today(),  # The reference date for period calculation
-        "current_offset": 0,
+        # Shown period plus precomputed neighbours (see periods.PeriodNavigator)
+        "navigator": periods.PeriodNavigator(
+            periods.period_for("day", datetime.date.today())
+        ),
+        # Custom range is picked in two steps: start date, then end date
+        "custom_pick": None,  # None | "start" | "end"
+        "custom_start": None,
+        # Keyset pagination of the transaction list: query args + cursor of the last row
+        "page_query": None,
+        "next_cursor": None,
+        # Multi-select (long press on a row): ids for the batch delete
+        "selected_ids": set(),
+        # Non-empty: the list shows full-text search results of the account instead of the period
+        "search_query": "",
     }
 
-    # --- Fetch User Accounts and Set Initial/Persisted State ---
-    user_accounts = []
-    initial_header_balance = "0.00 ₽" # Default if no accounts
-    selected_account_id_from_session = page.session.get("selected_account_id")
-    found_account_from_session = False
-
-    if user_id:
-        user_accounts = db_manager.get_accounts_by_user(user_id)
-        if user_accounts:
-            selected_account = None
-            # Try to find the account stored in the session
-            if selected_account_id_from_session:
-                selected_account = next(
-                    (acc for acc in user_accounts if acc["account_id"] == selected_account_id_from_session), None
-                )
-
-            if selected_account:
-                # Found a valid account from session
-                current_state["selected_account_id"] = selected_account["account_id"]
-                current_state["selected_account_currency"] = selected_account["currency_symbol"]
-                initial_header_balance = f"{selected_account['balance']:.2f} {selected_account['currency_symbol']}"
-                found_account_from_session = True
-                print(f"Restored selected account from session: {selected_account['account_id']}") # Debug log
-            else:
-                # Account from session not found or no session value, use the first account as default
-                if selected_account_id_from_session:
-                    page.session.remove("selected_account_id") # Clear invalid session ID
-                    print(f"Cleared invalid account ID {selected_account_id_from_session} from session.") # Debug log
-
-                first_account = user_accounts[0]
-                current_state["selected_account_id"] = first_account["account_id"]
-                current_state["selected_account_currency"] = first_account["currency_symbol"]
-                initial_header_balance = f"{first_account['balance']:.2f} {first_account['currency_symbol']}"
-                # Store the default selected account ID in the session
-                page.session.set("selected_account_id", first_account["account_id"])
-                print(f"Set default account and stored in session: {first_account['account_id']}") # Debug log
-
-        else: # User has no accounts
-             current_state["selected_account_id"] = None
-             current_state["selected_account_currency"] = "₽" # Or get default from config
-             initial_header_balance = "0.00 ₽"
-             if selected_account_id_from_session:
-                 page.session.remove("selected_account_id") # Clear session if no accounts exist
-
-    else: # No user_id
+    if not user_id:
         page.go("/login")
         # Return a valid View object even on redirect
         return ft.View("/home", [ft.Text("Перенаправление на страницу входа...")])
 
+    # Filled in place by load_accounts (handlers hold a reference to this list)
+    user_accounts: list[dict] = []
+
     # --- Helper Functions ---
-    def get_date_range(period_type: str, ref_date: datetime.date):
-        """Calculates start and end dates based on period type and reference date."""
-        start_date = ref_date
-        end_date = ref_date
-        display_str = ref_date.strftime("%d %B %Y")  # Default for day
-
-        if period_type == "day":
-            start_date = ref_date
-            end_date = ref_date
-            display_str = ref_date.strftime("%d %B %Y")
-        elif period_type == "week":
-            start_date = ref_date - datetime.timedelta(days=ref_date.weekday())
-            end_date = start_date + datetime.timedelta(days=6)
-            display_str = (
-                f"{start_date.strftime('%d %b')} - {end_date.strftime('%d %b %Y')}"
-            )
-        elif period_type == "month":
-            start_date = ref_date.replace(day=1)
-            end_date = (start_date + relativedelta(months=1)) - datetime.timedelta(
-                days=1
-            )
-            display_str = ref_date.strftime("%B %Y")
-        elif period_type == "year":
-            start_date = ref_date.replace(month=1, day=1)
-            end_date = ref_date.replace(month=12, day=31)
-            display_str = ref_date.strftime("%Y")
-        # Add 'custom' handling later if needed
+    def current_period() -> periods.Period:
+        return current_state["navigator"].current
 
-        return start_date, end_date, display_str
+    def show_period(period: periods.Period):
+        """Makes period the shown one; neighbours are precomputed around it."""
+        current_state["navigator"] = periods.PeriodNavigator(period)
+        update_transaction_display()
 
     def on_period_button_click(e, period: str):
-        """Handles clicks on Day, Week, Month, Year buttons."""
-        current_state["current_period_type"] = period
-        # Reset date to today when changing period type for simplicity,
-        # or implement more complex logic to keep the relative period.
-        current_state["current_date"] = datetime.date.today()
-        update_transaction_display()
+        """Handles clicks on Day, Week, Month, Quarter, Year and custom buttons."""
+        if period == "custom":
+            start_custom_pick()
+            return
+        # Keep the shown date when switching period type (today for custom)
+        current = current_period()
+        ref_date = current.start if current.kind != "custom" else datetime.date.today()
+        if current.contains(datetime.date.today()):
+            ref_date = datetime.date.today()
+        show_period(periods.period_for(period, ref_date))
 
     def on_date_nav_click(e, direction: int):
         """Handles clicks on the date navigation arrows."""
-        delta = None
-        period = current_state["current_period_type"]
-        if period == "day":
-            delta = datetime.timedelta(days=1)
-        elif period == "week":
-            delta = datetime.timedelta(weeks=1)
-        elif period == "month":
-            delta = relativedelta(months=1)
-        elif period == "year":
-            delta = relativedelta(years=1)
-
-        if delta:
-            # Ensure current_date is a date object before adding delta
-            if isinstance(current_state["current_date"], datetime.datetime):
-                current_state["current_date"] = current_state["current_date"].date()
-            current_state["current_date"] += delta * direction
-            update_transaction_display()
+        current_state["navigator"].move(direction)
+        update_transaction_display()
 
     # Add the on_tab_change handler
     def on_tab_change(e):
@@ -154,32 +124,53 @@ def HomeView(page: ft.Page):
         print(f"Tab changed to index: {new_index}")  # Debug log
         update_transaction_display()  # Refresh content for the new tab
 
+    def on_search_change(e):
+        """Typing is debounced by the refresh scheduler like the period buttons."""
+        current_state["search_query"] = (e.control.value or "").strip()
+        update_transaction_display()
+
     # --- Date Picker Logic ---
     def handle_date_picked(e):
-        """Updates the current_date state when a date is picked from the calendar."""
-        if date_picker.value:
-            # Convert datetime from picker to date
-            selected_date = date_picker.value.date()
-            print(f"Date picked: {selected_date}")
-            current_state["current_date"] = selected_date
-            update_transaction_display()
+        """Shows the period containing the picked date, or collects a custom range."""
+        if not date_picker.value:
+            current_state["custom_pick"] = None
+            return
+        # Convert datetime from picker to date
+        selected_date = date_picker.value.date()
+        print(f"Date picked: {selected_date}")
+        step = current_state["custom_pick"]
+        if step == "start":
+            current_state["custom_start"] = selected_date
+            current_state["custom_pick"] = "end"
+            pick_date(selected_date, help_text="Конец периода")
+        elif step == "end":
+            current_state["custom_pick"] = None
+            show_period(periods.custom_period(current_state["custom_start"], selected_date))
+        else:
+            show_period(periods.period_for(current_period().kind, selected_date))
         # No need to close manually, DatePicker closes on selection
 
-    def open_date_picker(e):
-        """Opens the date picker, setting its initial value."""
-        # Ensure current_date is a date object
-        current_ref_date = current_state["current_date"]
-        if isinstance(current_ref_date, datetime.datetime):
-            current_ref_date = current_ref_date.date()
-
+    def pick_date(initial: datetime.date, help_text: str = "Выберите дату"):
+        """Opens the date picker at initial."""
         # Convert date to datetime for the picker
-        date_picker.value = datetime.datetime.combine(
-            current_ref_date, datetime.time.min
-        )
+        date_picker.value = datetime.datetime.combine(initial, datetime.time.min)
+        date_picker.help_text = help_text
         date_picker.update()  # Ensure value is set before picking
         page.open(date_picker)  # Use page.open for DatePicker
         # date_picker.pick_date() # pick_date is for the old dialog-based picker
 
+    def start_custom_pick():
+        current_state["custom_pick"] = "start"
+        pick_date(current_period().start, help_text="Начало периода")
+
+    def open_date_picker(e):
+        """Opens the date picker (for a custom range, picks a new range)."""
+        if current_period().kind == "custom":
+            start_custom_pick()
+        else:
+            current_state["custom_pick"] = None
+            pick_date(current_period().start)
+
     # --- Date Picker Control ---
     date_picker = ft.DatePicker(
         first_date=datetime.datetime(2020, 1, 1),
@@ -187,7 +178,7 @@ def HomeView(page: ft.Page):
             year=datetime.datetime.now().year + 5
         ),
         on_change=handle_date_picked,
-        # current_date is set dynamically before opening
+        # value is set dynamically before opening (see pick_date)
         help_text="Выберите дату",
         cancel_text="Отмена",
         confirm_text="Выбрать",
@@ -196,9 +187,456 @@ def HomeView(page: ft.Page):
     page.overlay.append(date_picker)
     # --- End Date Picker Logic ---
 
-    def update_transaction_display():
+    # transaction_date is epoch seconds; rows come sorted by date, so the label
+    # cache formats each day once instead of parsing every row
+    day_label = datecodec.DayLabels("%d %b")  # e.g., 15 Jul
+
+    def build_transaction_tile(t: dict) -> ft.ListTile:
+        """Builds an empty list row for a transaction; fill_transaction_tile sets the values."""
+        return ft.ListTile(
+            # leading=ft.Icon(get_icon_by_name(t.get("category_icon", "Default"))), # Need category icons map
+            leading=ft.Icon(ft.icons.CATEGORY),  # Placeholder icon
+            title=ft.Text(),
+            subtitle=ft.Text(),
+            trailing=ft.Column(
+                [
+                    ft.Text(weight=ft.FontWeight.BOLD),
+                    ft.Text(size=10),
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+                horizontal_alignment=ft.CrossAxisAlignment.END,
+                spacing=2,
+            ),
+            selected_tile_color=ft.colors.with_opacity(0.15, ft.colors.WHITE),
+            on_click=lambda e, tid=t["transaction_id"]: on_transaction_click(e, tid),
+            on_long_press=lambda e, tid=t["transaction_id"]: toggle_selection(tid),
+        )
+
+    def fill_transaction_tile(tile: ft.ListTile, t: dict):
+        """Writes the transaction's fields into an existing row (only changed props are sent)."""
+        amount_text, date_text = tile.trailing.controls
+        tile.title.value = t.get("category_name", "N/A")
+        tile.subtitle.value = t.get("description", "")
+        if t["transaction_id"] is None:  # upcoming occurrence of a recurring rule
+            tile.subtitle.value = f"{tile.subtitle.value or ''} · по расписанию".lstrip(" ·")
+        tile.opacity = 0.5 if t["transaction_id"] is None else 1.0
+        amount_text.value = current_state["money_format"](t["amount"])
+        date_text.value = day_label(t["transaction_date"])
+        tile.data = t  # the edit dialog starts from the shown values
+        tile.selected = t["transaction_id"] in current_state["selected_ids"]
+
+    empty_placeholders = {}
+
+    def empty_placeholder(transaction_type: TransactionType) -> ft.Control:
+        """One placeholder per tab, so an empty period twice in a row sends nothing."""
+        if transaction_type not in empty_placeholders:
+            empty_placeholders[transaction_type] = ft.Container(
+                ft.Text(f"Нет {transaction_type.value} за этот период."),
+                alignment=ft.alignment.center,
+                padding=20,
+            )
+        return empty_placeholders[transaction_type]
+
+    # --- Edit / delete ---
+    def current_minor_units() -> int:
+        account = next(
+            (acc for acc in user_accounts if acc["account_id"] == current_state["selected_account_id"]),
+            None,
+        )
+        return account["currency_minor_units"] if account else money.DEFAULT_MINOR_UNITS
+
+    def after_transactions_changed():
+        """Same period, new data: the balance was shifted in the DB, re-render."""
+        refresh_scheduler.invalidate()
+        update_transaction_display(delay=0)
+        page.run_task(load_net_worth)
+
+    def update_selection_bar() -> list:
+        count = len(current_state["selected_ids"])
+        if not selection_bar.current:
+            return []
+        selection_bar.current.visible = count > 0
+        selection_count_text.current.value = f"Выбрано: {count}"
+        return [selection_bar.current]
+
+    def toggle_selection(transaction_id: int | None):
+        if transaction_id is None:
+            return  # forecast rows are not stored, nothing to delete
+        selected = current_state["selected_ids"]
+        selected.symmetric_difference_update({transaction_id})
+        tile = transaction_rows.get(transaction_id)
+        if tile:
+            tile.selected = transaction_id in selected
+        refresh_scheduler.update(tile, *update_selection_bar())
+
+    def clear_selection() -> list:
+        """Unselects all rows; returns the controls to push."""
+        changed = []
+        for transaction_id in current_state["selected_ids"]:
+            tile = transaction_rows.get(transaction_id)
+            if tile:
+                tile.selected = False
+                changed.append(tile)
+        current_state["selected_ids"].clear()
+        return changed + update_selection_bar()
+
+    def on_transaction_click(e, transaction_id: int | None):
+        # while selecting, a tap adds/removes the row instead of opening it
+        if current_state["selected_ids"]:
+            toggle_selection(transaction_id)
+        elif transaction_id is None:
+            open_occurrence_dialog(e.control.data)
+        else:
+            open_edit_dialog(e.control.data)
+
+    def stop_rule_handler(rule_id: int, dialog: ft.AlertDialog):
+        """on_click for "Не повторять": stops the rule and closes its dialog."""
+        async def stop(e):
+            await async_db.stop_recurring_rule(rule_id, user_id)
+            page.close(dialog)
+            after_transactions_changed()  # its forecast rows disappear
+        return stop
+
+    def open_occurrence_dialog(t: dict):
+        """Upcoming occurrence: nothing to edit yet, the rule can be stopped."""
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(t.get("category_name") or "Повторяющаяся операция"),
+            content=ft.Text(
+                f"{current_state['money_format'](t['amount'])} "
+                f"будет добавлено {day_label(t['transaction_date'])} по расписанию."
+            ),
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        dialog.actions = [
+            ft.TextButton(
+                "Не повторять",
+                on_click=stop_rule_handler(t["rule_id"], dialog),
+                style=ft.ButtonStyle(color=ft.colors.RED),
+            ),
+            ft.TextButton("Закрыть", on_click=lambda e: page.close(dialog)),
+        ]
+        page.open(dialog)
+
+    def open_edit_dialog(t: dict):
+        minor_units = current_minor_units()
+        amount_field = ft.TextField(
+            label="Сумма",
+            value=money.to_plain(t["amount"], minor_units),
+            keyboard_type=ft.KeyboardType.NUMBER,
+        )
+        description_field = ft.TextField(label="Описание", value=t.get("description") or "")
+        error_text = ft.Text(color=ft.colors.RED_ACCENT_700)
+
+        def show_error(message: str):
+            error_text.value = message
+            error_text.update()
+
+        async def save(e):
+            try:
+                amount = money.parse(amount_field.value, minor_units)
+                if amount <= 0:
+                    raise ValueError("Сумма должна быть больше нуля.")
+            except ValueError as ve:
+                show_error(f"Неверная сумма: {ve}")
+                return
+            # only what was edited: a description change leaves the balance alone
+            changes = {}
+            if amount != t["amount"]:
+                changes["amount"] = amount
+            if description_field.value != (t.get("description") or ""):
+                changes["description"] = description_field.value
+            if changes:
+                success, message = await async_db.update_transaction(
+                    t["transaction_id"], user_id, **changes
+                )
+                if not success:
+                    show_error(f"Ошибка сохранения: {message}")
+                    return
+                after_transactions_changed()
+            page.close(dialog)
+
+        async def delete(e):
+            success, message = await async_db.delete_transaction(t["transaction_id"], user_id)
+            if not success:
+                show_error(f"Ошибка удаления: {message}")
+                return
+            page.close(dialog)
+            after_transactions_changed()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(t.get("category_name", "Транзакция")),
+            content=ft.Column(
+                [amount_field, description_field, error_text], tight=True, spacing=10
+            ),
+            actions=[
+                ft.TextButton("Удалить", on_click=delete, style=ft.ButtonStyle(color=ft.colors.RED)),
+                ft.TextButton("Отмена", on_click=lambda e: page.close(dialog)),
+                ft.TextButton("Сохранить", on_click=save),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        if t.get("rule_id"):
+            # created by a recurring rule: stopping keeps this and earlier occurrences
+            dialog.actions.insert(
+                1,
+                ft.TextButton(
+                    "Не повторять", on_click=stop_rule_handler(t["rule_id"], dialog)
+                ),
+            )
+        page.open(dialog)
+
+    def confirm_delete_selected(e):
+        count = len(current_state["selected_ids"])
+
+        async def execute_delete(e):
+            page.close(dialog)
+            ids = list(current_state["selected_ids"])
+            try:
+                deleted = await async_db.delete_transactions(ids, user_id)
+                print(f"Deleted {deleted} transactions.")
+            except Exception as ex:
+                print(f"Error deleting transactions: {ex}")
+            refresh_scheduler.update(*clear_selection())
+            after_transactions_changed()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Подтвердите удаление"),
+            content=ft.Text(f"Удалить выбранные транзакции ({count})?"),
+            actions=[
+                ft.TextButton("Отмена", on_click=lambda e: page.close(dialog)),
+                ft.TextButton("Удалить", on_click=execute_delete, style=ft.ButtonStyle(color=ft.colors.RED)),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        page.open(dialog)
+
+    # --- Budgets ---
+    def build_budget_row(b: dict) -> ft.Container:
+        return ft.Container(
+            ft.Column(
+                [
+                    ft.Row([ft.Text(size=12, expand=True), ft.Text(size=12)]),
+                    ft.ProgressBar(height=6, border_radius=3),
+                ],
+                spacing=2,
+            ),
+            on_click=lambda e: open_budget_dialog(e.control.data),
+        )
+
+    def fill_budget_row(row: ft.Container, b: dict):
+        (name_text, amount_text), bar = row.content.controls[0].controls, row.content.controls[1]
+        fmt = current_state["money_format"]
+        period = "месяц" if b["period"] == "month" else "неделя"
+        name_text.value = f"{b['category_name'] or 'Без категории'} · {period}"
+        amount_text.value = f"{fmt(b['spent'])} / {fmt(b['amount_limit'])}"
+        bar.value = min(b["spent"] / b["amount_limit"], 1.0)
+        if b["spent"] >= b["amount_limit"]:
+            bar.color = ft.colors.RED_400
+        elif b["spent"] * 100 >= b["amount_limit"] * b["alert_percent"]:
+            bar.color = ft.colors.ORANGE_400
+        else:
+            bar.color = ft.colors.GREEN_400
+        row.data = b
+
+    async def refresh_budgets() -> list:
+        """All bars from one indexed read; progress itself is kept up to date by DB triggers."""
+        if not budgets_column.current or not current_state["selected_account_id"]:
+            return []
+        status = await async_db.get_budget_status(user_id, current_state["selected_account_id"])
+        return budget_rows.sync(status)
+
+    def open_budget_dialog(b: dict | None, categories: list | None = None):
+        """New budget (b is None, categories to pick from) or edit/delete an existing one."""
+        minor_units = current_minor_units()
+        category_field = ft.Dropdown(
+            label="Категория",
+            options=[
+                ft.dropdown.Option(key=str(c["category_id"]), text=c["name"])
+                for c in categories or []
+            ],
+            visible=b is None,
+        )
+        period_field = ft.Dropdown(
+            label="Период",
+            value="month",
+            options=[
+                ft.dropdown.Option(key="month", text="Месяц"),
+                ft.dropdown.Option(key="week", text="Неделя"),
+            ],
+            visible=b is None,
+        )
+        limit_field = ft.TextField(
+            label="Лимит",
+            value=money.to_plain(b["amount_limit"], minor_units) if b else "",
+            keyboard_type=ft.KeyboardType.NUMBER,
+        )
+        percent_field = ft.TextField(
+            label="Предупредить при, %",
+            value=str(b["alert_percent"] if b else 80),
+            keyboard_type=ft.KeyboardType.NUMBER,
+        )
+        error_text = ft.Text(color=ft.colors.RED_ACCENT_700)
+
+        def show_error(message: str):
+            error_text.value = message
+            error_text.update()
+
+        async def save(e):
+            try:
+                limit = money.parse(limit_field.value, minor_units)
+                percent = int(percent_field.value)
+                if limit <= 0 or not 1 <= percent <= 100:
+                    raise ValueError
+            except ValueError:
+                show_error("Лимит — положительная сумма, порог — от 1 до 100 %.")
+                return
+            if b:
+                await async_db.update_budget(b["budget_id"], user_id, limit, percent)
+            else:
+                if not category_field.value:
+                    show_error("Выберите категорию.")
+                    return
+                budget_id, message = await async_db.add_budget(
+                    user_id,
+                    current_state["selected_account_id"],
+                    int(category_field.value),
+                    limit,
+                    period_field.value,
+                    percent,
+                )
+                if budget_id is None:
+                    show_error(message)
+                    return
+            page.close(dialog)
+            refresh_scheduler.update(*await refresh_budgets())
+
+        async def delete(e):
+            await async_db.delete_budget(b["budget_id"], user_id)
+            page.close(dialog)
+            refresh_scheduler.update(*await refresh_budgets())
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(b["category_name"] if b else "Новый бюджет"),
+            content=ft.Column(
+                [category_field, period_field, limit_field, percent_field, error_text],
+                tight=True,
+                spacing=10,
+            ),
+            actions=[
+                ft.TextButton("Отмена", on_click=lambda e: page.close(dialog)),
+                ft.TextButton("Сохранить", on_click=save),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        if b:
+            dialog.actions.insert(
+                0,
+                ft.TextButton("Удалить", on_click=delete, style=ft.ButtonStyle(color=ft.colors.RED)),
+            )
+        page.open(dialog)
+
+    async def add_budget_clicked(e):
+        if not current_state["selected_account_id"]:
+            return
+        categories = await async_db.get_categories_by_user_and_type(
+            user_id, TransactionType.expense
+        )
+        open_budget_dialog(None, categories)
+
+    def on_budget_alert(alert: dict):
+        """
+        Called by the DB after the commit of a write that crossed a budget
+        threshold (no polling); may run on a DB worker thread.
+        """
+        if alert["user_id"] != user_id:
+            return
+        today = datetime.date.today()
+        current_start = (
+            today.replace(day=1) if alert["period"] == "month"
+            else today - datetime.timedelta(days=today.weekday())
+        )
+        if alert["period_start"] != current_start.isoformat():
+            return  # an edit moved spending in a past period
+        page.run_task(show_budget_alert, alert)
+
+    async def show_budget_alert(alert: dict):
+        percent = alert["spent"] * 100 // alert["amount_limit"]
+        name = alert["category_name"] or "Без категории"
+        if alert["level"] == "exceeded":
+            text = f"Бюджет «{name}» превышен: {percent}%"
+        else:
+            text = f"Бюджет «{name}»: израсходовано {percent}%"
+        page.open(ft.SnackBar(ft.Text(text)))
+
+    # one subscription per page: a rebuilt HomeView replaces the previous one
+    db_manager.subscribe_budget_alerts(("home", id(page)), on_budget_alert)
+
+    no_results_placeholder = ft.Container(
+        ft.Text("Ничего не найдено."), alignment=ft.alignment.center, padding=20
+    )
+
+    # DB work runs off the event loop; a refresh cancels a page load in flight
+    load_more_task = LatestTask(page)
+    # Neighbouring periods / the other tab are loaded into the query cache in the background
+    prefetcher = Prefetcher(page)
+
+    async def load_more_transactions():
+        """Appends the next page of transactions (keyset cursor) to the list."""
+        cursor = current_state["next_cursor"]
+        if cursor is None or not current_state["page_query"]:
+            return
+        current_state["next_cursor"] = None  # guard against re-entry while loading
+        page_query = current_state["page_query"]
+        load_page = (
+            async_db.search_transactions if "query" in page_query
+            else async_db.get_transactions_page
+        )
+        rows, next_cursor = await load_page(
+            **page_query, cursor=cursor, limit=TRANSACTIONS_PAGE_SIZE
+        )
+        current_state["next_cursor"] = next_cursor
+        if rows and transactions_list_view.current:
+            refresh_scheduler.update(*transaction_rows.append(rows))
+
+    def on_transactions_scroll(e: ft.OnScrollEvent):
+        """Loads the next page when the list is scrolled close to the bottom."""
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        if current_state["next_cursor"] is None:
+            return  # nothing more to load, or a load/refresh is already running
+        if e.pixels >= e.max_scroll_extent - LOAD_MORE_THRESHOLD_PX:
+            load_more_task.run(load_more_transactions)
+
+    def current_display_key():
+        """What the list shows: same key as the last render means nothing to fetch."""
+        return (
+            current_state["selected_account_id"],
+            current_state["current_tab_index"],
+            current_period(),
+            current_state["search_query"],
+        )
+
+    def update_transaction_display(delay: float | None = None):
+        """
+        Schedules a refresh of the list. Rapid clicks are debounced and coalesced
+        into a single query; a state equal to the rendered one is not refetched.
+        """
+        refresh_scheduler.request(delay)
+
+    async def refresh_transactions():
         """Fetches and displays transactions based on current state."""
         print(f"Updating display. State: {current_state}")  # Debug log
+        # Loaded pages belong to the old state: no load-more until this render lands
+        load_more_task.cancel()
+        prefetcher.cancel()  # the render gets the DB pool first
+        # a selection belongs to the list being replaced
+        unselected = clear_selection() if current_state["selected_ids"] else []
+        current_state["page_query"] = None
+        current_state["next_cursor"] = None
         if not current_state["selected_account_id"]:
             print("No account selected, skipping update.")
             # Clear list and summary if needed
@@ -206,9 +644,7 @@ def HomeView(page: ft.Page):
                 transactions_list_view.current.controls.clear()
                 transactions_list_view.current.controls.append(ft.Text("Выберите счет"))
             if summary_text.current:
-                summary_text.current.value = (
-                    f"0.00 {current_state['selected_account_currency']}"
-                )
+                summary_text.current.value = current_state["money_format"](0)
             if date_navigator_text.current:
                 date_navigator_text.current.value = "Нет данных"
             # Update button styles even if no account selected
@@ -216,6 +652,7 @@ def HomeView(page: ft.Page):
                 "day": day_button,
                 "week": week_button,
                 "month": month_button,
+                "quarter": quarter_button,
                 "year": year_button,
                 "custom": period_button,
             }
@@ -224,12 +661,16 @@ def HomeView(page: ft.Page):
                     button_ref.current.style = ft.ButtonStyle(
                         color=(
                             ft.colors.WHITE
-                            if period == current_state["current_period_type"]
+                            if period == current_period().kind
                             else ft.colors.with_opacity(0.5, ft.colors.WHITE)
                         )
                     )
 
-            page.update()
+            refresh_scheduler.update()
+            return
+
+        if current_state["search_query"]:
+            await refresh_search_results(unselected)
             return
 
         # Determine transaction type based on tab
@@ -239,84 +680,75 @@ def HomeView(page: ft.Page):
             else TransactionType.income
         )
 
-        # Ensure current_date is a date object
-        ref_date = current_state["current_date"]
-        if isinstance(ref_date, datetime.datetime):
-            ref_date = ref_date.date()
-            current_state["current_date"] = ref_date  # Update state if needed
-
-        # Calculate date range
-        start_date, end_date, display_str = get_date_range(
-            current_state["current_period_type"], ref_date
-        )
+        # Range and label come precomputed from the navigator
+        period = current_period()
+        start_date, end_date = period.start, period.end
 
         # Update date navigator text
         if date_navigator_text.current:
-            date_navigator_text.current.value = display_str
+            date_navigator_text.current.value = period.label
+
+        # Recurring rules: occurrences due by the end of the shown period are
+        # created first (one batch; usually nothing is due and this is a single lookup)
+        await async_db.materialize_recurring(through=end_date, user_id=user_id)
 
-        # Fetch data from DB
-        # Assuming get_transactions_summary returns a tuple (list_of_transactions, total_sum)
-        transactions, total_sum = db_manager.get_transactions_summary(
+        # Fetch the first page and the period total from DB
+        page_query = dict(
             user_id=user_id,
             account_id=current_state["selected_account_id"],
             transaction_type=transaction_type,
             start_date=start_date,
             end_date=end_date,
         )
+        transactions, total_sum = await async_db.get_transactions_summary(
+            **page_query, limit=TRANSACTIONS_PAGE_SIZE
+        )
+        current_state["page_query"] = page_query
+        current_state["next_cursor"] = db_manager.page_cursor(
+            transactions, TRANSACTIONS_PAGE_SIZE
+        )
 
         # Update summary text
         if summary_text.current:
-            summary_text.current.value = (
-                f"{total_sum:.2f} {current_state['selected_account_currency']}"
+            summary_text.current.value = current_state["money_format"](total_sum)
+
+        # Header balance: current for the ongoing period, end-of-period for past ones
+        as_of = end_date if end_date < datetime.date.today() else None
+        balance = await async_db.get_balance_as_of(
+            current_state["selected_account_id"], user_id, as_of
+        )
+        if header_balance_text.current and balance is not None:
+            header_balance_text.current.value = current_state["money_format"](balance)
+
+        # Forecast: upcoming occurrences of recurring rules, not stored in the DB
+        upcoming = []
+        if end_date > datetime.date.today():
+            upcoming = await async_db.get_upcoming_occurrences(
+                user_id, start_date, end_date,
+                account_id=current_state["selected_account_id"],
+                transaction_type=transaction_type,
             )
 
-        # Update transaction list view
+        # Update transaction list view: rows are reused by transaction_id
+        changed_rows = []
         if transactions_list_view.current:
-            transactions_list_view.current.controls.clear()
-            if transactions:
-                for t in transactions:
-                    # Format date nicely for display
-                    t_date = datetime.datetime.fromisoformat(t["transaction_date"])
-                    date_str = t_date.strftime("%d %b")  # e.g., 15 Jul
-                    transactions_list_view.current.controls.append(
-                        ft.ListTile(
-                            # leading=ft.Icon(get_icon_by_name(t.get("category_icon", "Default"))), # Need category icons map
-                            leading=ft.Icon(ft.icons.CATEGORY),  # Placeholder icon
-                            title=ft.Text(t.get("category_name", "N/A")),
-                            subtitle=ft.Text(t.get("description", "")),
-                            trailing=ft.Column(
-                                [
-                                    ft.Text(
-                                        f"{t['amount']:.2f} {current_state['selected_account_currency']}",
-                                        weight=ft.FontWeight.BOLD,
-                                    ),
-                                    ft.Text(date_str, size=10),
-                                ],
-                                alignment=ft.MainAxisAlignment.CENTER,
-                                horizontal_alignment=ft.CrossAxisAlignment.END,
-                                spacing=2,
-                            ),
-                            # Add on_click handler for editing/deleting transactions later
-                            # on_click=lambda e, tid=t['transaction_id']: edit_transaction(tid)
-                        )
-                    )
-            else:
-                transactions_list_view.current.controls.append(
-                    ft.Container(
-                        ft.Text(f"Нет {transaction_type.value} за этот период."),
-                        alignment=ft.alignment.center,
-                        padding=20,
-                    )
-                )
+            changed_rows = transaction_rows.sync(
+                upcoming + transactions, placeholder=empty_placeholder(transaction_type)
+            )
 
-        # Update progress bar (add logic later if needed)
-        # if progress_bar.current: progress_bar.current.value = ...
+        # Category chart: a handful of pre-aggregated rows, never the raw list
+        top, other_total = await async_db.get_top_categories(
+            **page_query, n=CHART_TOP_CATEGORIES
+        )
+        update_category_chart(top, other_total)
+        changed_budgets = await refresh_budgets()
 
         # Update button styles
         all_period_buttons = {
             "day": day_button,
             "week": week_button,
             "month": month_button,
+            "quarter": quarter_button,
             "year": year_button,
             "custom": period_button,
         }
@@ -325,21 +757,166 @@ def HomeView(page: ft.Page):
                 button_ref.current.style = ft.ButtonStyle(
                     color=(
                         ft.colors.WHITE
-                        if period == current_state["current_period_type"]
+                        if period == current_period().kind
                         else ft.colors.with_opacity(0.5, ft.colors.WHITE)
                     )
                 )
 
-        page.update()
+        # Push only the header, navigator, buttons and changed rows, not the page
+        refresh_scheduler.update(
+            header_balance_text.current,
+            summary_text.current,
+            date_navigator_text.current,
+            *(b.current for b in all_period_buttons.values()),
+            chart_row.current,
+            *changed_rows,
+            *unselected,
+            *changed_budgets,
+        )
+        schedule_prefetch(transaction_type)
+
+    async def refresh_search_results(unselected: list):
+        """Search results of the selected account, newest first, paged like the period list."""
+        page_query = dict(
+            user_id=user_id,
+            query=current_state["search_query"],
+            filters={"account_id": current_state["selected_account_id"]},
+        )
+        rows, next_cursor = await async_db.search_transactions(
+            **page_query, limit=TRANSACTIONS_PAGE_SIZE
+        )
+        current_state["page_query"] = page_query
+        current_state["next_cursor"] = next_cursor
+        changed_rows = []
+        if transactions_list_view.current:
+            changed_rows = transaction_rows.sync(rows, placeholder=no_results_placeholder)
+        refresh_scheduler.update(*changed_rows, *unselected)
+
+    def update_category_chart(top: list, other_total: int):
+        """Fills the pie chart and its legend from get_top_categories."""
+        if not chart_row.current:
+            return
+        slices = [
+            (c["category_name"] or "Без категории", c["total"], CHART_COLORS[i % len(CHART_COLORS)])
+            for i, c in enumerate(top)
+        ]
+        if other_total > 0:
+            slices.append(("Другое", other_total, CHART_OTHER_COLOR))
+        total = sum(value for _, value, _ in slices)
+        chart_row.current.visible = total > 0
+        category_chart.current.sections = [
+            ft.PieChartSection(value, color=color, radius=18) for _, value, color in slices
+        ]
+        category_legend.current.controls = [
+            ft.Row(
+                [
+                    ft.Container(width=8, height=8, bgcolor=color, border_radius=4),
+                    ft.Text(f"{name} · {value * 100 // total}%", size=11),
+                ],
+                spacing=6,
+            )
+            for name, value, color in slices
+        ]
+
+    def schedule_prefetch(transaction_type: TransactionType):
+        """Warms the cache for the arrows (nearest first) and the other tab."""
+        settings = prefetcher.settings
+        targets = [
+            (period, transaction_type)
+            for period in current_state["navigator"].neighbours(settings.neighbours)
+        ]
+        if settings.other_tab:
+            other = (
+                TransactionType.income
+                if transaction_type == TransactionType.expense
+                else TransactionType.expense
+            )
+            # the tab switch is as likely as an arrow press: after the nearest neighbours
+            targets.insert(min(2, len(targets)), (current_period(), other))
+
+        account_id = current_state["selected_account_id"]
+        prefetcher.run([
+            functools.partial(
+                async_db.get_transactions_summary,
+                user_id=user_id,
+                account_id=account_id,
+                transaction_type=t_type,
+                start_date=period.start,
+                end_date=period.end,
+                limit=TRANSACTIONS_PAGE_SIZE,
+            )
+            for period, t_type in targets
+        ])
+
+    refresh_scheduler = RefreshScheduler(
+        page, render=refresh_transactions, key=current_display_key
+    )
+
+    async def load_net_worth():
+        """Consolidated balance of all accounts (converted in SQL), shown for multi-currency users."""
+        consolidated = await async_db.get_consolidated_balance(user_id)
+        text = net_worth_text.current
+        if not text or len(consolidated["by_currency"]) < 2:
+            return
+        fmt = money.formatter(consolidated["symbol"], consolidated["minor_units"])
+        text.value = f"Всего: {fmt(consolidated['total'])}"
+        if consolidated["missing"]:
+            text.value += f" (нет курса: {', '.join(consolidated['missing'])})"
+        text.visible = True
+        refresh_scheduler.update(text)
+
+    # --- Accounts ---
+    async def load_accounts():
+        """
+        Fetches the accounts off the Flet thread, restores the selected one from
+        the session (or picks the first) and only then renders the period.
+        """
+        user_accounts[:] = await async_db.get_accounts_by_user(user_id)
+        selected_account_id_from_session = page.session.get("selected_account_id")
+        selected_account = next(
+            (acc for acc in user_accounts if acc["account_id"] == selected_account_id_from_session),
+            None,
+        )
+        if selected_account:
+            print(f"Restored selected account from session: {selected_account['account_id']}") # Debug log
+        else:
+            if selected_account_id_from_session:
+                page.session.remove("selected_account_id") # Clear invalid session ID
+                print(f"Cleared invalid account ID {selected_account_id_from_session} from session.") # Debug log
+            if user_accounts:
+                selected_account = user_accounts[0]
+                # Store the default selected account ID in the session
+                page.session.set("selected_account_id", selected_account["account_id"])
+                print(f"Set default account and stored in session: {selected_account['account_id']}") # Debug log
+
+        if selected_account:
+            current_state["selected_account_id"] = selected_account["account_id"]
+            current_state["money_format"] = account_formatter(selected_account)
+        else: # User has no accounts
+            current_state["selected_account_id"] = None
+            current_state["money_format"] = money.formatter("₽") # Or get default from config
+        account_selector_menu.items = account_menu_items()
+        header_balance_text.current.value = current_state["money_format"](
+            selected_account["balance"] if selected_account else 0
+        )
+        refresh_scheduler.update(account_selector_menu, header_balance_text.current)
+
+        print("Performing initial transaction display update...")
+        update_transaction_display(delay=0)  # nothing to debounce on first load
+        await load_net_worth()
 
     # --- Event Handlers ---
-    def logout_clicked(e):
+    async def logout_clicked(e):
         """
         Выход из аккаунта, удаление сессии и токена.
         """
+        refresh_scheduler.cancel()
+        load_more_task.cancel()
+        prefetcher.cancel()
+        db_manager.unsubscribe_budget_alerts(("home", id(page)))
         token = page.session.get("session_token")
         if token:
-            db_manager.delete_session(token)
+            await async_db.delete_session(token)
             page.client_storage.remove("session_token")
             print("Persistent session token removed from DB and local storage.")
         page.session.clear()
@@ -368,18 +945,15 @@ def HomeView(page: ft.Page):
         )
 
         if selected_account:
+            # Prefetched periods belong to the previous account
+            prefetcher.cancel()
             # Update state
             current_state["selected_account_id"] = new_account_id
-            current_state["selected_account_currency"] = selected_account[
-                "currency_symbol"
-            ]
+            current_state["money_format"] = account_formatter(selected_account)
             # --- Store selected account ID in session ---
             page.session.set("selected_account_id", new_account_id)
             # --- End Store selected account ID in session ---
-
-            # Update the header text directly via Ref
-            if header_balance_text.current:
-                header_balance_text.current.value = f"{selected_account['balance']:.2f} {selected_account['currency_symbol']}"
+            # The refresh sets the header balance (as of the shown period)
 
             print(
                 f"Account changed to: {new_account_id}. Stored in session. Triggering display update."
@@ -445,6 +1019,18 @@ def HomeView(page: ft.Page):
 
     # --- UI Components ---
 
+    def account_menu_items() -> list[ft.PopupMenuItem]:
+        if not user_accounts:
+            return [ft.PopupMenuItem(text="Нет счетов", disabled=True)]
+        return [
+            ft.PopupMenuItem(
+                data=acc["account_id"],  # Use data to pass the ID
+                text=f"{acc['name']} ({account_formatter(acc)(acc['balance'])})",
+                on_click=account_selected_from_menu,
+            )
+            for acc in user_accounts
+        ]
+
     # Header Account Selector (PopupMenuButton)
     account_selector_menu = ft.PopupMenuButton(
         # Content is the clickable part (Icon + Text + Arrow)
@@ -464,18 +1050,7 @@ def HomeView(page: ft.Page):
             # height=30, # Adjust as needed
             # wrap=False, # Prevent wrapping
         ),
-        items=(
-            [
-                ft.PopupMenuItem(
-                    data=acc["account_id"],  # Use data to pass the ID
-                    text=f"{acc['name']} ({acc['balance']:.2f} {acc['currency_symbol']})",
-                    on_click=account_selected_from_menu,
-                )
-                for acc in user_accounts
-            ]
-            if user_accounts
-            else [ft.PopupMenuItem(text="Нет счетов", disabled=True)]
-        ),
+        items=[],  # filled by load_accounts
         tooltip="Выбрать счет",
     )
 
@@ -485,7 +1060,7 @@ def HomeView(page: ft.Page):
             account_selector_menu,
             ft.Text(
                 ref=header_balance_text,
-                value=initial_header_balance,  # Use the correctly initialized value
+                value="",  # set by load_accounts
                 size=20,
                 weight=ft.FontWeight.BOLD,
             ),
@@ -495,6 +1070,13 @@ def HomeView(page: ft.Page):
         spacing=10,
     )
 
+    net_worth_display = ft.Text(
+        ref=net_worth_text,
+        size=12,
+        color=ft.colors.with_opacity(0.7, ft.colors.WHITE),
+        visible=False,
+    )
+
     # Period Buttons
     period_buttons_row = ft.Row(
         [
@@ -520,6 +1102,14 @@ def HomeView(page: ft.Page):
                 on_click=lambda e: on_period_button_click(e, "month"),
                 style=ft.ButtonStyle(color=ft.colors.WHITE),  # Default selected
             ),
+            ft.TextButton(
+                ref=quarter_button,
+                text="Квартал",
+                on_click=lambda e: on_period_button_click(e, "quarter"),
+                style=ft.ButtonStyle(
+                    color=ft.colors.with_opacity(0.5, ft.colors.WHITE)
+                ),  # Initial style
+            ),
             ft.TextButton(
                 ref=year_button,
                 text="Год",
@@ -528,7 +1118,14 @@ def HomeView(page: ft.Page):
                     color=ft.colors.with_opacity(0.5, ft.colors.WHITE)
                 ),  # Initial style
             ),
-            # ft.TextButton(ref=period_button, text="Период", on_click=lambda e: on_period_button_click(e, "custom")), # Add later
+            ft.TextButton(
+                ref=period_button,
+                text="Период",
+                on_click=lambda e: on_period_button_click(e, "custom"),
+                style=ft.ButtonStyle(
+                    color=ft.colors.with_opacity(0.5, ft.colors.WHITE)
+                ),  # Initial style
+            ),
         ],
         alignment=ft.MainAxisAlignment.SPACE_EVENLY,
     )
@@ -581,6 +1178,51 @@ def HomeView(page: ft.Page):
         # color=ft.colors.WHITE,
     )
 
+    # Category breakdown of the shown period (hidden when the period is empty)
+    category_chart_display = ft.Row(
+        [
+            ft.PieChart(
+                ref=category_chart,
+                sections=[],
+                sections_space=1,
+                center_space_radius=20,
+                width=90,
+                height=90,
+            ),
+            ft.Column(ref=category_legend, spacing=2),
+        ],
+        ref=chart_row,
+        visible=False,
+        alignment=ft.MainAxisAlignment.CENTER,
+        spacing=20,
+    )
+
+    # Budgets of the selected account: header with "+", then a bar per budget
+    budgets_display = ft.Column(
+        [
+            ft.Row(
+                [
+                    ft.Text("Бюджеты", size=12, color=ft.colors.with_opacity(0.7, ft.colors.WHITE)),
+                    ft.IconButton(
+                        icon=ft.icons.ADD,
+                        icon_size=16,
+                        tooltip="Добавить бюджет",
+                        on_click=add_budget_clicked,
+                    ),
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            ft.Column(ref=budgets_column, spacing=6),
+        ],
+        spacing=0,
+    )
+    budget_rows = KeyedList(
+        budgets_display.controls[1],
+        key=lambda b: b["budget_id"],
+        create=build_budget_row,
+        fill=fill_budget_row,
+    )
+
     # Tabs for Expenses/Income
     tabs = ft.Tabs(
         ref=tabs_control,
@@ -599,9 +1241,19 @@ def HomeView(page: ft.Page):
         expand=True,
         spacing=5,
         padding=10,
-        auto_scroll=True,
+        # auto_scroll would jump to the bottom and pull in every page at once
+        auto_scroll=False,
+        on_scroll=on_transactions_scroll,
+        on_scroll_interval=100,
         controls=[ft.Text("Загрузка транзакций...")],  # Initial placeholder
     )
+    transaction_rows = KeyedList(
+        transaction_list,
+        # forecast rows have no transaction_id yet: (rule_id, occurrence number)
+        key=lambda t: t["transaction_id"] or t["occurrence"],
+        create=build_transaction_tile,
+        fill=fill_transaction_tile,
+    )
 
     # --- Initial Data Load ---
     # Call update_transaction_display once after the UI is built
@@ -647,6 +1299,7 @@ def HomeView(page: ft.Page):
                     [
                         # Balance and Account Selector
                         header_balance_display,
+                        net_worth_display,
                         ft.Divider(
                             height=10,
                             # Change divider color to be visible on dark background
@@ -665,6 +1318,8 @@ def HomeView(page: ft.Page):
                         ),
                         # Summary (Total for period)
                         summary_display,
+                        category_chart_display,
+                        budgets_display,
                         # Tabs Container
                         ft.Container(
                             tabs, # The ft.Tabs control is already defined with expand=True
@@ -679,6 +1334,35 @@ def HomeView(page: ft.Page):
                     horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 ),
             ),
+            # Full-text search over descriptions and categories of the account
+            ft.Container(
+                ft.TextField(
+                    hint_text="Поиск по описанию и категории",
+                    prefix_icon=ft.icons.SEARCH,
+                    dense=True,
+                    on_change=on_search_change,
+                ),
+                padding=ft.padding.symmetric(horizontal=15),
+            ),
+            # Batch actions for multi-selected transactions
+            ft.Row(
+                [
+                    ft.Text(ref=selection_count_text),
+                    ft.TextButton(
+                        "Отмена",
+                        on_click=lambda e: refresh_scheduler.update(*clear_selection()),
+                    ),
+                    ft.ElevatedButton(
+                        "Удалить",
+                        on_click=confirm_delete_selected,
+                        color=ft.colors.WHITE,
+                        bgcolor=ft.colors.RED_700,
+                    ),
+                ],
+                ref=selection_bar,
+                visible=False,
+                alignment=ft.MainAxisAlignment.END,
+            ),
             # Transaction List Area (takes remaining space)
             ft.Container(
                 transaction_list,
@@ -707,18 +1391,9 @@ def HomeView(page: ft.Page):
         bgcolor=ft.colors.BLACK,
     )
 
-    # --- Trigger Initial Update ---
-    # Ensure the page is ready before updating
-    def initial_load(e=None):
-        print("Performing initial transaction display update...")
-        update_transaction_display()
-
-    # Schedule the initial load slightly after the view is potentially rendered
-    # Using page.run_task or similar might be more robust if available,
-    # but a simple call here often works for initial setup.
-    # Alternatively, Flet might have a specific lifecycle hook for this.
-    # For now, let's call it directly. Consider page.on_load if issues arise.
-    initial_load()
+    # --- Trigger Initial Load ---
+    # Accounts come from the DB pool; the first render is scheduled once they arrive
+    page.run_task(load_accounts)
 
     return view
 
@@ -1,5 +1,6 @@
 import flet as ft
 from db import db_manager
+from async_db import async_db
 
 
 def LoginView(page: ft.Page):
@@ -13,8 +14,14 @@ def LoginView(page: ft.Page):
     )
     remember_me_checkbox = ft.Checkbox(label="Запомнить меня", value=False, width=300)
     error_text = ft.Text(value="", color=ft.colors.RED)
+    progress_ring = ft.ProgressRing(width=24, height=24, visible=False)
 
-    def login_clicked(e):
+    def set_busy(busy: bool):
+        progress_ring.visible = busy
+        login_button.disabled = busy
+        page.update()
+
+    async def login_clicked(e):
         """
         Вход в аккаунт пользователя
         """
@@ -28,7 +35,12 @@ def LoginView(page: ft.Page):
             page.update()
             return
 
-        user = db_manager.verify_user(identifier, password)
+        # bcrypt считается в пуле потоков, UI остаётся отзывчивым
+        set_busy(True)
+        try:
+            user = await db_manager.verify_user_async(identifier, password)
+        finally:
+            set_busy(False)
 
         if user:
             print(f"User {user['username']} logged in successfully.")
@@ -36,7 +48,7 @@ def LoginView(page: ft.Page):
             page.session.set("username", user["username"])
 
             if remember_me:
-                token = db_manager.create_session(user["user_id"])
+                token = await async_db.create_session(user["user_id"])
                 if token:
                     page.client_storage.set("session_token", token)
                     page.session.set("session_token", token)
@@ -60,6 +72,8 @@ def LoginView(page: ft.Page):
                 page.client_storage.remove("session_token")
             page.update()
 
+    login_button = ft.ElevatedButton("Войти", on_click=login_clicked)
+
     def go_to_register(e):
         """
         Переход на страницу регистрации
@@ -75,7 +89,8 @@ def LoginView(page: ft.Page):
                     identifier_field,
                     password_field,
                     remember_me_checkbox,
-                    ft.ElevatedButton("Войти", on_click=login_clicked),
+                    login_button,
+                    progress_ring,
                     error_text,
                     ft.TextButton(
                         "Нет аккаунта? Зарегистрироваться", on_click=go_to_register
@@ -10,8 +10,14 @@ def RegistrationView(page: ft.Page):
     email_field = ft.TextField(label="Email", width=300)
     password_field = ft.TextField(label="Пароль", password=True, can_reveal_password=True, width=300)
     error_text = ft.Text(value="", color=ft.colors.RED)
+    progress_ring = ft.ProgressRing(width=24, height=24, visible=False)
 
-    def register_clicked(e):
+    def set_busy(busy: bool):
+        progress_ring.visible = busy
+        register_button.disabled = busy
+        page.update()
+
+    async def register_clicked(e):
         """
         Регистрация пользователя
         """
@@ -25,7 +31,12 @@ def RegistrationView(page: ft.Page):
             page.update()
             return
 
-        success = db_manager.add_user(username, email, password)
+        # bcrypt считается в пуле потоков, UI остаётся отзывчивым
+        set_busy(True)
+        try:
+            success = await db_manager.add_user_async(username, email, password)
+        finally:
+            set_busy(False)
 
         if success:
             print(f"User {username} registered successfully.")
@@ -38,6 +49,8 @@ def RegistrationView(page: ft.Page):
             page.update()
 
 
+    register_button = ft.ElevatedButton("Зарегистрироваться", on_click=register_clicked)
+
     def go_to_login(e):
         """
         Переход на страницу входа
@@ -53,7 +66,8 @@ def RegistrationView(page: ft.Page):
                     username_field,
                     email_field,
                     password_field,
-                    ft.ElevatedButton("Зарегистрироваться", on_click=register_clicked),
+                    register_button,
+                    progress_ring,
                     error_text,
                     ft.TextButton("Уже есть аккаунт? Войти", on_click=go_to_login),
                 ],
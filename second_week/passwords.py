@@ -0,0 +1,75 @@
+"""
+Хеширование паролей bcrypt вне UI-потока.
+
+bcrypt отпускает GIL на время вычисления хеша, поэтому достаточно
+ограниченного пула потоков: параллельные входы не выстраиваются в очередь
+за одним хешем, а обработчики Flet просто ждут результат через await.
+
+Стоимость (work factor) задаётся переменной окружения BCRYPT_ROUNDS
+(по умолчанию 12). Хеши с другой стоимостью пересчитываются при
+успешном входе — см. DatabaseManager.verify_user.
+"""
+
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+DEFAULT_BCRYPT_ROUNDS = 12
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
+HASH_POOL_SIZE = min(4, os.cpu_count() or 1)
+
+_executor = ThreadPoolExecutor(
+    max_workers=HASH_POOL_SIZE, thread_name_prefix="bcrypt"
+)
+
+# $2b$12$<salt+hash>
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+def configured_rounds() -> int:
+    """Стоимость bcrypt из окружения, ограниченная допустимым диапазоном."""
+    try:
+        rounds = int(os.getenv("BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS))
+    except ValueError:
+        rounds = DEFAULT_BCRYPT_ROUNDS
+    return max(MIN_BCRYPT_ROUNDS, min(MAX_BCRYPT_ROUNDS, rounds))
+
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds or configured_rounds())
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def check_password(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except ValueError:
+        # невалидный хеш (старый формат или повреждённые данные)
+        return False
+
+
+def hash_cost(password_hash: str) -> int | None:
+    match = _COST_RE.match(password_hash)
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(password_hash: str, rounds: int | None = None) -> bool:
+    return hash_cost(password_hash) != (rounds or configured_rounds())
+
+
+async def run_in_pool(fn, *args):
+    """Выполняет fn(*args) в пуле хеширования и ждёт результат."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, fn, *args)
+
+
+async def hash_password_async(password: str, rounds: int | None = None) -> str:
+    return await run_in_pool(hash_password, password, rounds)
+
+
+async def check_password_async(password: str, password_hash: str) -> bool:
+    return await run_in_pool(check_password, password, password_hash)
@@ -0,0 +1,193 @@
+"""
+Периоды отчётов: день, неделя (ISO), месяц, квартал, год и произвольный.
+
+Период задаётся типом и датой внутри него; границы и подпись считаются один
+раз и кэшируются. Соседние периоды получаются целочисленной арифметикой по
+месяцам/дням (без relativedelta), а PeriodNavigator держит заранее
+посчитанную последовательность соседей, так что шаг стрелкой и выбор
+периодов для предзагрузки — O(1).
+
+    nav = PeriodNavigator(period_for("month", datetime.date.today()))
+    nav.move(-1).start, nav.current.label
+"""
+
+import datetime
+import os
+from functools import lru_cache
+from typing import NamedTuple
+
+PERIOD_TYPES = ("day", "week", "month", "quarter", "year", "custom")
+
+DEFAULT_LOCALE = os.getenv("APP_LOCALE", "ru")
+
+# Названия месяцев: именительный (заголовок месяца), родительный (дата),
+# сокращённый — по локалям
+_MONTHS = {
+    "ru": (
+        ("Январь", "Февраль", "Март", "Апрель", "Май", "Июнь", "Июль",
+         "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"),
+        ("января", "февраля", "марта", "апреля", "мая", "июня", "июля",
+         "августа", "сентября", "октября", "ноября", "декабря"),
+        ("янв", "фев", "мар", "апр", "мая", "июн", "июл",
+         "авг", "сен", "окт", "ноя", "дек"),
+    ),
+    "en": (
+        ("January", "February", "March", "April", "May", "June", "July",
+         "August", "September", "October", "November", "December"),
+        ("January", "February", "March", "April", "May", "June", "July",
+         "August", "September", "October", "November", "December"),
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul",
+         "Aug", "Sep", "Oct", "Nov", "Dec"),
+    ),
+}
+_WEEK_PREFIX = {"ru": "Нед. {}", "en": "W{}"}
+_QUARTER = {"ru": ("I кв.", "II кв.", "III кв.", "IV кв."), "en": ("Q1", "Q2", "Q3", "Q4")}
+
+
+class Period(NamedTuple):
+    kind: str
+    start: datetime.date
+    end: datetime.date  # включительно
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    @property
+    def label(self) -> str:
+        return period_label(self.kind, self.start, self.end, DEFAULT_LOCALE)
+
+    def contains(self, day: datetime.date) -> bool:
+        return self.start <= day <= self.end
+
+
+def _add_months(day: datetime.date, months: int) -> datetime.date:
+    """Первое число месяца, отстоящего на months от месяца day."""
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def period_for(kind: str, day: datetime.date) -> Period:
+    """Период типа kind, содержащий day (кроме "custom", см. custom_period)."""
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    if kind == "day":
+        return Period(kind, day, day)
+    if kind == "week":
+        start = day - datetime.timedelta(days=day.weekday())  # ISO: с понедельника
+        return Period(kind, start, start + datetime.timedelta(days=6))
+    if kind == "month":
+        start = day.replace(day=1)
+        return Period(kind, start, _add_months(start, 1) - datetime.timedelta(days=1))
+    if kind == "quarter":
+        start = datetime.date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+        return Period(kind, start, _add_months(start, 3) - datetime.timedelta(days=1))
+    if kind == "year":
+        return Period(kind, day.replace(month=1, day=1), day.replace(month=12, day=31))
+    raise ValueError(f"Неизвестный тип периода: {kind!r}")
+
+
+def custom_period(start: datetime.date, end: datetime.date) -> Period:
+    if end < start:
+        start, end = end, start
+    return Period("custom", start, end)
+
+
+@lru_cache(maxsize=4096)
+def shift(period: Period, steps: int) -> Period:
+    """Период, отстоящий на steps шагов того же типа (произвольный — на свою длину)."""
+    if steps == 0:
+        return period
+    kind = period.kind
+    if kind in ("day", "week", "custom"):
+        delta = datetime.timedelta(days=period.days * steps)
+        return Period(kind, period.start + delta, period.end + delta)
+    months = {"month": 1, "quarter": 3, "year": 12}[kind] * steps
+    return period_for(kind, _add_months(period.start, months))
+
+
+def _day_label(day: datetime.date, months) -> str:
+    return f"{day.day} {months[1][day.month - 1]} {day.year}"
+
+
+def _span_label(start: datetime.date, end: datetime.date, months) -> str:
+    """"12–18 окт 2026", "28 сен – 4 окт 2026", "29 дек 2025 – 4 янв 2026"."""
+    short = months[2]
+    if start.year != end.year:
+        return (
+            f"{start.day} {short[start.month - 1]} {start.year} – "
+            f"{end.day} {short[end.month - 1]} {end.year}"
+        )
+    if start.month != end.month:
+        return f"{start.day} {short[start.month - 1]} – {end.day} {short[end.month - 1]} {end.year}"
+    return f"{start.day}–{end.day} {short[end.month - 1]} {end.year}"
+
+
+@lru_cache(maxsize=4096)
+def period_label(kind: str, start: datetime.date, end: datetime.date, locale: str = DEFAULT_LOCALE) -> str:
+    """Подпись периода для навигатора дат; кэшируется по (тип, границы, локаль)."""
+    months = _MONTHS.get(locale, _MONTHS["en"])
+    if kind == "day":
+        return _day_label(start, months)
+    if kind == "week":
+        week = start.isocalendar()[1]
+        prefix = _WEEK_PREFIX.get(locale, _WEEK_PREFIX["en"]).format(week)
+        return f"{prefix}: {_span_label(start, end, months)}"
+    if kind == "month":
+        return f"{months[0][start.month - 1]} {start.year}"
+    if kind == "quarter":
+        quarters = _QUARTER.get(locale, _QUARTER["en"])
+        return f"{quarters[(start.month - 1) // 3]} {start.year}"
+    if kind == "year":
+        return str(start.year)
+    if start == end:
+        return _day_label(start, months)
+    return _span_label(start, end, months)
+
+
+class PeriodNavigator:
+    """
+    Текущий период и заранее посчитанные соседи: offset -> Period.
+    Последовательность достраивается блоками по ``window`` при выходе за край,
+    поэтому move() и neighbours() не пересчитывают даты на каждом клике.
+    """
+
+    def __init__(self, period: Period, window: int = 12):
+        self.window = window
+        self._periods: dict[int, Period] = {0: period}
+        self._low = self._high = 0
+        self._offset = 0
+        self._extend(-window, window)
+
+    def _extend(self, low: int, high: int):
+        while self._low > low:
+            self._periods[self._low - 1] = shift(self._periods[self._low], -1)
+            self._low -= 1
+        while self._high < high:
+            self._periods[self._high + 1] = shift(self._periods[self._high], 1)
+            self._high += 1
+
+    def at(self, offset: int) -> Period:
+        """Период на offset шагов от текущего."""
+        target = self._offset + offset
+        if not (self._low <= target <= self._high):
+            self._extend(min(self._low, target - self.window), max(self._high, target + self.window))
+        return self._periods[target]
+
+    @property
+    def current(self) -> Period:
+        return self._periods[self._offset]
+
+    def move(self, steps: int) -> Period:
+        period = self.at(steps)
+        self._offset += steps
+        return period
+
+    def neighbours(self, count: int = 1) -> list[Period]:
+        """Ближайшие периоды по обе стороны: [+1, -1, +2, -2, ...]."""
+        result = []
+        for i in range(1, count + 1):
+            result.append(self.at(i))
+            result.append(self.at(-i))
+        return result
@@ -0,0 +1,95 @@
+"""
+Фоновая предзагрузка соседних периодов для домашнего экрана.
+
+После отрисовки периода в фоне запрашиваются соседние периоды (и, по
+желанию, другая вкладка текущего) теми же вызовами, что делает отрисовка,
+так что результаты оседают в DatabaseManager.query_cache (ограниченный LRU)
+и следующий клик по стрелке или вкладке отрисовывается из памяти.
+
+Стоимость ограничивается переменными окружения:
+    PREFETCH_NEIGHBOURS   — сколько периодов в каждую сторону (0 — выключено), по умолчанию 1
+    PREFETCH_OTHER_TAB    — предзагружать другую вкладку (1/0), по умолчанию 1
+    PREFETCH_BUDGET_MS    — время запросов на одну предзагрузку; на очень
+                            больших счетах остаток пропускается, по умолчанию 250
+"""
+
+import os
+import time
+from typing import Awaitable, Callable, NamedTuple
+
+from async_db import LatestTask
+
+DEFAULT_PREFETCH_NEIGHBOURS = 1
+DEFAULT_PREFETCH_BUDGET_MS = 250
+
+
+class PrefetchSettings(NamedTuple):
+    neighbours: int
+    other_tab: bool
+    budget_ms: float
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def configured_settings() -> PrefetchSettings:
+    """Настройки предзагрузки из окружения."""
+    return PrefetchSettings(
+        neighbours=_env_int("PREFETCH_NEIGHBOURS", DEFAULT_PREFETCH_NEIGHBOURS),
+        other_tab=_env_int("PREFETCH_OTHER_TAB", 1) > 0,
+        budget_ms=_env_int("PREFETCH_BUDGET_MS", DEFAULT_PREFETCH_BUDGET_MS),
+    )
+
+
+class Prefetcher:
+    """
+    Выполняет задания предзагрузки по одному в фоне (через page.run_task).
+    Новый run() или cancel() прекращает предыдущую серию: запрос, уже ушедший
+    в пул, дорабатывает, но следующие не запускаются.
+    """
+
+    def __init__(self, page, settings: PrefetchSettings | None = None):
+        self.settings = settings or configured_settings()
+        self._task = LatestTask(page)
+        self.jobs_done = 0
+        self.jobs_skipped = 0
+        self.runs_cancelled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.budget_ms > 0 and (
+            self.settings.neighbours > 0 or self.settings.other_tab
+        )
+
+    def run(self, jobs: list[Callable[[], Awaitable]]):
+        if not self.enabled or not jobs:
+            return
+        self.cancel()
+        self._task.run(self._worker, jobs)
+
+    def cancel(self):
+        if self._task.pending:
+            self.runs_cancelled += 1
+        self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "jobs_done": self.jobs_done,
+            "jobs_skipped": self.jobs_skipped,
+            "runs_cancelled": self.runs_cancelled,
+        }
+
+    async def _worker(self, jobs):
+        spent_ms = 0.0
+        for i, job in enumerate(jobs):
+            if spent_ms >= self.settings.budget_ms:
+                self.jobs_skipped += len(jobs) - i
+                return
+            start = time.perf_counter()
+            await job()
+            spent_ms += (time.perf_counter() - start) * 1000
+            self.jobs_done += 1
@@ -0,0 +1,561 @@
+"""
+Все SQL-запросы DatabaseManager, объявленные заранее и вызываемые по имени.
+
+Текст запроса не собирается на лету, поэтому каждый оператор компилируется
+один раз на соединение и дальше берётся из кэша подготовленных выражений
+sqlite3 (LRU по тексту запроса, размер — STATEMENT_CACHE_SIZE).
+"""
+
+STATEMENTS: dict[str, str] = {
+    # ------------------------------ справочники ------------------------------
+    "currencies_count": "SELECT COUNT(*) FROM currencies;",
+    "currency_insert": "INSERT INTO currencies (code, name, symbol) VALUES (?, ?, ?);",
+    "currencies_all": "SELECT * FROM currencies ORDER BY code;",
+    "default_categories_count": "SELECT COUNT(*) FROM categories WHERE user_id IS NULL;",
+    "default_category_insert": """
+        INSERT INTO categories (user_id, name, type, icon) VALUES (NULL, ?, ?, ?);
+    """,
+    # ---------------------------- пользователи -------------------------------
+    "user_insert": """
+        INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?);
+    """,
+    "user_by_login": "SELECT * FROM users WHERE username = ? OR email = ?;",
+    "user_set_password_hash": "UPDATE users SET password_hash = ? WHERE user_id = ?;",
+    # ------------------------------- сессии ----------------------------------
+    "session_insert": """
+        INSERT INTO sessions (user_id, token, expires_at) VALUES (?, ?, ?);
+    """,
+    "session_user": """
+        SELECT u.*, s.expires_at FROM sessions s
+        JOIN users u ON u.user_id = s.user_id
+        WHERE s.token = ? AND s.expires_at > ?;
+    """,
+    "session_delete": "DELETE FROM sessions WHERE token = ?;",
+    "sessions_delete_expired": "DELETE FROM sessions WHERE expires_at <= ?;",
+    # -------------------------------- счета ----------------------------------
+    "accounts_by_user": """
+        SELECT a.*, c.code AS currency_code, c.symbol AS currency_symbol,
+               c.minor_units AS currency_minor_units
+        FROM accounts a
+        JOIN currencies c ON c.currency_id = a.currency_id
+        WHERE a.user_id = ?
+        ORDER BY a.name;
+    """,
+    "account_by_id": """
+        SELECT a.*, c.code AS currency_code, c.symbol AS currency_symbol,
+               c.minor_units AS currency_minor_units
+        FROM accounts a
+        JOIN currencies c ON c.currency_id = a.currency_id
+        WHERE a.account_id = ? AND a.user_id = ?;
+    """,
+    "account_insert": """
+        INSERT INTO accounts
+        (user_id, name, balance, opening_balance, currency_id, description, icon)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """,
+    # новый баланс задаётся сдвигом opening_balance: журнал операций не меняется
+    "account_update": """
+        UPDATE accounts
+        SET name = ?, opening_balance = opening_balance + (? - balance), balance = ?,
+            currency_id = ?, description = ?, icon = ?
+        WHERE account_id = ? AND user_id = ?;
+    """,
+    "account_balance": "SELECT balance FROM accounts WHERE account_id = ?;",
+    "account_balance_owned": """
+        SELECT balance FROM accounts WHERE account_id = ? AND user_id = ?;
+    """,
+    "account_add_balance": "UPDATE accounts SET balance = balance + ? WHERE account_id = ?;",
+    # транзакции удаляются только если счёт принадлежит пользователю
+    "account_delete_transactions": """
+        DELETE FROM transactions WHERE account_id = (
+            SELECT account_id FROM accounts WHERE account_id = ? AND user_id = ?
+        );
+    """,
+    "account_delete_rules": """
+        DELETE FROM recurring_rules WHERE account_id = ? AND user_id = ?;
+    """,
+    "account_delete": "DELETE FROM accounts WHERE account_id = ? AND user_id = ?;",
+    # ------------------------------ категории --------------------------------
+    "categories_by_user_type": """
+        SELECT * FROM categories
+        WHERE (user_id = ? OR user_id IS NULL) AND type = ?
+        ORDER BY CASE WHEN user_id IS NULL THEN 1 ELSE 0 END DESC, name;
+    """,
+    "category_insert": """
+        INSERT INTO categories (user_id, name, type, icon) VALUES (?, ?, ?, ?);
+    """,
+    "category_exists": "SELECT 1 FROM categories WHERE category_id = ?;",
+    # ------------------------------ транзакции -------------------------------
+    "transaction_insert": """
+        INSERT INTO transactions
+        (account_id, category_id, amount, transaction_date, description, type)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """,
+    "transaction_owned": """
+        SELECT t.* FROM transactions t
+        JOIN accounts a ON a.account_id = t.account_id
+        WHERE t.transaction_id = ? AND a.user_id = ?;
+    """,
+    # Меняет поля, от которых зависят баланс и агрегаты: срабатывают
+    # триггеры daily_totals / balance_snapshots (AFTER UPDATE OF ...)
+    "transaction_update": """
+        UPDATE transactions
+        SET account_id = ?, category_id = ?, amount = ?, transaction_date = ?,
+            description = ?, type = ?
+        WHERE transaction_id = ?;
+    """,
+    # Только категория и описание: daily_totals и снимки баланса не меняются,
+    # но прогресс бюджетов пересчитывается (trg_transactions_budget_au
+    # срабатывает на UPDATE OF category_id)
+    "transaction_update_details": """
+        UPDATE transactions SET category_id = ?, description = ?
+        WHERE transaction_id = ?;
+    """,
+    # Пакет id передаётся одним JSON-массивом: один подготовленный запрос
+    # на любой размер пакета, без лимита на число параметров.
+    # Сдвиг баланса на счёт (обратный знак удаляемых операций) и диапазон дат
+    # для сброса query_cache.
+    "transactions_delete_deltas": """
+        SELECT t.account_id,
+               SUM(CASE t.type WHEN 'income' THEN -t.amount ELSE t.amount END) AS delta,
+               COUNT(*) AS count,
+               MIN(t.transaction_date) AS first_ts,
+               MAX(t.transaction_date) AS last_ts
+        FROM transactions t
+        JOIN accounts a ON a.account_id = t.account_id
+        WHERE t.transaction_id IN (SELECT value FROM json_each(?)) AND a.user_id = ?
+        GROUP BY t.account_id;
+    """,
+    "transactions_delete_owned": """
+        DELETE FROM transactions
+        WHERE transaction_id IN (SELECT value FROM json_each(?))
+          AND account_id IN (SELECT account_id FROM accounts WHERE user_id = ?);
+    """,
+    # Принадлежность счёта проверяется JOIN-ом в том же запросе
+    "transactions_by_account": """
+        SELECT t.*, c.name AS category_name, c.icon AS category_icon
+        FROM transactions t
+        JOIN accounts a ON a.account_id = t.account_id AND a.user_id = ?
+        LEFT JOIN categories c ON c.category_id = t.category_id
+        WHERE t.account_id = ?
+        ORDER BY t.transaction_date DESC, t.transaction_id DESC
+        LIMIT ? OFFSET ?;
+    """,
+    # Итог за период (из daily_totals) и страница строк одним оператором:
+    # CTE tot всегда даёт ровно одну строку, к ней LEFT JOIN — страница.
+    "transactions_summary": """
+        WITH acc AS (
+            SELECT account_id FROM accounts WHERE account_id = ? AND user_id = ?
+        ),
+        tot AS (
+            SELECT COALESCE(SUM(d.total), 0) AS period_total
+            FROM daily_totals d
+            JOIN acc ON acc.account_id = d.account_id
+            WHERE d.type = ? AND d.day BETWEEN ? AND ?
+        ),
+        page AS (
+            SELECT t.*, c.name AS category_name, c.icon AS category_icon
+            FROM transactions t
+            JOIN acc ON acc.account_id = t.account_id
+            LEFT JOIN categories c ON c.category_id = t.category_id
+            WHERE t.type = ? AND t.transaction_date >= ? AND t.transaction_date < ?
+            ORDER BY t.transaction_date DESC, t.transaction_id DESC
+            LIMIT ?
+        )
+        SELECT tot.period_total, page.*
+        FROM tot LEFT JOIN page ON 1
+        ORDER BY page.transaction_date DESC, page.transaction_id DESC;
+    """,
+    "transactions_page": """
+        SELECT t.*, c.name AS category_name, c.icon AS category_icon
+        FROM transactions t
+        JOIN accounts a ON a.account_id = t.account_id AND a.user_id = ?
+        LEFT JOIN categories c ON c.category_id = t.category_id
+        WHERE t.account_id = ? AND t.type = ?
+          AND t.transaction_date >= ? AND t.transaction_date < ?
+          AND (t.transaction_date, t.transaction_id) < (?, ?)
+        ORDER BY t.transaction_date DESC, t.transaction_id DESC
+        LIMIT ?;
+    """,
+    # ------------------------------ аналитика --------------------------------
+    # GROUP BY по диапазону индекса ix_transactions_account_type_date
+    # (account_id, type, transaction_date, category_id, amount); имена категорий
+    # подтягиваются уже к группам, итог периода — оконной функцией по ним.
+    "category_totals": """
+        WITH g AS (
+            SELECT t.category_id, SUM(t.amount) AS total, COUNT(*) AS count
+            FROM transactions t
+            JOIN accounts a ON a.account_id = t.account_id AND a.user_id = ?
+            WHERE t.account_id = ? AND t.type = ?
+              AND t.transaction_date >= ? AND t.transaction_date < ?
+            GROUP BY t.category_id
+        )
+        SELECT g.category_id, c.name AS category_name, c.icon AS category_icon,
+               g.total, g.count, SUM(g.total) OVER () AS period_total
+        FROM g LEFT JOIN categories c ON c.category_id = g.category_id
+        ORDER BY g.total DESC, g.category_id
+        LIMIT ?;
+    """,
+    # ряды — по первичному ключу daily_totals (account_id, type, day)
+    "day_series": """
+        SELECT d.day AS bucket, d.total, d.count
+        FROM daily_totals d
+        JOIN accounts a ON a.account_id = d.account_id AND a.user_id = ?
+        WHERE d.account_id = ? AND d.type = ? AND d.day BETWEEN ? AND ?
+        ORDER BY d.day;
+    """,
+    "month_series": """
+        SELECT substr(d.day, 1, 7) AS bucket, SUM(d.total) AS total, SUM(d.count) AS count
+        FROM daily_totals d
+        JOIN accounts a ON a.account_id = d.account_id AND a.user_id = ?
+        WHERE d.account_id = ? AND d.type = ? AND d.day BETWEEN ? AND ?
+        GROUP BY bucket
+        ORDER BY bucket;
+    """,
+    # ------------------------------- валюты ----------------------------------
+    "exchange_rate_upsert": """
+        INSERT INTO exchange_rates (day, from_currency, to_currency, rate)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (from_currency, to_currency, day) DO UPDATE SET rate = excluded.rate;
+    """,
+    "exchange_rates_all": """
+        SELECT from_currency, to_currency, day, rate
+        FROM exchange_rates
+        ORDER BY from_currency, to_currency, day;
+    """,
+    # Суммы по валютам (cur: code, minor_units, amount, accounts) пересчитываются
+    # в целевую валюту: прямой курс на дату или обратный, масштаб по разнице
+    # minor_units ('1e2' -> 100.0). converted = NULL — курса нет.
+    # Строка на счёт: итог его валюты плюс account_converted — баланс счёта
+    # по тому же курсу.
+    "consolidated_balance": """
+        WITH acc AS (
+            SELECT a.account_id, a.balance, c.code, c.minor_units
+            FROM accounts a JOIN currencies c ON c.currency_id = a.currency_id
+            WHERE a.user_id = ?
+        ),
+        cur AS (
+            SELECT code, minor_units, SUM(balance) AS amount, COUNT(*) AS accounts
+            FROM acc
+            GROUP BY code
+        ),
+        tgt AS (SELECT code, symbol, minor_units FROM currencies WHERE code = ?),
+        conv AS (
+            SELECT cur.*, CASE WHEN cur.code = tgt.code THEN 1.0 ELSE COALESCE(
+                       (SELECT e.rate FROM exchange_rates e
+                        WHERE e.from_currency = cur.code AND e.to_currency = tgt.code
+                          AND e.day <= ?
+                        ORDER BY e.day DESC LIMIT 1),
+                       (SELECT 1.0 / e.rate FROM exchange_rates e
+                        WHERE e.from_currency = tgt.code AND e.to_currency = cur.code
+                          AND e.day <= ?
+                        ORDER BY e.day DESC LIMIT 1)
+                   ) END AS rate,
+                   CAST('1e' || (tgt.minor_units - cur.minor_units) AS REAL) AS scale,
+                   tgt.symbol AS target_symbol, tgt.minor_units AS target_minor_units
+            FROM cur, tgt
+        )
+        SELECT conv.code, amount, accounts, rate,
+               CAST(ROUND(amount * rate * scale) AS INTEGER) AS converted,
+               target_symbol, target_minor_units, acc.account_id,
+               CAST(ROUND(acc.balance * rate * scale) AS INTEGER) AS account_converted
+        FROM conv JOIN acc ON acc.code = conv.code
+        ORDER BY conv.code, acc.account_id;
+    """,
+    "consolidated_period_totals": """
+        WITH cur AS (
+            SELECT c.code, c.minor_units, SUM(d.total) AS amount,
+                   COUNT(DISTINCT a.account_id) AS accounts
+            FROM accounts a
+            JOIN currencies c ON c.currency_id = a.currency_id
+            JOIN daily_totals d ON d.account_id = a.account_id
+            WHERE a.user_id = ? AND d.type = ? AND d.day BETWEEN ? AND ?
+            GROUP BY a.currency_id
+        ),
+        tgt AS (SELECT code, symbol, minor_units FROM currencies WHERE code = ?),
+        conv AS (
+            SELECT cur.*, CASE WHEN cur.code = tgt.code THEN 1.0 ELSE COALESCE(
+                       (SELECT e.rate FROM exchange_rates e
+                        WHERE e.from_currency = cur.code AND e.to_currency = tgt.code
+                          AND e.day <= ?
+                        ORDER BY e.day DESC LIMIT 1),
+                       (SELECT 1.0 / e.rate FROM exchange_rates e
+                        WHERE e.from_currency = tgt.code AND e.to_currency = cur.code
+                          AND e.day <= ?
+                        ORDER BY e.day DESC LIMIT 1)
+                   ) END AS rate,
+                   CAST('1e' || (tgt.minor_units - cur.minor_units) AS REAL) AS scale,
+                   tgt.symbol AS target_symbol, tgt.minor_units AS target_minor_units
+            FROM cur, tgt
+        )
+        SELECT code, amount, accounts, rate,
+               CAST(ROUND(amount * rate * scale) AS INTEGER) AS converted,
+               target_symbol, target_minor_units
+        FROM conv
+        ORDER BY code;
+    """,
+    # ------------------------ повторяющиеся операции -------------------------
+    "recurring_rule_insert": """
+        INSERT INTO recurring_rules
+        (user_id, account_id, category_id, amount, description, type,
+         freq, interval, start_date, until_date, max_count, next_index, next_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?);
+    """,
+    # Частичный индекс ix_recurring_rules_due: обычно пустой результат за один шаг
+    "recurring_due": """
+        SELECT * FROM recurring_rules
+        WHERE next_date IS NOT NULL AND next_date <= ?
+          AND (? IS NULL OR user_id = ?);
+    """,
+    "recurring_occurrence_insert": """
+        INSERT INTO transactions
+        (account_id, category_id, amount, transaction_date, description, type, rule_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """,
+    "recurring_advance": """
+        UPDATE recurring_rules SET next_index = ?, next_date = ? WHERE rule_id = ?;
+    """,
+    "recurring_rules_by_user": """
+        SELECT r.*, c.name AS category_name, c.icon AS category_icon
+        FROM recurring_rules r
+        LEFT JOIN categories c ON c.category_id = r.category_id
+        WHERE r.user_id = ?
+        ORDER BY r.rule_id;
+    """,
+    "recurring_active": """
+        SELECT r.*, c.name AS category_name, c.icon AS category_icon
+        FROM recurring_rules r
+        LEFT JOIN categories c ON c.category_id = r.category_id
+        WHERE r.user_id = ? AND r.next_date IS NOT NULL AND r.next_date <= ?
+          AND (? IS NULL OR r.account_id = ?)
+          AND (? IS NULL OR r.type = ?);
+    """,
+    "recurring_stop": """
+        UPDATE recurring_rules SET next_date = NULL WHERE rule_id = ? AND user_id = ?;
+    """,
+    # ------------------------------- бюджеты ---------------------------------
+    "budget_insert": """
+        INSERT INTO budgets
+        (user_id, account_id, category_id, period, amount_limit, alert_percent)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """,
+    # Начальное заполнение прогресса нового бюджета за всю историю категории
+    # (дальше его ведут триггеры); по индексу ix_transactions_account_type_date
+    "budget_progress_backfill": """
+        INSERT INTO budget_progress (budget_id, period_start, spent)
+        SELECT b.budget_id,
+               CASE b.period
+                   WHEN 'month' THEN date(t.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                   ELSE date(t.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+               END AS period_start,
+               SUM(t.amount)
+        FROM budgets b
+        JOIN transactions t
+          ON t.account_id = b.account_id AND t.type = 'expense'
+         AND t.category_id = b.category_id
+        WHERE b.budget_id = ?
+        GROUP BY period_start;
+    """,
+    "budget_update": """
+        UPDATE budgets SET amount_limit = ?, alert_percent = ?
+        WHERE budget_id = ? AND user_id = ?;
+    """,
+    # budget_progress удаляется каскадом (PRAGMA foreign_keys = ON)
+    "budget_delete": "DELETE FROM budgets WHERE budget_id = ? AND user_id = ?;",
+    # Все бюджеты счёта с прогрессом текущих периодов — одно чтение:
+    # бюджеты по UNIQUE (account_id, ...), прогресс — по первичному ключу.
+    # Параметры: ?1 — начало месяца, ?2 — начало недели, ?3 — счёт, ?4 — пользователь.
+    "budget_status": """
+        SELECT b.budget_id, b.category_id, c.name AS category_name,
+               c.icon AS category_icon, b.period, b.amount_limit, b.alert_percent,
+               CASE b.period WHEN 'month' THEN ?1 ELSE ?2 END AS period_start,
+               COALESCE(p.spent, 0) AS spent
+        FROM budgets b
+        LEFT JOIN categories c ON c.category_id = b.category_id
+        LEFT JOIN budget_progress p
+          ON p.budget_id = b.budget_id
+         AND p.period_start = CASE b.period WHEN 'month' THEN ?1 ELSE ?2 END
+        WHERE b.account_id = ?3 AND b.user_id = ?4
+        ORDER BY COALESCE(p.spent, 0) * 1.0 / b.amount_limit DESC, b.budget_id;
+    """,
+    "budget_progress_check": """
+        WITH raw AS (
+            SELECT b.budget_id,
+                   CASE b.period
+                       WHEN 'month' THEN date(t.transaction_date, 'unixepoch', 'localtime', 'start of month')
+                       ELSE date(t.transaction_date, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+                   END AS period_start,
+                   SUM(t.amount) AS spent
+            FROM budgets b
+            JOIN transactions t
+              ON t.account_id = b.account_id AND t.type = 'expense'
+             AND t.category_id = b.category_id
+            GROUP BY b.budget_id, period_start
+        )
+        SELECT r.budget_id, r.period_start, r.spent AS raw_spent, p.spent AS stored_spent
+        FROM raw r
+        LEFT JOIN budget_progress p
+          ON p.budget_id = r.budget_id AND p.period_start = r.period_start
+        WHERE p.spent IS NULL OR p.spent != r.spent
+        UNION ALL
+        SELECT p.budget_id, p.period_start, NULL, p.spent
+        FROM budget_progress p
+        WHERE p.spent != 0 AND NOT EXISTS (
+            SELECT 1 FROM raw r
+            WHERE r.budget_id = p.budget_id AND r.period_start = p.period_start
+        );
+    """,
+    # ------------------------------- экспорт ---------------------------------
+    # Порядок (счёт, дата, id) совпадает с ix_transactions_account_date, поэтому
+    # строки идут прямо из индекса без сортировки во временном B-дереве и
+    # читаются пакетами fetchmany при постоянной памяти. Фильтры с NULL отключены.
+    "transactions_export": """
+        SELECT datetime(t.transaction_date, 'unixepoch', 'localtime') AS date,
+               t.amount, t.type, c.name AS category, t.description,
+               a.name AS account, cur.code AS currency, cur.minor_units
+        FROM accounts a
+        JOIN currencies cur ON cur.currency_id = a.currency_id
+        JOIN transactions t ON t.account_id = a.account_id
+        LEFT JOIN categories c ON c.category_id = t.category_id
+        WHERE a.user_id = ?1
+          AND (?2 IS NULL OR a.account_id = ?2)
+          AND (?3 IS NULL OR t.category_id = ?3)
+          AND t.transaction_date >= ?4 AND t.transaction_date < ?5
+        ORDER BY a.account_id, t.transaction_date, t.transaction_id;
+    """,
+    "transactions_export_count": """
+        SELECT COUNT(*)
+        FROM accounts a
+        JOIN transactions t ON t.account_id = a.account_id
+        WHERE a.user_id = ?1
+          AND (?2 IS NULL OR a.account_id = ?2)
+          AND (?3 IS NULL OR t.category_id = ?3)
+          AND t.transaction_date >= ?4 AND t.transaction_date < ?5;
+    """,
+    # -------------------------------- поиск ----------------------------------
+    # Обход совпадений FTS по rowid (= transaction_id) от новых к старым:
+    # LIMIT останавливает поиск на первой странице, сколько бы строк ни
+    # совпало. Фильтры с NULL отключены; курсор — transaction_id последней строки.
+    "transactions_search": """
+        SELECT t.*, c.name AS category_name, c.icon AS category_icon
+        FROM transactions_fts f
+        JOIN transactions t ON t.transaction_id = f.rowid
+        JOIN accounts a ON a.account_id = t.account_id AND a.user_id = ?
+        LEFT JOIN categories c ON c.category_id = t.category_id
+        WHERE transactions_fts MATCH ? AND f.rowid < ?
+          AND (? IS NULL OR t.account_id = ?)
+          AND (? IS NULL OR t.type = ?)
+          AND (? IS NULL OR t.category_id = ?)
+          AND t.transaction_date >= ? AND t.transaction_date < ?
+        ORDER BY f.rowid DESC
+        LIMIT ?;
+    """,
+    "search_index_clear": "DELETE FROM transactions_fts;",
+    "search_index_backfill": """
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT t.transaction_id,
+               replace(replace(t.description, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(c.name, 'ё', 'е'), 'Ё', 'Е')
+        FROM transactions t
+        LEFT JOIN categories c ON c.category_id = t.category_id;
+    """,
+    "search_index_count": "SELECT COUNT(*) FROM transactions_fts;",
+    # ------------------------------- rollups ---------------------------------
+    "daily_totals_clear": "DELETE FROM daily_totals;",
+    "daily_totals_backfill": """
+        INSERT INTO daily_totals (account_id, type, day, total, count)
+        SELECT account_id, type, date(transaction_date, 'unixepoch', 'localtime'),
+               SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY account_id, type, date(transaction_date, 'unixepoch', 'localtime');
+    """,
+    "daily_totals_count": "SELECT COUNT(*) FROM daily_totals;",
+    # ------------------------------- балансы ---------------------------------
+    "balance_as_of": """
+        WITH acc AS (
+            SELECT account_id, opening_balance FROM accounts
+            WHERE account_id = ? AND user_id = ?
+        ),
+        snap AS (
+            SELECT s.day, s.balance
+            FROM balance_snapshots s JOIN acc ON acc.account_id = s.account_id
+            WHERE s.day <= ?
+            ORDER BY s.day DESC
+            LIMIT 1
+        )
+        SELECT COALESCE((SELECT balance FROM snap), acc.opening_balance)
+             + COALESCE((
+                 SELECT SUM(CASE d.type WHEN 'income' THEN d.total ELSE -d.total END)
+                 FROM daily_totals d
+                 WHERE d.account_id = acc.account_id
+                   AND d.day > COALESCE((SELECT day FROM snap), '')
+                   AND d.day <= ?
+             ), 0) AS balance
+        FROM acc;
+    """,
+    # снимок считается от opening_balance, а не от прошлого снимка:
+    # так он заодно исправляет возможный дрейф
+    "balance_snapshots_take": """
+        INSERT INTO balance_snapshots (account_id, day, balance)
+        SELECT a.account_id, ?, a.opening_balance + COALESCE((
+                   SELECT SUM(CASE d.type WHEN 'income' THEN d.total ELSE -d.total END)
+                   FROM daily_totals d
+                   WHERE d.account_id = a.account_id AND d.day <= ?
+               ), 0)
+        FROM accounts a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM balance_snapshots s
+            WHERE s.account_id = a.account_id AND s.day > date(?, '-' || ? || ' days')
+        )
+        ON CONFLICT (account_id, day) DO UPDATE SET balance = excluded.balance;
+    """,
+    "balances_check": """
+        WITH net AS (
+            SELECT a.account_id, a.opening_balance, a.balance,
+                   COALESCE(SUM(CASE t.type WHEN 'income' THEN t.amount
+                                             ELSE -t.amount END), 0) AS net
+            FROM accounts a LEFT JOIN transactions t ON t.account_id = a.account_id
+            GROUP BY a.account_id
+        )
+        SELECT account_id, NULL AS day, balance AS stored, opening_balance + net AS ledger
+        FROM net
+        WHERE balance != opening_balance + net
+        UNION ALL
+        SELECT s.account_id, s.day, s.balance, a.opening_balance + COALESCE((
+                   SELECT SUM(CASE t.type WHEN 'income' THEN t.amount ELSE -t.amount END)
+                   FROM transactions t
+                   WHERE t.account_id = s.account_id
+                     AND t.transaction_date
+                         < CAST(strftime('%s', s.day, '+1 day', 'utc') AS INTEGER)
+               ), 0) AS ledger
+        FROM balance_snapshots s JOIN accounts a ON a.account_id = s.account_id
+        WHERE s.balance != ledger;
+    """,
+    # raw_* = NULL — лишняя строка в rollup
+    "daily_totals_check": """
+        WITH raw AS (
+            SELECT account_id, type, date(transaction_date, 'unixepoch', 'localtime') AS day,
+                   SUM(amount) AS total, COUNT(*) AS count
+            FROM transactions
+            GROUP BY account_id, type, day
+        )
+        SELECT r.account_id, r.type, r.day,
+               r.total AS raw_total, r.count AS raw_count,
+               d.total AS rollup_total, d.count AS rollup_count
+        FROM raw r
+        LEFT JOIN daily_totals d
+          ON d.account_id = r.account_id AND d.type = r.type AND d.day = r.day
+        WHERE d.day IS NULL OR d.count != r.count OR d.total != r.total
+        UNION ALL
+        SELECT d.account_id, d.type, d.day, NULL, NULL, d.total, d.count
+        FROM daily_totals d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM raw r
+            WHERE r.account_id = d.account_id AND r.type = d.type AND r.day = d.day
+        );
+    """,
+}
+
+# Кэш подготовленных выражений на соединение: весь API плюс запас
+# на служебные запросы (PRAGMA, миграции).
+STATEMENT_CACHE_SIZE = len(STATEMENTS) + 32
@@ -0,0 +1,114 @@
+"""
+In-process кэш результатов чтения для DatabaseManager.get_transactions_summary.
+
+Ключ — (user, account, type, start_ts, end_ts, limit): переключение
+День/Неделя/Месяц и вкладок Расходы/Доходы повторяет одни и те же запросы.
+Записи сбрасываются точечно: изменение операции счёта с датой ts удаляет
+только периоды этого счёта, в которые попадает ts.
+
+Память ограничена числом записей и суммарным числом кэшированных строк.
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_ROWS = 20_000
+
+
+class QueryCache:
+    """
+    Потокобезопасный LRU-кэш (rows, total) по периодам счёта со счётчиками.
+
+    Чтение идёт мимо блокировки записи, поэтому результат, посчитанный до
+    инвалидации, не должен попасть в кэш после неё: put() принимает версию,
+    полученную через version() до запроса, и игнорирует устаревшие.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries: OrderedDict[tuple, tuple[list[dict], int]] = OrderedDict()
+        self._rows = 0
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(user_id, account_id, type_, start_ts, end_ts, limit) -> tuple:
+        return (user_id, account_id, type_, start_ts, end_ts, limit)
+
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        rows, total = entry
+        return [dict(r) for r in rows], total
+
+    def put(self, key: tuple, rows: list[dict], total: int, version: int):
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if version != self._version:
+                return  # между чтением и put была запись
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._rows -= len(old[0])
+            self._entries[key] = ([dict(r) for r in rows], total)
+            self._rows += len(rows)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._rows -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, account_id: int, start_ts: int | None = None, end_ts: int | None = None):
+        """
+        Сбрасывает периоды счёта, пересекающиеся с [start_ts, end_ts]
+        (оба включительно; end_ts по умолчанию = start_ts). Без дат — весь счёт.
+        """
+        if start_ts is not None and end_ts is None:
+            end_ts = start_ts
+        with self._lock:
+            self._version += 1
+            stale = [
+                k
+                for k in self._entries
+                if k[1] == account_id
+                and (start_ts is None or (k[3] <= end_ts and start_ts < k[4]))
+            ]
+            for k in stale:
+                self._rows -= len(self._entries.pop(k)[0])
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "rows": self._rows,
+            }
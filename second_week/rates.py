@@ -0,0 +1,114 @@
+"""
+Курсы валют: загрузка из локального файла и кэш в памяти.
+
+Курсы хранятся в таблице exchange_rates (day, from_currency, to_currency,
+rate): 1 единица from_currency = rate единиц to_currency на дату day.
+Действует последний курс не позже нужной даты; обратный курс (1 / rate)
+используется, если прямого нет.
+
+Файл — CSV с заголовком::
+
+    date,from,to,rate
+    2025-01-10,USD,RUB,101.68
+    2025-01-10,EUR,RUB,104.97
+
+Сводные суммы (баланс по всем счетам, итоги периода) пересчитываются в SQL —
+см. DatabaseManager.get_consolidated_balance; RateCache нужен для точечных
+пересчётов в интерфейсе без запроса к БД.
+"""
+
+import bisect
+import csv
+import datetime
+import os
+import threading
+from typing import Iterable, Iterator
+
+DEFAULT_BASE_CURRENCY = os.getenv("BASE_CURRENCY", "RUB")
+
+
+class RateFileError(ValueError):
+    """Строка файла курсов не разобрана."""
+
+
+def read_rates_csv(path: str) -> Iterator[tuple[str, str, str, float]]:
+    """(day "YYYY-MM-DD", from, to, rate) для каждой строки файла."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                day = datetime.date.fromisoformat(row["date"].strip()).isoformat()
+                from_code = row["from"].strip().upper()
+                to_code = row["to"].strip().upper()
+                rate = float(row["rate"].replace(",", "."))
+            except (KeyError, AttributeError, ValueError) as e:
+                raise RateFileError(f"{path}:{line_no}: {e}") from None
+            if rate <= 0 or from_code == to_code:
+                raise RateFileError(f"{path}:{line_no}: неверный курс {row}")
+            yield day, from_code, to_code, rate
+
+
+def load_rates_file(db, path: str) -> int:
+    """Загружает курсы из CSV в БД (существующие даты перезаписываются)."""
+    return db.add_exchange_rates(read_rates_csv(path))
+
+
+class RateCache:
+    """
+    Все курсы в памяти: (from, to) -> отсортированные даты и курсы, поиск
+    курса на дату — bisect. Загружается из БД при первом обращении,
+    сбрасывается после загрузки новых курсов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pairs: dict[tuple[str, str], tuple[list[str], list[float]]] | None = None
+        self._minor_units: dict[str, int] = {}
+
+    def load(self, rates: Iterable, minor_units: dict[str, int]):
+        pairs: dict[tuple[str, str], tuple[list[str], list[float]]] = {}
+        for r in rates:  # отсортированы по (from, to, day)
+            days, values = pairs.setdefault((r["from_currency"], r["to_currency"]), ([], []))
+            days.append(r["day"])
+            values.append(r["rate"])
+        with self._lock:
+            self._pairs = pairs
+            self._minor_units = dict(minor_units)
+
+    @property
+    def loaded(self) -> bool:
+        return self._pairs is not None
+
+    def clear(self):
+        with self._lock:
+            self._pairs = None
+
+    def _lookup(self, pair, day: str) -> float | None:
+        series = (self._pairs or {}).get(pair)
+        if not series:
+            return None
+        i = bisect.bisect_right(series[0], day)
+        return series[1][i - 1] if i else None
+
+    def rate(self, from_code: str, to_code: str, day: datetime.date | None = None) -> float | None:
+        """Курс from -> to, действующий на day (по умолчанию сегодня), или None."""
+        if from_code == to_code:
+            return 1.0
+        day = (day or datetime.date.today()).isoformat()
+        with self._lock:
+            direct = self._lookup((from_code, to_code), day)
+            if direct is not None:
+                return direct
+            inverse = self._lookup((to_code, from_code), day)
+        return 1.0 / inverse if inverse else None
+
+    def convert(
+        self, minor: int, from_code: str, to_code: str, day: datetime.date | None = None
+    ) -> int | None:
+        """Сумма в минорных единицах from -> минорные единицы to, или None без курса."""
+        rate = self.rate(from_code, to_code, day)
+        if rate is None:
+            return None
+        scale = 10 ** (self._minor_units.get(to_code, 2) - self._minor_units.get(from_code, 2))
+        value = minor * rate * scale
+        # половина — от нуля, как ROUND() в SQLite
+        return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
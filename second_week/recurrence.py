@@ -0,0 +1,100 @@
+"""
+Расписание повторяющихся операций: подмножество RRULE (FREQ, INTERVAL,
+COUNT, UNTIL) и даты повторений правила.
+
+Дата n-го повторения считается от даты начала напрямую, поэтому ни
+материализация, ни прогноз не перебирают даты с начала правила: берутся
+повторения только с нужного номера и только до нужной даты.
+
+Ежемесячные и ежегодные правила привязаны к дню начала: правило с 31-го
+числа в коротком месяце срабатывает в последний день месяца, а в следующем
+длинном — снова 31-го (29 февраля — 28-го в невисокосный год).
+"""
+
+import calendar
+import datetime
+from typing import Iterator
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+FREQUENCY_LABELS = {
+    "daily": "Ежедневно",
+    "weekly": "Еженедельно",
+    "monthly": "Ежемесячно",
+    "yearly": "Ежегодно",
+}
+# Шаг правила в днях (для дневных/недельных) или месяцах (для остальных)
+_DAYS_PER_STEP = {"daily": 1, "weekly": 7}
+_MONTHS_PER_STEP = {"monthly": 1, "yearly": 12}
+
+
+def _as_date(value) -> datetime.date | None:
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def _add_months(day: datetime.date, months: int) -> datetime.date:
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    last = calendar.monthrange(year, month + 1)[1]
+    return datetime.date(year, month + 1, min(day.day, last))
+
+
+def occurrence(start: datetime.date, freq: str, interval: int, n: int) -> datetime.date:
+    """Дата n-го (с нуля) повторения без учёта COUNT/UNTIL."""
+    if freq in _DAYS_PER_STEP:
+        return start + datetime.timedelta(days=n * interval * _DAYS_PER_STEP[freq])
+    return _add_months(start, n * interval * _MONTHS_PER_STEP[freq])
+
+
+def first_index_on_or_after(
+    start: datetime.date, freq: str, interval: int, day: datetime.date
+) -> int:
+    """Номер первого повторения не раньше day."""
+    if day <= start:
+        return 0
+    if freq in _DAYS_PER_STEP:
+        step = interval * _DAYS_PER_STEP[freq]
+        return -(-(day - start).days // step)
+    months = (day.year - start.year) * 12 + day.month - start.month
+    n = months // (interval * _MONTHS_PER_STEP[freq])
+    # оценка снизу: дальше не более одного шага
+    while occurrence(start, freq, interval, n) < day:
+        n += 1
+    return n
+
+
+def occurrences(
+    rule, from_index: int, until: datetime.date, since: datetime.date | None = None
+) -> Iterator[tuple[int, datetime.date]]:
+    """
+    (номер, дата) повторений правила с номера from_index (и не раньше since)
+    по until включительно, с учётом ограничений правила max_count / until_date.
+    rule — строка recurring_rules (или dict с теми же ключами).
+    """
+    start = _as_date(rule["start_date"])
+    freq, interval = rule["freq"], rule["interval"]
+    rule_until = _as_date(rule["until_date"])
+    if rule_until is not None and rule_until < until:
+        until = rule_until
+    n = from_index
+    if since is not None:
+        n = max(n, first_index_on_or_after(start, freq, interval, since))
+    max_count = rule["max_count"]
+    while max_count is None or n < max_count:
+        day = occurrence(start, freq, interval, n)
+        if day > until:
+            return
+        yield n, day
+        n += 1
+
+
+def next_occurrence(rule, index: int) -> datetime.date | None:
+    """Дата повторения с номером index или None, если правило исчерпано."""
+    if rule["max_count"] is not None and index >= rule["max_count"]:
+        return None
+    day = occurrence(_as_date(rule["start_date"]), rule["freq"], rule["interval"], index)
+    rule_until = _as_date(rule["until_date"])
+    if rule_until is not None and day > rule_until:
+        return None
+    return day
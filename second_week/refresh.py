@@ -0,0 +1,126 @@
+"""
+Планировщик обновления экрана: debounce, склейка и пропуск повторов.
+
+Обработчики (стрелки дат, вкладки, кнопки периода) только меняют состояние
+и вызывают request(). Отрисовка запускается, когда ввод затих на ``delay``
+секунд, — все изменения, накопившиеся за это время, уходят одним запросом
+к БД. Перед отрисовкой вычисляется ключ состояния (счёт, тип, период); если
+он совпадает с уже показанным, запрос к БД и page.update() не выполняются.
+
+    scheduler = RefreshScheduler(page, render=refresh, key=current_key)
+    scheduler.request()          # из любого обработчика
+    scheduler.update(*changed)   # вместо page.update() внутри render
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable
+
+DEFAULT_DEBOUNCE_SECONDS = 0.15
+
+
+class RefreshScheduler:
+    """
+    Один фоновый воркер на экран (через page.run_task): ждёт тишины во вводе,
+    сверяет ключ и вызывает render. Запросы, пришедшие во время отрисовки,
+    обрабатываются следующим проходом того же воркера.
+    """
+
+    def __init__(
+        self,
+        page,
+        render: Callable[[], Awaitable[None]],
+        key: Callable[[], Hashable],
+        delay: float = DEFAULT_DEBOUNCE_SECONDS,
+    ):
+        self.page = page
+        self.delay = delay
+        self._render = render
+        self._key = key
+        self._lock = threading.Lock()
+        self._pending = False
+        self._running = False
+        self._due = 0.0
+        self._future: Future | None = None
+        self._last_key = None
+        # Счётчики: запросы от обработчиков, отрисовки (= походы в БД),
+        # пропуски по совпавшему ключу и отправленные кадры (page.update)
+        self.requests = 0
+        self.renders = 0
+        self.skipped = 0
+        self.frames = 0
+
+    def request(self, delay: float | None = None):
+        """Запрашивает обновление; delay=0 — без ожидания (первая загрузка)."""
+        with self._lock:
+            self.requests += 1
+            self._pending = True
+            self._due = time.monotonic() + (self.delay if delay is None else delay)
+            start = not self._running
+            self._running = True
+        if start:
+            self._future = self.page.run_task(self._worker)
+
+    def invalidate(self):
+        """Забывает показанный ключ: следующий request() точно сходит в БД."""
+        self._last_key = None
+
+    def update(self, *controls):
+        """
+        page.update() с учётом кадра. С аргументами отправляются только эти
+        контролы (и их поддеревья); ещё не добавленные на страницу пропускаются —
+        они уйдут целиком вместе с View.
+        """
+        if controls:
+            controls = [c for c in controls if c is not None and c.page is not None]
+            if not controls:
+                return
+        self.frames += 1
+        self.page.update(*controls)
+
+    def cancel(self):
+        with self._lock:
+            self._pending = False
+            self._running = False
+            future, self._future = self._future, None
+        if future is not None and not future.done():
+            future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "renders": self.renders,
+            "skipped": self.skipped,
+            "frames": self.frames,
+        }
+
+    async def _worker(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                wait = self._due - time.monotonic()
+                if wait <= 0:
+                    self._pending = False
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            key = self._key()
+            if key == self._last_key:
+                self.skipped += 1
+                continue
+            self._last_key = key
+            self.renders += 1
+            try:
+                await self._render()
+            except asyncio.CancelledError:
+                self._last_key = None
+                raise
+            except Exception as e:
+                # Воркер должен пережить ошибку: следующий запрос повторит отрисовку
+                self._last_key = None
+                print(f"Refresh failed: {e}")
@@ -0,0 +1,92 @@
+"""
+In-process кэш сессий для DatabaseManager.get_user_by_session_token.
+
+Ключ — SHA-256 от токена (сам токен в памяти не хранится), значение —
+словарь пользователя и момент (секунды epoch), до которого запись можно
+отдавать: не позже expires_at сессии и не дольше ttl_seconds.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionCache:
+    """Потокобезопасный TTL/LRU-кэш token_hash -> user dict со счётчиками."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _now() -> float:
+        return time.time()
+
+    def get(self, token: str) -> dict | None:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._now():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+            if entry is not None:  # истекла
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: dict, expires_at: float):
+        valid_until = min(expires_at, self._now() + self.ttl)
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (dict(user), valid_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(token_key(token), None)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in [k for k, (u, _) in self._entries.items() if u["user_id"] == user_id]:
+                del self._entries[key]
+
+    def purge_expired(self) -> int:
+        now = self._now()
+        with self._lock:
+            expired = [k for k, (_, until) in self._entries.items() if until <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }